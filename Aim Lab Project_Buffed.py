@@ -1,7 +1,21 @@
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
-import math, random, time
+from OpenGL.GL import shaders
+import ctypes, math, platform, time
+
+import numpy as np
+
+# Gameplay constants, math helpers and the headless GameSession
+from aim_lab_core import *
+# Frame timing ring buffers and per-shot telemetry
+from aim_lab_metrics import *
+# Input recording for deterministic replays
+from aim_lab_replay import start_recording, ReplayWriter
+# Scripted agents that can play instead of the mouse
+from aim_lab_agents import AGENTS, Observation, apply_action
+# Drills defined in scenario files
+from aim_lab_scenarios import load_scenarios
 
 # =============================
 # CONFIGURATION CONSTANTS
@@ -10,303 +24,400 @@ import math, random, time
 # Window and display settings
 WINDOW_W, WINDOW_H = 1500, 1000
 ASPECT = WINDOW_W / WINDOW_H
-FOVY = 75.0
-NEAR, FAR = 0.1, 5000.0
-
-# Arena dimensions
-ARENA_HALF = 900
-ARENA_DEPTH = ARENA_HALF * 0.9
-FLOOR_Z = 0.0
-CAM_HEIGHT = 140.0
-WALL_HEIGHT = 400
-
-# Target configuration
-TARGET_MIN_Z = 80
-TARGET_MAX_Z = 220
-TARGET_RADIUS = 24
-MAX_TARGETS = 5
-
-# Game duration options
-DURATION_OPTIONS = [15.0, 30.0, 60.0, 120.0]  # seconds
-DURATION_LABELS = ["15 sec", "30 sec", "1 min", "2 min"]
-
-# Spawn mechanics - controls target appearance rate
-SPAWN_INTERVAL_START = 1.2   # initial spawn delay (seconds)
-SPAWN_INTERVAL_MIN = 0.20    # minimum spawn delay (fastest)
-SPAWN_ACCEL = 0.002          # spawn rate acceleration factor
-
-# Player controls
-MOVE_SPEED = 10.0            # lateral movement speed
-FOV_MIN = 30.0               # minimum field of view
-FOV_MAX = 120.0              # maximum field of view
-FOV_STEP = 2.0               # FOV adjustment step size
-RAY_MAX_DIST = 3000          # maximum shooting distance
-
-# Animation settings
-SPHERE_MOVE_SPEED = 80.0     # oscillation speed for animated targets
-SPHERE_MOVE_RANGE = 200.0    # oscillation distance
-
-# Game mode constants
-MODES = ["Normal", "Endless", "Time Trial", "Precision"]
-MODE_NORMAL, MODE_ENDLESS, MODE_TIMETRIAL, MODE_PRECISION = 0, 1, 2, 3
-
-# Mode-specific settings
-TIME_TRIAL_HIT_BONUS = 1.0         # bonus time per hit in Time Trial
-TT_MIN_RADIUS_FACTOR = 0.45        # minimum target size in Time Trial (45% of original)
-PRECISION_INNER_RATIO = 0.50       # headshot radius ratio for Precision mode
+RENDER_FPS_CAP = 144                     # frames drawn per second (0 = uncapped)
+# Saved files (all off by default; paths are relative to the working directory)
+RECORD_REPLAYS = False                   # save each finished run's inputs to REPLAY_DIR (replays/) for aim_lab_replay.py
+RECORD_SHOTS = False                     # stream per-shot telemetry to SHOT_LOG_DIR (telemetry/)
+RECORD_HISTORY = False                   # keep finished sessions in HISTORY_PATH (history.sqlite3) for personal bests
+RECORD_PROFILE = False                   # export each run's frame timings to PROFILE_DIR (profiles/)
+PLAYER_NAME = "Player"                   # history key for personal bests and trends
+HISTORY_POLL_MS = 50                     # summary screen check interval for the history result
+DEMO_AGENT = None                        # 'perfect', 'human' or 'random' plays each run (None: the mouse)
+
+# Sphere level of detail (finest to coarsest)
+SPHERE_LODS = [(32, 24), (20, 14), (12, 9), (8, 6)]    # (slices, stacks) per LOD
+LOD_PIXEL_THRESHOLDS = [48.0, 20.0, 8.0]              # min projected radius (px) for LOD 0, 1, 2
+LOD_HYSTERESIS = 0.15                                 # fractional margin before switching LOD
+LOD_DEBUG_COLORS = [(0.2, 0.9, 0.3), (0.95, 0.9, 0.2), (0.98, 0.55, 0.1), (0.95, 0.2, 0.2)]
+SPHERE_INSTANCING = True                              # instanced sphere batches when the context is GL 3.3+
+
+# Instanced sphere shader: the fixed-function lighting set up in init_gl (two directional
+# lights, GL_COLOR_MATERIAL on ambient and diffuse, material specular) evaluated per vertex
+SPHERE_VERTEX_SHADER = """
+#version 120
+attribute vec3 unit;        // unit sphere vertex, also its normal
+attribute vec4 sphere;      // per instance: centre xyz, radius
+attribute vec3 color;       // per instance: ambient and diffuse colour
+varying vec4 shade;
+
+void main() {
+    vec4 eye = gl_ModelViewMatrix * vec4(sphere.xyz + unit * sphere.w, 1.0);
+    gl_Position = gl_ProjectionMatrix * eye;
+    vec3 n = normalize(gl_NormalMatrix * unit);
+    vec3 c = gl_FrontMaterial.emission.rgb + gl_LightModel.ambient.rgb * color;
+    for (int i = 0; i < 2; i++) {
+        vec3 l = normalize(gl_LightSource[i].position.xyz);
+        float diffuse = max(dot(n, l), 0.0);
+        c += (gl_LightSource[i].ambient.rgb + diffuse * gl_LightSource[i].diffuse.rgb) * color;
+        if (diffuse > 0.0) {
+            float highlight = max(dot(n, normalize(l + vec3(0.0, 0.0, 1.0))), 0.0);
+            c += pow(highlight, gl_FrontMaterial.shininess)
+                 * gl_LightSource[i].specular.rgb * gl_FrontMaterial.specular.rgb;
+        }
+    }
+    shade = vec4(clamp(c, 0.0, 1.0), 1.0);
+}
+"""
+SPHERE_FRAGMENT_SHADER = """
+#version 120
+varying vec4 shade;
+
+void main() {
+    gl_FragColor = shade;
+}
+"""
+
+# Text rendering
+TEXT_FONTS = [GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_HELVETICA_12]  # fonts with cached glyph lists
+CONTROLS_TEXT = "A/D: Move | W/S: FOV | M: Animation | G: Glowing | L: LOD | P: Profiler | Space: Pause | R: Restart | Esc: Quit"
+
+# Frame profiler overlay
+PROFILER_REFRESH = 0.5                   # seconds between overlay statistic updates
 
 # =============================
 # GLOBAL STATE VARIABLES
 # =============================
 
-# OpenGL quadric for rendering spheres
-quadric = None
+# Shared unit-sphere meshes, one per LOD (built once in init_gl)
+sphere_meshes = []
+sphere_program = None                    # instanced sphere shader and attribute locations (None: display lists)
 
-# Player state
-player_pos = [0.0, -300.0, CAM_HEIGHT]  # [x, y, z] position
-yaw = 0.0                                # horizontal rotation (degrees)
-pitch = -5.0                             # vertical rotation (degrees)
-current_fov = FOVY                       # current field of view
+# Display lists for static arena geometry (rebuilt when dimensions change)
+floor_list = None
+walls_list = None
+arena_geometry_key = None                # (ARENA_HALF, WALL_HEIGHT) the lists were built for
+
+# Input settings
 sensitivity = 0.12                       # mouse sensitivity
 mouse_locked = True                      # mouse lock state
 
 # Game configuration state
 selected_duration_index = 1              # index into DURATION_OPTIONS (default: 30s)
-selected_mode_index = MODE_ENDLESS       # current game mode
+selected_mode_index = MODE_ENDLESS       # current game mode (indices past MODES select a drill)
+drills = []                              # Scenarios loaded from SCENARIO_DIR at startup
 SESSION_TIME = DURATION_OPTIONS[selected_duration_index]  # current session duration
 
-# Visual effects toggles
-animated_spheres = False                 # targets oscillate left/right
-glowing_spheres = False                  # targets pulse in size/brightness
-
-# Game statistics
-score = 0                                # points earned
-misses = 0                               # shots that missed
-shots = 0                                # total shots fired
-hits = 0                                 # successful hits
-headshot_hits = 0                        # precision headshots (Precision mode only)
-spawned_spheres_count = 0                # total targets spawned this session
-
-# Timing state
-start_time = None                        # game start timestamp
-elapsed = 0.0                            # elapsed game time
-paused = False                           # pause state
-pause_time = 0.0                         # timestamp when paused
-time_bank = SESSION_TIME                 # remaining time (Time Trial mode)
-
-# Target management
-spawn_interval = SPAWN_INTERVAL_START    # current spawn delay
-targets = []                             # active targets list
+# Debug overlays
+show_lod_debug = False                   # tint targets by LOD and show LOD counts
+show_profiler = False                    # per-phase timing overlay
+profiler = FrameProfiler()               # phase timings for the current run
+profiler_stats = None                    # (phase_stats, frame_stats) shown by the overlay
+profiler_stats_time = 0.0                # perf_counter time profiler_stats was computed
+
+# Active game session (gameplay state lives in aim_lab_core.GameSession)
+session = None
+scheduler = None                         # FixedStepScheduler stepping the session
+demo_agent = None                        # agent playing the session (DEMO_AGENT), if any
+next_frame_time = 0.0                    # perf_counter deadline for the next frame
+frame_timer_armed = False                # frame timer pending (only during unpaused gameplay)
 
 # UI state and game flow
 game_state = 'menu'                      # 'menu', 'running', 'summary'
-duration_buttons = []                    # UI button rectangles for duration selection
-mode_buttons = []                        # UI button rectangles for mode selection
 summary_data = {}                        # post-game statistics
+history = SessionHistory() if RECORD_HISTORY else None   # session database (background thread)
+history_result = None                    # future of the finished run's history standing
+replay_writer = ReplayWriter() if RECORD_REPLAYS else None   # saves finished runs (background thread)
 
-# UI layout rectangles (computed dynamically)
-START_BTN_RECT = (0, 0, 0, 0)
-SUMMARY_PLAY_RECT = (0, 0, 0, 0)
-SUMMARY_MENU_RECT = (0, 0, 0, 0)
+# Retained UI trees (built by compute_menu_layout on reshape)
+menu_ui = None                           # start screen root widget
+summary_ui = None                        # summary screen root widget
+duration_buttons = []                    # duration selection Buttons
+mode_buttons = []                        # mode selection Buttons
+summary_labels = {}                      # summary statistic Labels by name
 
 # =============================
-# UTILITY FUNCTIONS
+# RETAINED UI WIDGETS
 # =============================
 
-def clamp(v, a, b):
-    """Clamp value v between min a and max b"""
-    return max(a, min(b, v))
-
-def deg2rad(a):
-    """Convert degrees to radians"""
-    return a * math.pi / 180.0
-
-def look_dir_from_angles(yaw_deg, pitch_deg):
-    """Calculate 3D look direction vector from yaw/pitch angles"""
-    cy, sy = math.cos(deg2rad(yaw_deg)), math.sin(deg2rad(yaw_deg))
-    cp, sp = math.cos(deg2rad(pitch_deg)), math.sin(deg2rad(pitch_deg))
-    fx = sy * cp
-    fy = cy * cp
-    fz = sp
-    # Normalize vector
-    l = math.sqrt(fx*fx + fy*fy + fz*fz)
-    return [fx/l, fy/l, fz/l]
-
-def add(a, b):
-    """Add two 3D vectors"""
-    return [a[0]+b[0], a[1]+b[1], a[2]+b[2]]
-
-def line_sphere_intersect(ro, rd, sc, sr):
+class Widget:
     """
-    Ray-sphere intersection test
-    ro: ray origin, rd: ray direction, sc: sphere center, sr: sphere radius
-    Returns distance to intersection or None if no hit
+    Node of the retained UI tree: a rectangle (GL window coordinates) with children
+    Each widget bakes its own drawing into a display list that calls its children's
+    lists, so a whole screen draws with one glCallList and a state change only
+    recompiles the widget that changed.
     """
-    oc = [ro[0]-sc[0], ro[1]-sc[1], ro[2]-sc[2]]
-    b = oc[0]*rd[0] + oc[1]*rd[1] + oc[2]*rd[2]
-    c = oc[0]*oc[0] + oc[1]*oc[1] + oc[2]*oc[2] - sr*sr
-    disc = b*b - c
-    if disc < 0: 
-        return None
-    t = -b - math.sqrt(disc)
-    if t < 0: 
-        return None
-    return t
 
-def point_in_rect(px, py, rect):
-    """Check if point (px, py) is inside rectangle rect"""
-    rx, ry, rw, rh = rect
-    py_flipped = WINDOW_H - py  # Flip Y coordinate for OpenGL
-    return (rx <= px <= rx + rw) and (ry <= py_flipped <= ry + rh)
+    def __init__(self, rect=(0, 0, 0, 0), on_click=None):
+        self.rect = rect
+        self.on_click = on_click
+        self.children = []
+        self.list_id = glGenLists(1)
+        self.dirty = True
+
+    def add(self, *children):
+        """Append children; a container's rect grows to cover them (for hit testing)"""
+        for child in children:
+            if self.children or self.rect[2] or self.rect[3]:
+                x0, y0 = min(self.rect[0], child.rect[0]), min(self.rect[1], child.rect[1])
+                x1 = max(self.rect[0] + self.rect[2], child.rect[0] + child.rect[2])
+                y1 = max(self.rect[1] + self.rect[3], child.rect[1] + child.rect[3])
+                self.rect = (x0, y0, x1 - x0, y1 - y0)
+            else:
+                self.rect = child.rect
+            self.children.append(child)
+        self.dirty = True
+        return self
+
+    def emit(self):
+        """Immediate-mode drawing of this widget alone (children draw on top)"""
+        pass
+
+    def invalidate(self):
+        """Mark the widget for recompilation and request a redraw (once until it is rebaked)"""
+        if not self.dirty:
+            self.dirty = True
+            glutPostRedisplay()
+
+    def bake(self):
+        """Recompile the display lists of dirty widgets in this subtree"""
+        for child in self.children:
+            child.bake()
+        if self.dirty:
+            glNewList(self.list_id, GL_COMPILE)
+            self.emit()
+            for child in self.children:
+                glCallList(child.list_id)
+            glEndList()
+            self.dirty = False
+
+    def draw(self):
+        self.bake()
+        glCallList(self.list_id)
+
+    def hit(self, x, y):
+        """Deepest clickable widget containing (x, y), or None; subtrees outside their rect are skipped"""
+        rx, ry, rw, rh = self.rect
+        if not (rx <= x <= rx + rw and ry <= y <= ry + rh):
+            return None
+        for child in self.children:
+            found = child.hit(x, y)
+            if found is not None:
+                return found
+        return self if self.on_click else None
+
+    def release(self):
+        """Free the display lists of this subtree"""
+        for child in self.children:
+            child.release()
+        glDeleteLists(self.list_id, 1)
+
+class Panel(Widget):
+    """Solid background rectangle"""
+
+    def __init__(self, rect, colour=(0.04, 0.04, 0.05)):
+        super().__init__(rect)
+        self.colour = colour
+
+    def emit(self):
+        x, y, w, h = self.rect
+        glColor3f(*self.colour)
+        glBegin(GL_QUADS)
+        glVertex2f(x, y)
+        glVertex2f(x + w, y)
+        glVertex2f(x + w, y + h)
+        glVertex2f(x, y + h)
+        glEnd()
+
+class Label(Widget):
+    """Single line of text; set_text() only invalidates when the text changes"""
+
+    def __init__(self, x, y, text="", font=GLUT_BITMAP_HELVETICA_18, colour=(1, 1, 1)):
+        super().__init__((x, y, 0, 0))
+        self.text, self.font, self.colour = text, font, colour
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.invalidate()
+
+    def emit(self):
+        if self.text:
+            glColor3f(*self.colour)
+            draw_text(self.rect[0], self.rect[1], self.text, self.font)
+
+class Button(Widget):
+    """Clickable labelled button with a selected (highlight) state"""
+
+    def __init__(self, rect, label, on_click, highlight=False):
+        super().__init__(rect, on_click)
+        self.label, self.highlight = label, highlight
+
+    def set_highlight(self, highlight):
+        if highlight != self.highlight:
+            self.highlight = highlight
+            self.invalidate()
+
+    def emit(self):
+        x, y, w, h = self.rect
+        draw_button(x, y, w, h, self.label, self.highlight)
+
+def ui_hit(root, x, y):
+    """Clickable widget of root under GLUT window coordinates (x, y), or None"""
+    return root.hit(x, WINDOW_H - y)  # Flip Y coordinate for OpenGL
 
 # =============================
 # UI LAYOUT COMPUTATION
 # =============================
 
 def compute_menu_layout():
-    """Calculate positions and sizes for all UI elements"""
-    global START_BTN_RECT, SUMMARY_PLAY_RECT, SUMMARY_MENU_RECT, duration_buttons, mode_buttons
-    
+    """Calculate positions and sizes for all UI elements and rebuild the retained widget trees"""
+    global menu_ui, summary_ui, duration_buttons, mode_buttons, summary_labels
+
+    for root in (menu_ui, summary_ui):
+        if root is not None:
+            root.release()
+    menu_ui = Widget()
+    summary_ui = Widget()
+
+    # Main menu: background panel and title
+    panel_w, panel_h = 980, 580
+    menu_ui.add(Panel((WINDOW_W//2 - panel_w//2, WINDOW_H//2 - panel_h//2, panel_w, panel_h)),
+                Label(WINDOW_W//2 - 200, WINDOW_H//2 + 200, "Enhanced Aim Lab 3D - Start"))
+
     # Main start button
     BUTTON_W, BUTTON_H = 420, 70
-    START_BTN_RECT = (WINDOW_W//2 - BUTTON_W//2, WINDOW_H//2 + 40, BUTTON_W, BUTTON_H)
-
-    # Summary screen buttons
-    SUMMARY_PLAY_RECT = (WINDOW_W//2 - 240, WINDOW_H//2 - 180, 200, 64)
-    SUMMARY_MENU_RECT = (WINDOW_W//2 + 40,  WINDOW_H//2 - 180, 200, 64)
+    menu_ui.add(Button((WINDOW_W//2 - BUTTON_W//2, WINDOW_H//2 + 40, BUTTON_W, BUTTON_H), "Click Here to Start", start_run))
 
     # Duration selection buttons (horizontal row)
-    duration_buttons = []
     button_width = 180
     button_height = 50
     button_spacing = 20
     total_width = (button_width * 4) + (button_spacing * 3)
     start_x = WINDOW_W//2 - total_width//2
+    duration_buttons = []
     for i in range(4):
         x = start_x + i * (button_width + button_spacing)
         y = WINDOW_H//2 - 120
-        duration_buttons.append((x, y, button_width, button_height))
-
-    # Mode selection buttons (horizontal row)
-    mode_buttons = []
-    m_w, m_h, m_gap = 200, 54, 20
-    total_w = len(MODES) * m_w + (len(MODES) - 1) * m_gap
+        duration_buttons.append(Button((x, y, button_width, button_height), DURATION_LABELS[i],
+                                       lambda i=i: select_duration(i), i == selected_duration_index))
+    menu_ui.add(Label(WINDOW_W//2 - 100, WINDOW_H//2 - 60, "Select Duration:"), Widget().add(*duration_buttons))
+
+    # Mode selection buttons (horizontal row: built-in modes, then drills)
+    names = MODES + [d.name for d in drills]
+    m_h, m_gap = 54, 20
+    m_w = min(200, (panel_w - 40 - (len(names) - 1) * m_gap) // len(names))
+    total_w = len(names) * m_w + (len(names) - 1) * m_gap
     mx0 = WINDOW_W//2 - total_w//2
     my = WINDOW_H//2 - 40
-    for i in range(len(MODES)):
-        mode_buttons.append((mx0 + i*(m_w + m_gap), my, m_w, m_h))
-
-# =============================
-# TARGET MANAGEMENT
-# =============================
+    mode_buttons = [Button((mx0 + i*(m_w + m_gap), my, m_w, m_h), names[i],
+                           lambda i=i: select_mode(i), i == selected_mode_index) for i in range(len(names))]
+    menu_ui.add(Label(WINDOW_W//2 - 80, WINDOW_H//2 + 20, "Select Mode:"), Widget().add(*mode_buttons))
 
-def random_target_pos():
-    """Generate random position within arena bounds for new target"""
-    x = random.uniform(-ARENA_HALF * 0.5, ARENA_HALF * 0.5)
-    y = random.uniform(50, ARENA_DEPTH * 0.9)
-    z = random.uniform(TARGET_MIN_Z, TARGET_MAX_Z)
-    return [x, y, z]
-
-def endless_ttl_now():
-    """
-    Calculate target time-to-live for Endless mode
-    TTL decreases as game progresses to increase difficulty
-    """
-    base_min, base_max = 2.0, 2.8   # early-game TTL range
-    min_min,  min_max  = 0.6, 1.2   # late-game TTL range
-    # Exponential difficulty curve
-    d = clamp((elapsed / SESSION_TIME) ** 1.5, 0.0, 1.0)
-    mn = base_min*(1.0-d) + min_min*d
-    mx = base_max*(1.0-d) + min_max*d
-    return random.uniform(mn, mx)
-
-def time_trial_size_factor():
-    """
-    Calculate target size reduction for Time Trial mode
-    Targets shrink linearly over session duration
-    """
-    total = max(1.0, SESSION_TIME)
-    d = clamp(elapsed / total, 0.0, 1.0)
-    return (1.0 - d) * (1.0 - TT_MIN_RADIUS_FACTOR) + TT_MIN_RADIUS_FACTOR
+    # Mode descriptions
+    menu_ui.add(Label(WINDOW_W//2 - 460, WINDOW_H//2 - 170, "Mode Descriptions:"))
+    mode_descriptions = [
+        "Normal: Standard targets, fixed target lifetime",
+        "Endless: Increasing difficulty, decreasing target lifetime",
+        "Time Trial: Targets shrink over time, +1s bonus per hit",
+        "Precision: Targets have headshot zone, +5 points for headshots"
+    ]
+    for i, desc in enumerate(mode_descriptions):
+        menu_ui.add(Label(WINDOW_W//2 - 460, WINDOW_H//2 - 200 - i*20, desc))
 
-def spawn_target():
-    """Create new target based on current game mode"""
-    global spawned_spheres_count
-    
-    if len(targets) >= MAX_TARGETS:
-        return
+    # Summary screen: background panel and title
+    panel_w, panel_h = 980, 600
+    summary_ui.add(Panel((WINDOW_W//2 - panel_w//2, WINDOW_H//2 - panel_h//2, panel_w, panel_h)),
+                   Label(WINDOW_W//2 - 90, WINDOW_H//2 + 220, "Game Summary"))
+
+    # Statistics (texts filled in by refresh_summary_ui)
+    x0, y0 = WINDOW_W//2 - 180, WINDOW_H//2 + 140
+    summary_labels = {
+        'mode': Label(x0, y0),
+        'duration': Label(x0, y0 - 40),
+        'spawned': Label(x0, y0 - 80),
+        'score': Label(x0, y0 - 120),
+        'shots': Label(x0, y0 - 160),
+        'accuracy': Label(x0, y0 - 200),
+        # Mode-specific information
+        'result': Label(x0, y0 - 280),
+        'headshot_hits': Label(WINDOW_W//2 - 50, y0 - 200),
+        'headshot_accuracy': Label(WINDOW_W//2 + 120, y0 - 200),
+        # Aim distributions (right column)
+        'aim_title': Label(WINDOW_W//2 + 100, y0),
+        'time_to_hit': Label(WINDOW_W//2 + 100, y0 - 40),
+        'flick_angle': Label(WINDOW_W//2 + 100, y0 - 80),
+        'time_to_kill': Label(WINDOW_W//2 + 100, y0 - 120),
+        # Session history (filled in once the database write completes)
+        'personal_best': Label(WINDOW_W//2 + 100, y0 - 160),
+        'trend': Label(WINDOW_W//2 + 100, y0 - 240),
+    }
+    summary_ui.add(*summary_labels.values())
+    refresh_summary_ui()
 
-    # Mode-specific target configuration
-    if selected_mode_index == MODE_TIMETRIAL:
-        # Time Trial: shrinking targets, fixed TTL
-        size_factor = time_trial_size_factor()
-        r = TARGET_RADIUS * size_factor
-        ttl = 4.0
-    elif selected_mode_index == MODE_ENDLESS:
-        # Endless: normal size, decreasing TTL
-        r = TARGET_RADIUS
-        ttl = endless_ttl_now()
-    elif selected_mode_index == MODE_PRECISION:
-        # Precision: normal size, standard TTL, special scoring
-        r = TARGET_RADIUS
-        ttl = random.uniform(2.8, 4.5)
-    else:  # MODE_NORMAL
-        # Normal: consistent behavior
-        r = TARGET_RADIUS
-        ttl = random.uniform(2.8, 4.5)
-
-    pos = random_target_pos()
-    target = {
-        'p': pos,                                    # current position [x, y, z]
-        'original_x': pos[0],                       # initial x for animation oscillation
-        'original_r': r,                            # base radius before effects
-        'r': r,                                     # current rendered radius
-        'born': time.time(),                        # creation timestamp
-        'ttl': ttl,                                 # time to live (seconds)
-        'move_direction': random.choice([-1, 1]),   # oscillation direction
-        'glow_phase': random.uniform(0, 2 * math.pi)  # glow animation phase
+    # Summary screen buttons
+    summary_ui.add(Widget().add(Button((WINDOW_W//2 - 240, WINDOW_H//2 - 180, 200, 64), "Play Again", start_run),
+                                Button((WINDOW_W//2 + 40,  WINDOW_H//2 - 180, 200, 64), "Main Menu", show_menu)))
+
+def refresh_summary_ui():
+    """Update the summary screen's statistic labels from summary_data"""
+    mode = summary_data.get('mode', '')
+    # Rules come from the finished session, so drills report their own clock and zones
+    duration = session.duration if session is not None else DURATION_OPTIONS[selected_duration_index]
+    banked = session is not None and session.banked
+    head_zone = session is not None and session.head_zone
+    texts = {
+        'mode': f"Mode: {mode}",
+        'duration': f"Starting Time Bank: {duration:.0f}s" if banked else f"Game Duration: {duration:.0f}s",
+        'spawned': f"Targets Spawned: {summary_data.get('spawned_spheres', 0)}",
+        'score': f"Score: {summary_data.get('score', 0)}",
+        'shots': f"Shots Fired: {summary_data.get('shots', 0)}",
+        'accuracy': f"Accuracy: {summary_data.get('accuracy', 0)}%",
+        'result': "",
+        'headshot_hits': "",
+        'headshot_accuracy': "",
+        'aim_title': "",
+        'time_to_hit': "",
+        'flick_angle': "",
+        'time_to_kill': "",
+        'personal_best': "",
+        'trend': "",
     }
-    targets.append(target)
-    spawned_spheres_count += 1
-
-def update_targets():
-    """Update all active targets (animation, effects, lifetime)"""
-    global targets
-    now = time.time()
-    alive = []
-
-    for t in targets:
-        # Remove targets that have exceeded their TTL
-        if now - t['born'] <= t['ttl']:
-            # Apply horizontal oscillation if animation enabled
-            if animated_spheres:
-                elapsed_time = now - t['born']
-                offset = math.sin(elapsed_time * SPHERE_MOVE_SPEED / SPHERE_MOVE_RANGE) * SPHERE_MOVE_RANGE * 0.5
-                t['p'][0] = t['original_x'] + offset
-                t['p'][0] = clamp(t['p'][0], -ARENA_HALF*0.8, ARENA_HALF*0.8)
-
-            # Apply glow effect if enabled
-            if glowing_spheres:
-                t['glow_phase'] += 0.03
-                base_r = t['original_r']
-                
-                # Time Trial: apply shrink effect before glow
-                if selected_mode_index == MODE_TIMETRIAL:
-                    base_r = max(TARGET_RADIUS*TT_MIN_RADIUS_FACTOR, TARGET_RADIUS * time_trial_size_factor())
-                
-                # Apply pulsing glow effect
-                t['r'] = base_r * (1.0 + 0.3 * math.sin(t['glow_phase']))
+    # Aim quantiles (median / p90 / p99); times in milliseconds
+    aim = summary_data.get('aim')
+    if aim:
+        texts['aim_title'] = "Aim (median / p90 / p99)"
+        for name, title, scale, unit in (('time_to_hit', "Time to Hit", 1000.0, "ms"),
+                                         ('flick_angle', "Flick Angle", 1.0, "deg"),
+                                         ('time_to_kill', "Time to Kill", 1000.0, "ms")):
+            stats = aim[name]
+            values = [stats[q] for q in ('median', 'p90', 'p99')]
+            if None in values:
+                texts[name] = f"{title}: -"
             else:
-                # No glow: apply mode-specific radius only
-                if selected_mode_index == MODE_TIMETRIAL:
-                    t['r'] = max(TARGET_RADIUS*TT_MIN_RADIUS_FACTOR, TARGET_RADIUS * time_trial_size_factor())
-                else:
-                    t['r'] = t['original_r']
-
-            alive.append(t)
-
-    targets = alive[:MAX_TARGETS]
-    return targets
+                texts[name] = f"{title}: {' / '.join(f'{v * scale:.0f}' for v in values)} {unit}"
+    # Personal best and trend for this mode and duration
+    if history_result is not None and history_result.done() and history_result.exception() is None:
+        standing = history_result.result()
+        new_best = standing['previous_best'] is None or summary_data.get('score', 0) > standing['previous_best']
+        texts['personal_best'] = f"Personal Best: {standing['best']}" + (" (new!)" if new_best else "")
+        if standing['previous'] is not None:
+            change = standing['recent'] - standing['previous']
+            texts['trend'] = f"Trend: {standing['recent']:.1f} avg of last {HISTORY_TREND} ({change:+.1f})"
+        else:
+            texts['trend'] = f"Trend: {standing['recent']:.1f} avg so far"
+    if banked:
+        reason = summary_data.get('reason', '')
+        if reason == "out_of_time":
+            texts['result'] = "Result: Timer reached zero"
+        elif reason == "time_limit":
+            texts['result'] = "Result: Time limit reached"
+        else:
+            texts['result'] = f"Result: Ended early ({reason})"
+    if head_zone:
+        texts['headshot_hits'] = f"| Headshot Hits: {summary_data.get('headshot_hits', 0)}"
+        texts['headshot_accuracy'] = f"| Headshot Accuracy: {summary_data.get('headshot_accuracy', 0)}%"
+    for name, text in texts.items():
+        summary_labels[name].set_text(text)
 
 # =============================
 # GAME FLOW CONTROL
@@ -314,121 +425,172 @@ def update_targets():
 
 def start_run():
     """Initialize new game session"""
-    global game_state, start_time, score, misses, shots, targets, spawn_interval
-    global player_pos, current_fov, animated_spheres, glowing_spheres, paused, SESSION_TIME
-    global spawned_spheres_count, hits, headshot_hits, time_bank, elapsed
+    global game_state, SESSION_TIME, session, scheduler, demo_agent
 
     # Update session time based on current selection
     SESSION_TIME = DURATION_OPTIONS[selected_duration_index]
+    close_shot_log(wait=False)           # restarting mid-run
+    if selected_mode_index < len(MODES):
+        session = GameSession(selected_mode_index, SESSION_TIME, clock=time.perf_counter)
+    else:                                # drills bring their own duration and rules
+        session = GameSession(clock=time.perf_counter, scenario=drills[selected_mode_index - len(MODES)])
+    session.aspect = ASPECT
+    if RECORD_SHOTS:
+        session.shot_log = ShotLog(shot_log_path(session.mode_name.replace(' ', ''), session.seed))
+    scheduler = FixedStepScheduler(session)
+    demo_agent = AGENTS[DEMO_AGENT]() if DEMO_AGENT else None
+    start_recording(session)
+    profiler.reset()
+    session.profiler = profiler
+    schedule_frames()
     game_state = 'running'
-    start_time = time.time()
-    elapsed = 0.0
-
-    # Reset all statistics
-    score = misses = shots = 0
-    hits = headshot_hits = 0
-    spawned_spheres_count = 0
-    targets = []
-    spawn_interval = SPAWN_INTERVAL_START
-    paused = False
-
-    # Initialize Time Trial time bank
-    time_bank = SESSION_TIME
-
-    # Reset player state
-    player_pos[:] = [0.0, -300.0, CAM_HEIGHT]
-    current_fov = FOVY
-    animated_spheres = False
-    glowing_spheres = False
 
     # Lock cursor for gameplay
     glutSetCursor(GLUT_CURSOR_NONE)
     glutWarpPointer(WINDOW_W//2, WINDOW_H//2)
 
+def select_duration(i):
+    """Menu: choose session duration i"""
+    global selected_duration_index, SESSION_TIME
+    selected_duration_index = i
+    SESSION_TIME = DURATION_OPTIONS[i]
+    for k, button in enumerate(duration_buttons):
+        button.set_highlight(k == i)
+
+def select_mode(i):
+    """Menu: choose game mode i"""
+    global selected_mode_index
+    selected_mode_index = i
+    for k, button in enumerate(mode_buttons):
+        button.set_highlight(k == i)
+
+def show_menu():
+    """Return to the main menu"""
+    global game_state
+    game_state = 'menu'
+    glutPostRedisplay()
+
 def end_run(reason="time"):
     """End current game session and prepare summary"""
-    global game_state, summary_data
+    global game_state, summary_data, history_result
     game_state = 'summary'
 
-    # Calculate final statistics
-    accuracy_pct = (0 if shots == 0 else int(100 * hits / max(1, shots)))
-    headshot_acc = (0 if shots == 0 else int(100 * headshot_hits / shots))
-
-    # Determine actual run time based on mode
-    if selected_mode_index in (MODE_NORMAL, MODE_ENDLESS, MODE_PRECISION):
-        run_time = min(elapsed, SESSION_TIME)  # Cap at session time
-    else:  # Time Trial shows survival time
-        run_time = elapsed
-
-    summary_data = {
-        'mode': MODES[selected_mode_index],
-        'score': score,
-        'misses': misses,
-        'shots': shots,
-        'hits': hits,
-        'accuracy': accuracy_pct,
-        'time': run_time,
-        'spawned_spheres': spawned_spheres_count,
-        'reason': reason,
-        'headshot_hits': headshot_hits,
-        'headshot_accuracy': headshot_acc
-    }
+    if session.state == 'running':
+        session.end(reason)
+    summary_data = session.summary
+
+    # Store the run; the summary screen picks up personal best and trend once written
+    history_result = None
+    if history is not None:
+        history_result = history.record(history_row(PLAYER_NAME, session.duration, summary_data, session.seed))
+        glutTimerFunc(HISTORY_POLL_MS, poll_history, 0)
+    refresh_summary_ui()
+    glutPostRedisplay()
+
+    # Keep the run's seed and inputs so it can be replayed and re-scored
+    if replay_writer is not None:
+        replay_writer.save(session, scheduler.tick).add_done_callback(report_replay)
+
+    # The writer thread finishes the shot log in the background
+    close_shot_log(wait=False)
+
+    # Dump the run's frame timings for offline analysis (whether or not the overlay is up)
+    if RECORD_PROFILE:
+        export_profile()
 
     # Unlock cursor
     glutSetCursor(GLUT_CURSOR_LEFT_ARROW)
 
+def poll_history(value):
+    """Timer: show the history standing once the database write is done"""
+    if history_result is None or game_state != 'summary':
+        return
+    if not history_result.done():
+        glutTimerFunc(HISTORY_POLL_MS, poll_history, 0)
+        return
+    if history_result.exception() is not None:
+        print("Could not save session history:", history_result.exception())
+    refresh_summary_ui()
+    glutPostRedisplay()
+
+def report_replay(future):
+    """Writer thread: report a replay that could not be saved"""
+    if future.exception() is not None:
+        print("Could not save replay:", future.exception())
+
+def close_shot_log(wait=True):
+    """Stop the current session's shot log, if any (wait blocks until it is on disk)"""
+    if session is not None and session.shot_log is not None:
+        session.shot_log.close(wait)
+        session.shot_log = None
+
 # =============================
 # INPUT HANDLING
 # =============================
 
 def keyboardListener(key, x, y):
     """Handle keyboard input"""
-    global player_pos, current_fov, animated_spheres, glowing_spheres, game_state, paused, pause_time, start_time
+    global show_lod_debug, show_profiler
 
     if key == b'\x1b':  # Escape key - quit game
+        close_shot_log()
+        if history is not None:
+            history.close()
+        if replay_writer is not None:
+            replay_writer.close()
         glutLeaveMainLoop()
 
+    # Debug overlays work in any state (redraw in case the frame timer is idle)
+    if key in (b'l', b'L'):  # Toggle LOD debug overlay
+        show_lod_debug = not show_lod_debug
+        glutPostRedisplay()
+        return
+    if key in (b'p', b'P'):  # Toggle frame profiler overlay
+        show_profiler = not show_profiler
+        glutPostRedisplay()
+        return
+
+    if game_state != 'running':
+        return
+
     # Restart current game (R key)
-    if (key == b'r' or key == b'R') and game_state == 'running':
+    if key in (b'r', b'R'):
         start_run()
         return
 
-    # Pause/unpause (Spacebar)
-    if key == b' ' and game_state == 'running':
-        if not paused:
-            paused = True
-            pause_time = time.time()
-        else:
-            paused = False
-            # Adjust start time to exclude pause duration
-            dt = time.time() - pause_time
-            if start_time is not None:
-                globals()['start_time'] += dt
+    # Pause/unpause (Spacebar); session time stops while paused
+    if key == b' ':
+        session.toggle_pause()
+        if not session.paused:
+            # Resume without simulating or profiling the time spent paused
+            scheduler.resync()
+            profiler.last_frame = None
+            schedule_frames()
+        glutPostRedisplay()
         return
 
     # Toggle visual effects
     if key in (b'g', b'G'):  # Toggle glowing spheres
-        glowing_spheres = not glowing_spheres
+        session.toggle_glowing()
+        glutPostRedisplay()
         return
     if key in (b'm', b'M'):  # Toggle animated spheres
-        animated_spheres = not animated_spheres
+        session.toggle_animated()
+        glutPostRedisplay()
         return
 
-    # Player movement and view controls (only during active gameplay)
-    if game_state == 'running' and not paused:
-        # Lateral movement (A/D keys)
-        if key in (b'a', b'A'):
-            player_pos[0] -= MOVE_SPEED
-            player_pos[0] = clamp(player_pos[0], -ARENA_HALF + 50, ARENA_HALF - 50)
-        if key in (b'd', b'D'):
-            player_pos[0] += MOVE_SPEED
-            player_pos[0] = clamp(player_pos[0], -ARENA_HALF + 50, ARENA_HALF - 50)
-        
-        # Field of view adjustment (W/S keys)
-        if key in (b'w', b'W'):
-            current_fov = clamp(current_fov - FOV_STEP, FOV_MIN, FOV_MAX)
-        if key in (b's', b'S'):
-            current_fov = clamp(current_fov + FOV_STEP, FOV_MIN, FOV_MAX)
+    # Player movement and view controls (ignored by the session while paused)
+    # Lateral movement (A/D keys)
+    if key in (b'a', b'A'):
+        session.strafe(-MOVE_SPEED)
+    if key in (b'd', b'D'):
+        session.strafe(MOVE_SPEED)
+
+    # Field of view adjustment (W/S keys)
+    if key in (b'w', b'W'):
+        session.zoom(-FOV_STEP)
+    if key in (b's', b'S'):
+        session.zoom(FOV_STEP)
 
 def specialKeyListener(key, x, y):
     """Handle special keys (arrow keys, function keys, etc.)"""
@@ -436,97 +598,20 @@ def specialKeyListener(key, x, y):
 
 def mouseListener(button, state, x, y):
     """Handle mouse button clicks"""
-    global shots, score, misses, game_state, selected_duration_index, SESSION_TIME
-    global selected_mode_index, time_bank, hits, headshot_hits
-
     if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-        if game_state == 'menu':
-            # Duration selection buttons
-            for i, rect in enumerate(duration_buttons):
-                if point_in_rect(x, y, rect):
-                    selected_duration_index = i
-                    SESSION_TIME = DURATION_OPTIONS[i]
-                    return
-            
-            # Mode selection buttons
-            for i, rect in enumerate(mode_buttons):
-                if point_in_rect(x, y, rect):
-                    selected_mode_index = i
-                    return
-            
-            # Start game button
-            if point_in_rect(x, y, START_BTN_RECT):
-                start_run()
-                return
-
-        elif game_state == 'summary':
-            # Play again button
-            if point_in_rect(x, y, SUMMARY_PLAY_RECT):
-                start_run()
-                return
-            # Return to main menu button
-            if point_in_rect(x, y, SUMMARY_MENU_RECT):
-                game_state = 'menu'
-                globals()['start_time'] = None
-                globals()['elapsed'] = 0.0
-                return
-
-        elif game_state == 'running' and not paused:
-            # Shooting during gameplay
-            shots += 1
-            ro = list(player_pos)
-            rd = look_dir_from_angles(yaw, pitch)
-            best_t, best_idx = None, -1
-            headshot_hit = False
-            
-            # Check for target hits
-            for i, t in enumerate(targets):
-                if selected_mode_index == MODE_PRECISION:
-                    # Precision mode: check headshot first (red sphere on top)
-                    headshot_pos = [t['p'][0], t['p'][1], t['p'][2] + t['r'] * 1.5]
-                    headshot_radius = t['r'] * PRECISION_INNER_RATIO
-                    
-                    headshot_tt = line_sphere_intersect(ro, rd, headshot_pos, headshot_radius)
-                    if headshot_tt is not None and 0 <= headshot_tt <= RAY_MAX_DIST:
-                        if best_t is None or headshot_tt < best_t:
-                            best_t, best_idx = headshot_tt, i
-                            headshot_hit = True
-                            continue
-                
-                # Check main target sphere
-                tt = line_sphere_intersect(ro, rd, t['p'], t['r'])
-                if tt is not None and 0 <= tt <= RAY_MAX_DIST:
-                    if best_t is None or tt < best_t:
-                        best_t, best_idx = tt, i
-                        headshot_hit = False
-
-            # Process hit or miss
-            if best_idx >= 0:
-                t = targets[best_idx]
-                if selected_mode_index == MODE_PRECISION:
-                    if headshot_hit:
-                        score += 5  # Bonus points for headshot
-                        headshot_hits += 1
-                        hits += 1
-                    else:
-                        score += 1  # Standard points for body hit
-                        hits += 1
-                else:
-                    score += 1
-                    hits += 1
-                    # Time Trial: add bonus time for hits
-                    if selected_mode_index == MODE_TIMETRIAL:
-                        time_bank += TIME_TRIAL_HIT_BONUS
-
-                del targets[best_idx]
-            else:
-                misses += 1
+        if game_state in ('menu', 'summary'):
+            # Buttons (duration/mode selection, start, play again, main menu)
+            widget = ui_hit(menu_ui if game_state == 'menu' else summary_ui, x, y)
+            if widget is not None:
+                widget.on_click()
+
+        elif game_state == 'running':
+            # Shooting during gameplay (the session scores hits and misses)
+            session.fire()
 
 def motionListener(x, y):
     """Handle mouse movement for camera control"""
-    global yaw, pitch
-    
-    if game_state != 'running' or paused:
+    if game_state != 'running' or session.paused:
         return
     
     # Calculate mouse delta from screen center
@@ -534,9 +619,7 @@ def motionListener(x, y):
     dy = y - WINDOW_H//2
     
     # Apply mouse sensitivity to camera rotation
-    yaw += dx * sensitivity
-    pitch -= dy * sensitivity
-    pitch = clamp(pitch, -85, 85)  # Prevent camera flipping
+    session.look(dx * sensitivity, -dy * sensitivity)
     
     # Reset mouse to center for continuous movement
     glutWarpPointer(WINDOW_W//2, WINDOW_H//2)
@@ -545,10 +628,8 @@ def motionListener(x, y):
 # RENDERING FUNCTIONS
 # =============================
 
-def draw_floor():
-    """Render arena floor with grid pattern"""
-    glDisable(GL_LIGHTING)
-    
+def emit_floor_geometry():
+    """Emit arena floor with grid pattern (compiled into a display list)"""
     # Floor base
     glBegin(GL_QUADS)
     glColor3f(0.28, 0.28, 0.30)
@@ -573,101 +654,304 @@ def draw_floor():
     glEnd()
 
 def draw_checkboard_wall(x0, x1, y0, y1, z0, z1, tile_w, tile_h, flip_x=False, flip_y=False):
-    """Render checkerboard pattern on wall surface"""
+    """Emit checkerboard pattern on wall surface as a single quad batch"""
     brown = (0.2, 0.2, 0.2)
     silver = (0.75, 0.75, 0.75)
     
     # Determine wall orientation and dimensions
-    if abs(x1 - x0) > abs(y1 - y0):
+    horizontal = abs(x1 - x0) > abs(y1 - y0)
+    if horizontal:
         # Horizontal wall (varies in X)
         hstart = min(x0, x1); hend = max(x0, x1)
-        vstart = min(z0, z1); vend = max(z0, z1)
-        h_steps = int(math.ceil((hend - hstart) / tile_w))
-        v_steps = int(math.ceil((vend - vstart) / tile_h))
-        
-        for i in range(h_steps):
-            for j in range(v_steps):
-                left = hstart + i * tile_w
-                right = min(hstart + (i+1) * tile_w, hend)
-                bottom = vstart + j * tile_h
-                top = min(vstart + (j+1) * tile_h, vend)
-                
-                # Alternate colors in checkerboard pattern
-                col = brown if ((i + j) % 2 == 0) else silver
-                glColor3f(*col)
-                glBegin(GL_QUADS)
+    else:
+        # Vertical wall (varies in Y)
+        hstart = min(y0, y1); hend = max(y0, y1)
+    vstart = min(z0, z1); vend = max(z0, z1)
+    h_steps = int(math.ceil((hend - hstart) / tile_w))
+    v_steps = int(math.ceil((vend - vstart) / tile_h))
+
+    glBegin(GL_QUADS)
+    for i in range(h_steps):
+        for j in range(v_steps):
+            left = hstart + i * tile_w
+            right = min(hstart + (i+1) * tile_w, hend)
+            bottom = vstart + j * tile_h
+            top = min(vstart + (j+1) * tile_h, vend)
+            
+            # Alternate colors in checkerboard pattern
+            col = brown if ((i + j) % 2 == 0) else silver
+            glColor3f(*col)
+            if horizontal:
                 y_const = y0
                 glVertex3f(left, y_const, bottom)
                 glVertex3f(right, y_const, bottom)
                 glVertex3f(right, y_const, top)
                 glVertex3f(left, y_const, top)
-                glEnd()
-    else:
-        # Vertical wall (varies in Y)
-        hstart = min(y0, y1); hend = max(y0, y1)
-        vstart = min(z0, z1); vend = max(z0, z1)
-        h_steps = int(math.ceil((hend - hstart) / tile_w))
-        v_steps = int(math.ceil((vend - vstart) / tile_h))
-        
-        for i in range(h_steps):
-            for j in range(v_steps):
-                left = hstart + i * tile_w
-                right = min(hstart + (i+1) * tile_w, hend)
-                bottom = vstart + j * tile_h
-                top = min(vstart + (j+1) * tile_h, vend)
-                
-                col = brown if ((i + j) % 2 == 0) else silver
-                glColor3f(*col)
-                glBegin(GL_QUADS)
+            else:
                 x_const = x0
                 glVertex3f(x_const, left, bottom)
                 glVertex3f(x_const, right, bottom)
                 glVertex3f(x_const, right, top)
                 glVertex3f(x_const, left, top)
-                glEnd()
-
-def draw_walls():
-    """Render all arena walls with checkerboard pattern"""
-    glDisable(GL_LIGHTING)
-    glDisable(GL_CULL_FACE)
+    glEnd()
 
+def emit_walls_geometry():
+    """Emit all arena walls with checkerboard pattern (compiled into a display list)"""
     tile_w = 80.0
     tile_h = 80.0
     
-    # Render each wall
+    # Emit each wall
     draw_checkboard_wall(-ARENA_HALF, ARENA_HALF, ARENA_HALF, ARENA_HALF, FLOOR_Z, WALL_HEIGHT, tile_w, tile_h)   # back wall
     draw_checkboard_wall(-ARENA_HALF, -ARENA_HALF, -ARENA_HALF, ARENA_HALF, FLOOR_Z, WALL_HEIGHT, tile_w, tile_h) # left wall
     draw_checkboard_wall( ARENA_HALF,  ARENA_HALF, -ARENA_HALF, ARENA_HALF, FLOOR_Z, WALL_HEIGHT, tile_w, tile_h) # right wall
     draw_checkboard_wall(-ARENA_HALF, ARENA_HALF, -ARENA_HALF, -ARENA_HALF, FLOOR_Z, WALL_HEIGHT, tile_w, tile_h) # front wall
 
+def build_arena_lists():
+    """Compile static floor and wall geometry into display lists"""
+    global floor_list, walls_list, arena_geometry_key
+
+    if floor_list is None:
+        floor_list = glGenLists(2)
+        walls_list = floor_list + 1
+
+    glNewList(floor_list, GL_COMPILE)
+    emit_floor_geometry()
+    glEndList()
+
+    glNewList(walls_list, GL_COMPILE)
+    emit_walls_geometry()
+    glEndList()
+
+    arena_geometry_key = (ARENA_HALF, WALL_HEIGHT)
+
+def ensure_arena_lists():
+    """Rebuild arena display lists only if the arena dimensions changed"""
+    if arena_geometry_key != (ARENA_HALF, WALL_HEIGHT):
+        build_arena_lists()
+
+def draw_floor():
+    """Render arena floor with grid pattern"""
+    glDisable(GL_LIGHTING)
+    ensure_arena_lists()
+    glCallList(floor_list)
+
+def draw_walls():
+    """Render all arena walls with checkerboard pattern"""
+    glDisable(GL_LIGHTING)
+    glDisable(GL_CULL_FACE)
+    ensure_arena_lists()
+    glCallList(walls_list)
     glEnable(GL_CULL_FACE)
 
-def draw_precision_target(t):
+def gl_version():
+    """(major, minor) OpenGL version of the current context"""
+    major, minor = glGetString(GL_VERSION).split()[0].split(b'.')[:2]
+    return int(major), int(minor)
+
+def build_sphere_program():
     """
-    Render Precision mode target: blue body sphere with red headshot sphere on top
-    Body hit = 1 point, headshot = 5 points
+    Link the instanced sphere shader when the context has GL 3.3 instancing
+    Returns {'program', 'sphere', 'color'} (program and per-instance attribute locations),
+    or None so batches fall back to one display list call per instance.
     """
-    # Draw main blue sphere (body)
-    glPushMatrix()
-    glTranslatef(t['p'][0], t['p'][1], t['p'][2])
-    glColor3f(0.02, 0.48, 0.98)  # blue color
-    spec = (GLfloat * 4)(0.2, 0.48, 0.98, 1.0)
+    if not SPHERE_INSTANCING or gl_version() < (3, 3):
+        return None
+    try:
+        program = glCreateProgram()
+        for source, kind in ((SPHERE_VERTEX_SHADER, GL_VERTEX_SHADER), (SPHERE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER)):
+            glAttachShader(program, shaders.compileShader(source, kind))
+        glBindAttribLocation(program, 0, "unit")      # attribute 0 drives the vertex in compatibility contexts
+        glLinkProgram(program)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            raise RuntimeError(glGetProgramInfoLog(program))
+    except RuntimeError as e:
+        print("Instanced spheres unavailable, using display lists:", e)
+        return None
+    return {'program': program, 'sphere': glGetAttribLocation(program, "sphere"),
+            'color': glGetAttribLocation(program, "color")}
+
+def build_sphere_mesh(slices, stacks):
+    """
+    Tessellate a unit sphere once into static vertex and index buffers
+    Vertex positions double as normals, so an instance only needs a centre and a radius.
+    With sphere_program the mesh gets a vertex array object whose per-instance attributes
+    read a streamed instance buffer; otherwise it gets a display list compiled from the buffers.
+    """
+    verts = []
+    for i in range(stacks + 1):
+        phi = math.pi * i / stacks
+        sp, cp = math.sin(phi), math.cos(phi)
+        for j in range(slices + 1):
+            theta = 2.0 * math.pi * j / slices
+            verts.extend((sp * math.cos(theta), sp * math.sin(theta), cp))
+
+    indices = []
+    row = slices + 1
+    for i in range(stacks):
+        for j in range(slices):
+            a = i * row + j
+            b = a + row
+            # Counter-clockwise winding when seen from outside the sphere
+            indices.extend((a, b, a + 1, a + 1, b, b + 1))
+
+    verts = np.array(verts, np.float32)
+    indices = np.array(indices, np.uint16)
+    vbo, ibo = glGenBuffers(2)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, GL_STATIC_DRAW)
+    mesh = {'count': len(indices), 'vbo': vbo, 'ibo': ibo}
+
+    if sphere_program is not None:
+        # Static mesh on attribute 0; centre + radius and colour advance once per instance
+        mesh['vao'] = glGenVertexArrays(1)
+        mesh['instances'] = glGenBuffers(1)
+        glBindVertexArray(mesh['vao'])
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, mesh['instances'])
+        stride = 7 * verts.itemsize
+        for name, size, offset in (('sphere', 4, 0), ('color', 3, 4)):
+            glEnableVertexAttribArray(sphere_program[name])
+            glVertexAttribPointer(sphere_program[name], size, GL_FLOAT, GL_FALSE, stride,
+                                  ctypes.c_void_p(offset * verts.itemsize))
+            glVertexAttribDivisor(sphere_program[name], 1)
+        glBindVertexArray(0)
+    else:
+        # Arrays are read when the list is compiled, so the list holds the whole mesh
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glNormalPointer(GL_FLOAT, 0, None)
+        mesh['list'] = glGenLists(1)
+        glNewList(mesh['list'], GL_COMPILE)
+        glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_SHORT, None)
+        glEndList()
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    return mesh
+
+def lod_pixel_scale(camera):
+    """Pixels per world unit at distance 1 for the camera's FOV and the window height"""
+    return (WINDOW_H * 0.5) * camera.focal
+
+def projected_radius_px(x, y, z, r, px_scale, eye):
+    """Approximate on-screen radius in pixels of a sphere seen from eye"""
+    dx, dy, dz = x - eye[0], y - eye[1], z - eye[2]
+    dist = math.sqrt(dx*dx + dy*dy + dz*dz)
+    if dist <= r:
+        return float('inf')
+    return r * px_scale / dist
+
+def select_lod(current, radius_px):
+    """
+    Pick a sphere LOD for a projected radius, starting from the current LOD
+    A threshold must be crossed by LOD_HYSTERESIS before switching, so targets don't pop
+    """
+    lod = current
+    while lod > 0 and radius_px > LOD_PIXEL_THRESHOLDS[lod - 1] * (1.0 + LOD_HYSTERESIS):
+        lod -= 1
+    while lod < len(LOD_PIXEL_THRESHOLDS) and radius_px < LOD_PIXEL_THRESHOLDS[lod] * (1.0 - LOD_HYSTERESIS):
+        lod += 1
+    return lod
+
+def collect_target_instances():
+    """
+    Build per-instance attributes (x, y, z, radius, r, g, b) for every visible sphere this frame
+    Returns (body_instances, head_instances), each a list of instance lists indexed by LOD;
+    head lists stay empty outside Precision mode. Targets outside the view frustum are skipped.
+    """
+    bodies = [[] for _ in SPHERE_LODS]
+    heads = [[] for _ in SPHERE_LODS]
+    precision = session.head_zone
+    animated, glowing = session.animated_spheres, session.glowing_spheres
+    camera = session.view()
+    px_scale, eye = lod_pixel_scale(camera), camera.eye
+
+    store = session.targets
+    n = store.count
+    lods, head_lods = store.lod, store.head_lod
+    positions = store.interpolated_pos(scheduler.alpha)  # blended between sim ticks
+    radii = store.r[:n]
+    if precision:
+        # Bounding sphere of the body and the headshot sphere above it
+        bounds = positions.copy()
+        bounds[:, 2] += radii * 0.5
+        visible = camera.spheres_visible(bounds, radii * 1.5 + 5.0)
+    else:
+        visible = camera.spheres_visible(positions, radii)
+    rows = np.flatnonzero(visible).tolist()
+    rows = zip(rows, positions[rows].tolist(), radii[rows].tolist(), store.glow_phase[rows].tolist())
+
+    for i, (x, y, z), r, glow_phase in rows:
+        lod = select_lod(int(lods[i]), projected_radius_px(x, y, z, r, px_scale, eye))
+        lods[i] = lod
+
+        if show_lod_debug:
+            col = LOD_DEBUG_COLORS[lod]
+        elif precision or not (animated or glowing):
+            col = (0.02, 0.48, 0.98)  # standard blue
+        elif animated:
+            col = (0.98, 0.48, 0.02)  # orange for animated targets
+        else:
+            # Pulsing brightness effect
+            intensity = 0.7 + 0.3 * math.sin(glow_phase)
+            col = (0.02 * intensity, 0.48 * intensity, 0.98 * intensity)
+        bodies[lod].append((x, y, z, r) + col)
+
+        if precision:
+            # Red headshot sphere positioned on top of the body
+            hx, hy, hz, hr = x, y - 5, z + r * 1.5, r * PRECISION_INNER_RATIO
+            hlod = select_lod(int(head_lods[i]), projected_radius_px(hx, hy, hz, hr, px_scale, eye))
+            head_lods[i] = hlod
+            hcol = LOD_DEBUG_COLORS[hlod] if show_lod_debug else (0.90, 0.20, 0.25)
+            heads[hlod].append((hx, hy, hz, hr) + hcol)
+
+    return bodies, heads
+
+def draw_sphere_batch(mesh, instances, spec, shininess):
+    """
+    Draw many spheres from one shared mesh
+    Only the instances (x, y, z, radius, r, g, b) are sent each frame: with sphere_program
+    they are streamed to the mesh's instance buffer for one instanced draw call, otherwise
+    each instance loads its translate + scale matrix and calls the mesh's display list.
+    """
+    if not instances:
+        return
+
     glMaterialfv(GL_FRONT, GL_SPECULAR, spec)
-    glMaterialf(GL_FRONT, GL_SHININESS, 40.0)
-    gluSphere(quadric, t['r'], 32, 24)
-    
-    # Draw red headshot sphere positioned above body
-    glPushMatrix()
-    glTranslatef(0, -5, t['r'] * 1.5)  # Position on top
-    glColor3f(0.90, 0.20, 0.25)  # red color
-    spec_red = (GLfloat * 4)(0.9, 0.2, 0.25, 1.0)
-    glMaterialfv(GL_FRONT, GL_SPECULAR, spec_red)
-    glMaterialf(GL_FRONT, GL_SHININESS, 60.0)
-    headshot_radius = t['r'] * PRECISION_INNER_RATIO
-    gluSphere(quadric, headshot_radius, 24, 16)
-    glPopMatrix()
-    
-    glPopMatrix()
+    glMaterialf(GL_FRONT, GL_SHININESS, shininess)
+    inst = np.array(instances, np.float32)
+
+    if sphere_program is not None:
+        glUseProgram(sphere_program['program'])
+        glBindVertexArray(mesh['vao'])
+        glBindBuffer(GL_ARRAY_BUFFER, mesh['instances'])
+        glBufferData(GL_ARRAY_BUFFER, inst.nbytes, inst, GL_STREAM_DRAW)
+        glDrawElementsInstanced(GL_TRIANGLES, mesh['count'], GL_UNSIGNED_SHORT, None, len(inst))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        glUseProgram(0)
+        return
+
+    # Column-major model matrices: uniform scale by the radius, then move to the centre
+    matrices = np.zeros((len(inst), 4, 4), np.float32)
+    matrices[:, 0, 0] = matrices[:, 1, 1] = matrices[:, 2, 2] = inst[:, 3]
+    matrices[:, 3, 0:3] = inst[:, 0:3]
+    matrices[:, 3, 3] = 1.0
+    glEnable(GL_RESCALE_NORMAL)          # the scale would otherwise shrink the unit normals
+    for matrix, color in zip(matrices, inst[:, 4:7]):
+        glColor3fv(color)
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        glCallList(mesh['list'])
+        glPopMatrix()
+    glDisable(GL_RESCALE_NORMAL)
 
 def draw_targets():
     """Render all active targets with mode-specific appearance"""
@@ -677,32 +961,19 @@ def draw_targets():
     glEnable(GL_LIGHT0)
     glEnable(GL_LIGHT1)
 
-    for t in targets:
-        # Precision mode uses special dual-sphere rendering
-        if selected_mode_index == MODE_PRECISION:
-            draw_precision_target(t)
-            continue
-
-        # Standard target rendering for other modes
-        glPushMatrix()
-        glTranslatef(t['p'][0], t['p'][1], t['p'][2])
+    bodies, heads = collect_target_instances()
 
-        # Apply visual effects based on toggles
-        if animated_spheres:
-            glColor3f(0.98, 0.48, 0.02)  # orange for animated targets
-        elif glowing_spheres:
-            # Pulsing brightness effect
-            intensity = 0.7 + 0.3 * math.sin(t['glow_phase'])
-            glColor3f(0.02 * intensity, 0.48 * intensity, 0.98 * intensity)
-        else:
-            glColor3f(0.02, 0.48, 0.98)  # standard blue
+    # Body spheres (Precision bodies use a tinted specular highlight)
+    if session.head_zone:
+        body_spec, body_shininess = (GLfloat * 4)(0.2, 0.48, 0.98, 1.0), 40.0
+    else:
+        body_spec, body_shininess = (GLfloat * 4)(0.9, 0.9, 1.0, 1.0), 60.0
+    head_spec = (GLfloat * 4)(0.9, 0.2, 0.25, 1.0)
 
-        # Set material properties for realistic lighting
-        spec = (GLfloat * 4)(0.9, 0.9, 1.0, 1.0)
-        glMaterialfv(GL_FRONT, GL_SPECULAR, spec)
-        glMaterialf(GL_FRONT, GL_SHININESS, 60.0)
-        gluSphere(quadric, t['r'], 32, 24)
-        glPopMatrix()
+    # One batch per LOD mesh; red headshot spheres only exist with a head zone (Precision)
+    for lod, mesh in enumerate(sphere_meshes):
+        draw_sphere_batch(mesh, bodies[lod], body_spec, body_shininess)
+        draw_sphere_batch(mesh, heads[lod], head_spec, 60.0)
 
     glDisable(GL_COLOR_MATERIAL)
 
@@ -738,11 +1009,63 @@ def draw_crosshair():
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
 
+# =============================
+# TEXT RENDERING
+# =============================
+
+# Display-list base per entry of TEXT_FONTS; glyph lists are base + character code (Latin-1)
+glyph_bases = []
+
+def build_glyph_lists():
+    """Compile one display list per glyph (codes 0-255) for every font in TEXT_FONTS"""
+    if glyph_bases:
+        return
+    for font in TEXT_FONTS:
+        base = glGenLists(256)
+        for code in range(256):
+            glNewList(base + code, GL_COMPILE)
+            glutBitmapCharacter(font, code)  # draws the bitmap and advances the raster position
+            glEndList()
+        glyph_bases.append(base)
+
 def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    """Render text at specified screen coordinates"""
+    """Render text at specified screen coordinates (one glCallLists over the cached glyphs)"""
     glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
+    glListBase(glyph_bases[TEXT_FONTS.index(font)])
+    glCallLists(text.encode('latin-1', 'replace'))
+
+class TextBlock:
+    """
+    Lines of text baked into a single display list
+    draw(key, build) replays the list while key is unchanged; otherwise it calls
+    build() for [(colour, x, y, text, font), ...] and recompiles the list first.
+    """
+
+    def __init__(self):
+        self.list_id = None
+        self.key = None
+
+    def draw(self, key, build):
+        if self.list_id is None or key != self.key:
+            if self.list_id is None:
+                self.list_id = glGenLists(1)
+            glNewList(self.list_id, GL_COMPILE)
+            for colour, x, y, text, font in build():
+                glColor3f(*colour)
+                draw_text(x, y, text, font)
+            glEndList()
+            self.key = key
+        glCallList(self.list_id)
+
+    def invalidate(self):
+        """Force a rebuild on the next draw (e.g. after the GL context's lists were lost)"""
+        self.key = None
+
+# Cached HUD text, one display list per group of lines that change together
+hud_text = TextBlock()                   # score, time, accuracy, stats, pause message
+controls_text = TextBlock()              # control instructions (static)
+lod_text = TextBlock()                   # LOD debug counts
+profiler_text = TextBlock()              # frame profiler table
 
 def draw_button(x, y, w, h, label, highlight=False):
     """Render UI button with optional highlight for selection"""
@@ -787,48 +1110,32 @@ def draw_hud():
     glLoadIdentity()
 
     draw_crosshair()
+    s = session
 
-    # Top status bar
-    glColor3f(1, 1, 1)
-    draw_text(50, WINDOW_H - 40, f"SCORE: {score}")
-
-    # Time display (varies by mode)
-    if selected_mode_index == MODE_TIMETRIAL:
-        draw_text(WINDOW_W//2 - 60, WINDOW_H - 40, f"TIME: {max(0.0, time_bank):0.1f}s")
-    else:
-        time_remaining = max(0.0, SESSION_TIME - elapsed)
-        draw_text(WINDOW_W//2 - 60, WINDOW_H - 40, f"TIME: {time_remaining:0.1f}s")
+    # Time display (varies by mode), shown at 0.1s resolution
+    shown_time = s.time_bank if s.banked else s.duration - s.elapsed
+    time_label = f"TIME: {max(0.0, shown_time):0.1f}s"
 
-    # Accuracy display
-    accuracy = 0 if shots == 0 else int(100 * (hits / max(1, shots)))
-    draw_text(WINDOW_W - 260, WINDOW_H - 40, f"ACCURACY: {accuracy}%")
+    # Text is only re-laid-out when something it shows changes (every field hud_lines reads)
+    hud_key = (WINDOW_W, WINDOW_H, s.mode_name, s.head_zone, s.max_targets, s.score, time_label, s.hits, s.shots,
+               s.headshot_hits, len(s.targets), s.current_fov, s.player_pos[0], s.player_pos[1],
+               s.animated_spheres, s.glowing_spheres, s.paused)
+    hud_text.draw(hud_key, lambda: hud_lines(s, time_label))
 
-    # Mode indicator
-    glColor3f(0.85, 0.85, 0.85)
-    draw_text(WINDOW_W//2 - 60, WINDOW_H - 70, f"MODE: {MODES[selected_mode_index]}", GLUT_BITMAP_HELVETICA_12)
+    # LOD debug overlay: number of targets drawn at each LOD, colour-coded like the spheres
+    if show_lod_debug:
+        lod_counts = tuple(np.bincount(s.targets.lod[:s.targets.count], minlength=len(SPHERE_LODS)).tolist())
+        lod_text.draw((WINDOW_H, lod_counts), lambda: [
+            (LOD_DEBUG_COLORS[lod], 18, WINDOW_H - 180 - lod*20,
+             f"LOD {lod} ({SPHERE_LODS[lod][0]}x{SPHERE_LODS[lod][1]}): {count}", GLUT_BITMAP_HELVETICA_12)
+            for lod, count in enumerate(lod_counts)])
 
-    # Precision mode specific stats
-    if selected_mode_index == MODE_PRECISION:
-        head_acc = 0 if shots == 0 else int(100 * headshot_hits / shots)
-        draw_text(WINDOW_W - 260, WINDOW_H - 70, f"headshot: {head_acc}% ({headshot_hits}/{shots})", GLUT_BITMAP_HELVETICA_12)
-
-    # Secondary information panel
-    glColor3f(0.8, 0.8, 0.8)
-    draw_text(18, WINDOW_H - 70, f"Targets: {len(targets)}/{MAX_TARGETS}", GLUT_BITMAP_HELVETICA_12)
-    draw_text(18, WINDOW_H - 90, f"FOV: {current_fov:.1f}°", GLUT_BITMAP_HELVETICA_12)
-    draw_text(18, WINDOW_H - 110, f"Pos: ({player_pos[0]:.0f}, {player_pos[1]:.0f})", GLUT_BITMAP_HELVETICA_12)
-    draw_text(18, WINDOW_H - 130, f"Animated: {'ON' if animated_spheres else 'OFF'}", GLUT_BITMAP_HELVETICA_12)
-    draw_text(18, WINDOW_H - 150, f"Glowing: {'ON' if glowing_spheres else 'OFF'}", GLUT_BITMAP_HELVETICA_12)
+    if show_profiler:
+        draw_profiler_overlay()
 
     # Control instructions
-    glColor3f(0.7, 0.7, 0.7)
-    draw_text(WINDOW_W//2 - 300, 30, "A/D: Move | W/S: FOV | M: Animation | G: Glowing | Space: Pause | R: Restart | Esc: Quit", GLUT_BITMAP_HELVETICA_12)
-
-    # Pause overlay
-    if paused:
-        glColor3f(1, 0.5, 0.5)
-        draw_text(WINDOW_W//2 - 80, WINDOW_H//2 + 20, "GAME PAUSED")
-        draw_text(WINDOW_W//2 - 120, WINDOW_H//2 - 20, "Press SPACE to continue")
+    controls_text.draw((WINDOW_W,), lambda: [
+        ((0.7, 0.7, 0.7), WINDOW_W//2 - 330, 30, CONTROLS_TEXT, GLUT_BITMAP_HELVETICA_12)])
 
     # Restore 3D rendering
     glPopMatrix()
@@ -837,66 +1144,97 @@ def draw_hud():
     glMatrixMode(GL_MODELVIEW)
     glEnable(GL_DEPTH_TEST)
 
-def draw_start_screen():
-    """Render main menu screen"""
-    glDisable(GL_LIGHTING)
-    glDisable(GL_DEPTH_TEST)
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-
-    # Setup 2D rendering
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluOrtho2D(0, WINDOW_W, 0, WINDOW_H)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-
-    # Background panel
-    panel_w, panel_h = 980, 580
-    px = WINDOW_W//2 - panel_w//2
-    py = WINDOW_H//2 - panel_h//2
-    glColor3f(0.04, 0.04, 0.05)
-    glBegin(GL_QUADS)
-    glVertex2f(px, py)
-    glVertex2f(px + panel_w, py)
-    glVertex2f(px + panel_w, py + panel_h)
-    glVertex2f(px, py + panel_h)
-    glEnd()
+def hud_lines(s, time_label):
+    """HUD text lines (colour, x, y, text, font) for session s"""
+    small = GLUT_BITMAP_HELVETICA_12
+    white, label, info = (1, 1, 1), (0.85, 0.85, 0.85), (0.8, 0.8, 0.8)
 
-    # Title
-    glColor3f(1, 1, 1)
-    draw_text(WINDOW_W//2 - 200, WINDOW_H//2 + 200, "Enhanced Aim Lab 3D - Start")
-
-    # Start button
-    bx, by, bw, bh = START_BTN_RECT
-    draw_button(bx, by, bw, bh, "Click Here to Start")
-
-    # Duration selection section
-    glColor3f(1, 1, 1)
-    draw_text(WINDOW_W//2 - 100, WINDOW_H//2 - 60, "Select Duration:")
-    for i, rect in enumerate(duration_buttons):
-        x, y, w, h = rect
-        draw_button(x, y, w, h, DURATION_LABELS[i], highlight=(i == selected_duration_index))
+    # Top status bar
+    accuracy = 0 if s.shots == 0 else int(100 * (s.hits / max(1, s.shots)))
+    lines = [
+        (white, 50, WINDOW_H - 40, f"SCORE: {s.score}", GLUT_BITMAP_HELVETICA_18),
+        (white, WINDOW_W//2 - 60, WINDOW_H - 40, time_label, GLUT_BITMAP_HELVETICA_18),
+        (white, WINDOW_W - 260, WINDOW_H - 40, f"ACCURACY: {accuracy}%", GLUT_BITMAP_HELVETICA_18),
+        # Mode indicator
+        (label, WINDOW_W//2 - 60, WINDOW_H - 70, f"MODE: {s.mode_name}", small),
+    ]
 
-    # Mode selection section
-    glColor3f(1, 1, 1)
-    draw_text(WINDOW_W//2 - 80, WINDOW_H//2 + 20, "Select Mode:")
-    for i, rect in enumerate(mode_buttons):
-        x, y, w, h = rect
-        draw_button(x, y, w, h, MODES[i], highlight=(i == selected_mode_index))
+    # Precision mode (head zone) specific stats
+    if s.head_zone:
+        head_acc = 0 if s.shots == 0 else int(100 * s.headshot_hits / s.shots)
+        lines.append((label, WINDOW_W - 260, WINDOW_H - 70, f"headshot: {head_acc}% ({s.headshot_hits}/{s.shots})", small))
 
-    # Mode descriptions
-    draw_text(WINDOW_W//2 - 460, WINDOW_H//2 - 170, "Mode Descriptions:")
-    mode_descriptions = [
-        "Normal: Standard targets, fixed target lifetime",
-        "Endless: Increasing difficulty, decreasing target lifetime",
-        "Time Trial: Targets shrink over time, +1s bonus per hit",
-        "Precision: Targets have headshot zone, +5 points for headshots"
+    # Secondary information panel
+    lines += [
+        (info, 18, WINDOW_H - 70, f"Targets: {len(s.targets)}/{s.max_targets}", small),
+        (info, 18, WINDOW_H - 90, f"FOV: {s.current_fov:.1f}°", small),
+        (info, 18, WINDOW_H - 110, f"Pos: ({s.player_pos[0]:.0f}, {s.player_pos[1]:.0f})", small),
+        (info, 18, WINDOW_H - 130, f"Animated: {'ON' if s.animated_spheres else 'OFF'}", small),
+        (info, 18, WINDOW_H - 150, f"Glowing: {'ON' if s.glowing_spheres else 'OFF'}", small),
     ]
-    for i, desc in enumerate(mode_descriptions):
-        draw_text(WINDOW_W//2 - 460, WINDOW_H//2 - 200 - i*20, desc)
 
-def draw_summary_screen():
-    """Render post-game summary screen"""
+    # Pause overlay
+    if s.paused:
+        lines += [
+            ((1, 0.5, 0.5), WINDOW_W//2 - 80, WINDOW_H//2 + 20, "GAME PAUSED", GLUT_BITMAP_HELVETICA_18),
+            ((1, 0.5, 0.5), WINDOW_W//2 - 120, WINDOW_H//2 - 20, "Press SPACE to continue", GLUT_BITMAP_HELVETICA_18),
+        ]
+    return lines
+
+def draw_profiler_overlay():
+    """Per-phase timing table (avg / p99 / max in ms) with FPS and 1% lows, refreshed periodically"""
+    global profiler_stats, profiler_stats_time
+    now = time.perf_counter()
+    if profiler_stats is None or now - profiler_stats_time >= PROFILER_REFRESH:
+        profiler_stats = (profiler.phase_stats(), profiler.frame_stats())
+        profiler_stats_time = now
+    profiler_text.draw((WINDOW_W, WINDOW_H, profiler_stats_time), profiler_lines)
+
+def profiler_lines():
+    """Profiler overlay text lines for the current profiler_stats"""
+    phases, frames = profiler_stats
+    x, y = WINDOW_W - 340, WINDOW_H - 110
+    colour, small = (0.6, 0.95, 0.6), GLUT_BITMAP_HELVETICA_12
+    lines = [
+        (colour, x, y, f"FPS: {frames['fps']:.0f}   1% low: {frames['low_1pct_fps']:.0f}", small),
+        (colour, x, y - 20, f"{'phase':<16}{'avg':>8}{'p99':>8}{'max':>8} ms", small),
+    ]
+    for row, name in enumerate(SIM_PHASES + RENDER_PHASES):
+        st = phases.get(name)
+        if st is None:
+            continue
+        lines.append((colour, x, y - 40 - row*18,
+                      f"{name:<16}{st['avg_ms']:>8.3f}{st['p99_ms']:>8.3f}{st['max_ms']:>8.3f}", small))
+    return lines
+
+def export_profile():
+    """Write the run's frame timings to PROFILE_DIR as CSV and JSON"""
+    metadata = {
+        'mode': session.mode_name,
+        'duration': session.duration,
+        'reason': session.end_reason,
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'gl_renderer': (glGetString(GL_RENDERER) or b'').decode(errors='replace'),
+        'window': [WINDOW_W, WINDOW_H],
+        'fps_cap': RENDER_FPS_CAP,
+        'tick_rate': SIM_TICK_RATE,
+    }
+    try:
+        paths = profiler.export(tag="frame_timing", metadata=metadata)
+        print("Frame timings written to", ", ".join(paths))
+    except OSError as e:
+        print("Could not write frame timings:", e)
+
+def timed(phase, draw):
+    """Call draw() and record its duration under phase"""
+    t0 = time.perf_counter()
+    draw()
+    profiler.record(phase, time.perf_counter() - t0)
+
+def draw_ui_screen(root):
+    """Clear and draw a retained UI tree in window coordinates"""
     glDisable(GL_LIGHTING)
     glDisable(GL_DEPTH_TEST)
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -908,72 +1246,31 @@ def draw_summary_screen():
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
-    # Background panel
-    panel_w, panel_h = 980, 600
-    px = WINDOW_W//2 - panel_w//2
-    py = WINDOW_H//2 - panel_h//2
-    glColor3f(0.04, 0.04, 0.05)
-    glBegin(GL_QUADS)
-    glVertex2f(px, py)
-    glVertex2f(px + panel_w, py)
-    glVertex2f(px + panel_w, py + panel_h)
-    glVertex2f(px, py + panel_h)
-    glEnd()
+    root.draw()
 
-    # Title
-    glColor3f(1, 1, 1)
-    draw_text(WINDOW_W//2 - 90, WINDOW_H//2 + 220, "Game Summary")
-
-    # Statistics display
-    y0 = WINDOW_H//2 + 140
-    draw_text(WINDOW_W//2 - 180, y0,             f"Mode: {summary_data.get('mode','')}")
-    draw_text(WINDOW_W//2 - 180, y0 - 40,        f"Game Duration (selected): {DURATION_OPTIONS[selected_duration_index]:.0f}s")
-    draw_text(WINDOW_W//2 - 180, y0 - 80,       f"Targets Spawned: {summary_data.get('spawned_spheres', 0)}")
-    draw_text(WINDOW_W//2 - 180, y0 - 120,       f"Score: {summary_data.get('score', 0)}")
-    draw_text(WINDOW_W//2 - 180, y0 - 160,       f"Shots Fired: {summary_data.get('shots', 0)}")
-    draw_text(WINDOW_W//2 - 180, y0 - 200,       f"Accuracy: {summary_data.get('accuracy', 0)}%")
-
-    # Mode-specific information
-    if summary_data.get('mode','') == "Time Trial":
-        reason = summary_data.get('reason','')
-        if reason == "out_of_time":
-            draw_text(WINDOW_W//2 - 180, y0 - 280, "Result: Timer reached zero")
-        else:
-            draw_text(WINDOW_W//2 - 180, y0 - 280, f"Result: Ended early ({reason})")
-    elif summary_data.get('mode','') == "Precision":
-        draw_text(WINDOW_W//2 - 50, y0 - 200, f"| Headshot Hits: {summary_data.get('headshot_hits', 0)}")
-        draw_text(WINDOW_W//2 + 120, y0 - 200, f"| Headshot Accuracy: {summary_data.get('headshot_accuracy', 0)}%")
+def draw_start_screen():
+    """Render main menu screen"""
+    draw_ui_screen(menu_ui)
 
-    # Action buttons
-    spx, spy, sw, sh = SUMMARY_PLAY_RECT
-    mpx, mpy, mw, mh = SUMMARY_MENU_RECT
-    draw_button(spx, spy, sw, sh, "Play Again")
-    draw_button(mpx, mpy, mw, mh, "Main Menu")
+def draw_summary_screen():
+    """Render post-game summary screen"""
+    draw_ui_screen(summary_ui)
 
 # =============================
 # CAMERA AND RENDERING SETUP
 # =============================
 
 def setupCamera():
-    """Configure 3D camera view based on player position and orientation"""
+    """Load the session camera's cached projection and view (rebuilt only when the view changed)"""
+    camera = session.view()
     glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(current_fov, ASPECT, NEAR, FAR)
-    
+    glLoadMatrixf(camera.projection_gl)
     glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-    
-    # Calculate look direction from yaw/pitch angles
-    f = look_dir_from_angles(yaw, pitch)
-    eye = player_pos
-    center = add(eye, f)
-    up = [0, 0, 1]  # Z-up coordinate system
-    
-    gluLookAt(eye[0], eye[1], eye[2], center[0], center[1], center[2], up[0], up[1], up[2])
+    glLoadMatrixf(camera.view_gl)
 
 def init_gl():
     """Initialize OpenGL settings and lighting"""
-    global quadric
+    global sphere_meshes, sphere_program
     
     # Basic OpenGL setup
     glEnable(GL_DEPTH_TEST)
@@ -1013,71 +1310,67 @@ def init_gl():
     glMaterialfv(GL_FRONT, GL_SPECULAR, mat_spec)
     glMaterialf(GL_FRONT, GL_SHININESS, 25.0)
 
-    # Create quadric for sphere rendering
-    quadric = gluNewQuadric()
-    gluQuadricNormals(quadric, GLU_SMOOTH)
+    # Tessellate the shared target spheres once per LOD (instanced when the context allows)
+    sphere_program = build_sphere_program()
+    sphere_meshes = [build_sphere_mesh(slices, stacks) for slices, stacks in SPHERE_LODS]
+
+    # Compile static arena geometry once
+    build_arena_lists()
+
+    # Cache text glyphs as display lists
+    build_glyph_lists()
 
 # =============================
 # MAIN GAME LOOP AND TIMING
 # =============================
 
-def idle():
-    """Main game update loop - handles timing, spawning, and game state"""
-    global start_time, elapsed, spawn_interval, time_bank
-
-    now = time.time()
-    if start_time is None:
-        start_time = now
-
-    if not paused:
-        elapsed = now - start_time
+def frame_delay_ms():
+    """Milliseconds until the next frame is due under RENDER_FPS_CAP (0 when uncapped)"""
+    global next_frame_time
+    if RENDER_FPS_CAP <= 0:
+        return 0
+    now = time.perf_counter()
+    # Fixed deadlines keep the average rate on the cap; fall back to now after a long stall
+    next_frame_time = max(next_frame_time + 1.0 / RENDER_FPS_CAP, now)
+    return int((next_frame_time - now) * 1000.0)
+
+def schedule_frames():
+    """Start the frame timer unless it is already pending"""
+    global frame_timer_armed, next_frame_time
+    if not frame_timer_armed:
+        frame_timer_armed = True
+        next_frame_time = time.perf_counter()
+        glutTimerFunc(0, frame_timer, 0)
+
+def frame_timer(value):
+    """
+    Main game loop - runs due fixed simulation ticks, requests a frame and re-arms the timer
+    Outside unpaused gameplay the timer lapses and the process sleeps in GLUT's event loop;
+    redraws then come only from input, reshape and state changes.
+    """
+    global frame_timer_armed
+    if game_state != 'running' or session.paused:
+        frame_timer_armed = False
+        return
 
-    if game_state == 'running' and not paused:
-        # Progressive difficulty: spawn rate increases over time
-        if selected_mode_index in (MODE_NORMAL, MODE_ENDLESS, MODE_PRECISION):
-            if selected_mode_index == MODE_ENDLESS:
-                # Endless mode spawns targets faster
-                spawn_interval = max(SPAWN_INTERVAL_MIN, spawn_interval - SPAWN_ACCEL * 2.0)
-            else:
-                spawn_interval = max(SPAWN_INTERVAL_MIN, spawn_interval - SPAWN_ACCEL)
-
-        # Delta time calculation for frame-rate independent updates
-        if not hasattr(idle, 'last'):
-            idle.last = now
-        dt = now - idle.last
-        idle.last = now
-
-        # Time Trial mode countdown
-        if selected_mode_index == MODE_TIMETRIAL:
-            time_bank -= dt
-            if time_bank <= 0.0:
-                time_bank = 0.0
-                end_run(reason="out_of_time")
-                glutPostRedisplay()
-                return
-
-        # Update all active targets
-        update_targets()
-
-        # Spawn new targets based on current spawn rate
-        if len(targets) < MAX_TARGETS:
-            idle.spawn_accum = getattr(idle, 'spawn_accum', 0.0) + dt
-            if idle.spawn_accum >= spawn_interval:
-                idle.spawn_accum = 0.0
-                spawn_target()
-
-        # Check for session end conditions
-        if selected_mode_index in (MODE_NORMAL, MODE_ENDLESS, MODE_PRECISION):
-            if elapsed >= SESSION_TIME:
-                end_run(reason="duration_reached")
+    scheduler.update()
+    if demo_agent is not None and session.state == 'running':
+        apply_action(session, demo_agent.act(Observation(session)))
+    if session.state == 'ended':
+        end_run(session.end_reason)
+        frame_timer_armed = False
+        return
 
     glutPostRedisplay()
+    glutTimerFunc(frame_delay_ms(), frame_timer, 0)
 
 def reshape(w, h):
     """Handle window resize events"""
     global WINDOW_W, WINDOW_H, ASPECT
     WINDOW_W, WINDOW_H = max(1, w), max(1, h)
     ASPECT = WINDOW_W / WINDOW_H
+    if session is not None:
+        session.aspect = ASPECT
     compute_menu_layout()  # Recalculate UI positions
     glViewport(0, 0, WINDOW_W, WINDOW_H)
 
@@ -1093,16 +1386,17 @@ def showScreen():
         glutSwapBuffers()
         return
 
-    # Gameplay rendering
+    # Gameplay rendering (each phase timed for the profiler)
+    profiler.frame()
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
     glViewport(0, 0, WINDOW_W, WINDOW_H)
 
-    setupCamera()
-    draw_floor()
-    draw_walls()
-    draw_targets()
-    draw_hud()
+    timed('setupCamera', setupCamera)
+    timed('draw_floor', draw_floor)
+    timed('draw_walls', draw_walls)
+    timed('draw_targets', draw_targets)
+    timed('draw_hud', draw_hud)
 
     glutSwapBuffers()
 
@@ -1112,6 +1406,7 @@ def showScreen():
 
 def main():
     """Initialize GLUT and start the main application loop"""
+    global drills
     # Initialize GLUT
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
@@ -1119,13 +1414,18 @@ def main():
     glutInitWindowPosition(50, 10)
     glutCreateWindow(b"Enhanced Aim Lab 3D - PyOpenGL")
 
+    # Drills are validated once here; broken files are reported and left out
+    drills, errors = load_scenarios()
+    for error in errors:
+        print("Skipping scenario", error)
+
     # Initialize OpenGL and compute UI layout
     init_gl()
     compute_menu_layout()
 
     # Register GLUT callback functions
     glutDisplayFunc(showScreen)          # Rendering
-    glutIdleFunc(idle)                   # Update loop
+    # Frame scheduler (fixed-step simulation + render cap) is started by start_run()
     glutReshapeFunc(reshape)             # Window resize
     glutKeyboardFunc(keyboardListener)   # Keyboard input
     glutSpecialFunc(specialKeyListener)  # Special keys
@@ -5,6 +5,9 @@ import math
 import random
 import time
 
+# Cached view/projection math (CPU-side picking without GL readbacks)
+from aim_lab_core import Camera
+
 
 # WINDOW AND VIEWPORT SETTINGS
 WINDOW_W, WINDOW_H = 1500, 1000
@@ -42,6 +45,7 @@ DURATION_LABELS = ["15 sec", "30 sec", "1 min", "2 min"]
 
 # GLOBAL STATE VARIABLES
 quadric = None
+camera = Camera(NEAR, FAR)  # picking basis, rebuilt only when the view changes
 
 # Visual effect toggles
 animated_spheres = False  # M key
@@ -119,23 +123,9 @@ def point_in_rect(px, py, rect):
     return (rx <= px <= rx + rw) and (ry <= py_flipped <= ry + rh)
 
 def get_ray_from_mouse(mx, my):
-    winX = float(mx)
-    winY = float(WINDOW_H) - float(my)
-    
-    model = glGetDoublev(GL_MODELVIEW_MATRIX)
-    proj = glGetDoublev(GL_PROJECTION_MATRIX)
-    viewport = glGetIntegerv(GL_VIEWPORT)
-    
-    near = gluUnProject(winX, winY, 0.0, model, proj, viewport)
-    far = gluUnProject(winX, winY, 1.0, model, proj, viewport)
-    
-    ro = [near[0], near[1], near[2]]
-    rd = [far[0] - near[0], far[1] - near[1], far[2] - near[2]]
-    
-    mag = math.sqrt(rd[0]*rd[0] + rd[1]*rd[1] + rd[2]*rd[2]) or 1.0
-    rd = [rd[0]/mag, rd[1]/mag, rd[2]/mag]
-    
-    return ro, rd
+    # Unproject on the CPU from the camera state setupCamera() draws with
+    camera.sync(yaw_angle, pitch_angle, current_fov, ASPECT, player_pos)
+    return camera.pick_ray(float(mx), float(WINDOW_H) - float(my), (0, 0, WINDOW_W, WINDOW_H))
 
 
 # UI LAYOUT
@@ -0,0 +1,232 @@
+"""
+Scripted aim agents for Enhanced Aim Lab 3D
+
+An agent looks at an Observation of the session (camera state and live targets)
+and answers with an action: yaw/pitch deltas in degrees and a number of shots.
+apply_action() feeds it through GameSession.look() and fire(), the same calls
+the front-end's mouse listeners make, so agent runs are logged, recorded and
+replayed like human ones. play() drives a session with an agent one fixed tick
+at a time:
+    python aim_lab_agents.py --agent perfect --mode Precision      # print the summary
+    python aim_lab_agents.py --agent random --fire-rate 500 --record   # stress run, saved as a replay
+    python aim_lab_agents.py --agent human --scenario scenarios/microflick.json
+"""
+import argparse, math, random, time
+
+import numpy as np
+
+from aim_lab_core import *
+from aim_lab_replay import start_recording, save_recording
+from aim_lab_scenarios import load_scenario
+
+# =============================
+# OBSERVATION AND ACTIONS
+# =============================
+
+class Observation:
+    """
+    What an agent sees before a tick: session time, camera state and the live targets
+    ids, pos and r are views of the session's target columns, valid until act() returns.
+    """
+
+    def __init__(self, session):
+        store = session.targets
+        n = store.count
+        self.head_zone = session.head_zone
+        self.time = session.elapsed
+        self.yaw = session.yaw
+        self.pitch = session.pitch
+        self.fov = session.current_fov
+        self.eye = tuple(session.player_pos)
+        self.ids = store.ids[:n]
+        self.pos = store.pos[:n]
+        self.r = store.r[:n]
+
+    def angles_to(self, point):
+        """(yaw, pitch) in degrees that look from the eye at a world point"""
+        dx, dy, dz = (point[k] - self.eye[k] for k in range(3))
+        return math.degrees(math.atan2(dx, dy)), math.degrees(math.atan2(dz, math.hypot(dx, dy)))
+
+    def turn_to(self, yaw, pitch):
+        """(dyaw, dpitch) from the current view to the given angles, yaw taking the short way round"""
+        return (yaw - self.yaw + 180.0) % 360.0 - 180.0, pitch - self.pitch
+
+    def aim_point(self, i):
+        """Center of the zone to aim for on row i (the headshot sphere when there is one)"""
+        x, y, z = self.pos[i]
+        if self.head_zone:
+            z += self.r[i] * 1.5
+        return x, y, z
+
+    def nearest(self):
+        """Row of the live target closest to the crosshair in angle, or None"""
+        best, best_angle = None, math.inf
+        for i in range(len(self.ids)):
+            dyaw, dpitch = self.turn_to(*self.angles_to(self.pos[i]))
+            angle = math.hypot(dyaw, dpitch)
+            if angle < best_angle:
+                best, best_angle = i, angle
+        return best
+
+    def row_of(self, target_id):
+        """Row of the live target with this id, or None once it is gone"""
+        rows = np.flatnonzero(self.ids == target_id)
+        return int(rows[0]) if len(rows) else None
+
+IDLE = (0.0, 0.0, 0)                   # action: no turn, no shots
+
+def apply_action(session, action):
+    """Feed an agent's (dyaw, dpitch, shots) to the session as look() and fire() input"""
+    dyaw, dpitch, shots = action
+    if dyaw or dpitch:
+        session.look(dyaw, dpitch)
+    for _ in range(shots):
+        session.fire()
+
+# =============================
+# REFERENCE AGENTS
+# =============================
+
+class Agent:
+    """Base class: act() receives an Observation and returns (dyaw, dpitch, shots)"""
+
+    def act(self, obs):
+        return IDLE
+
+class PerfectAgent(Agent):
+    """Snaps onto the target nearest the crosshair (its head in Precision) and fires at once"""
+
+    def act(self, obs):
+        i = obs.nearest()
+        if i is None:
+            return IDLE
+        dyaw, dpitch = obs.turn_to(*obs.angles_to(obs.aim_point(i)))
+        return dyaw, dpitch, 1
+
+class HumanLikeAgent(Agent):
+    """
+    Parametrised stand-in for a human player
+    It picks the target closest to its crosshair, waits a reaction delay, turns toward
+    a point scattered around the target's center by the aim noise (no faster than the
+    turn speed) and fires on arrival. After each shot it reacts to the scene afresh.
+    """
+
+    def __init__(self, reaction=0.25, reaction_sd=0.05, aim_noise=1.0, turn_speed=360.0,
+                 fire_tolerance=0.25, seed=None):
+        self.reaction = reaction
+        self.reaction_sd = reaction_sd
+        self.aim_noise = aim_noise
+        self.turn_speed = turn_speed             # degrees per second
+        self.fire_tolerance = fire_tolerance     # degrees from the aim point at which it fires
+        self.rng = random.Random(seed)
+        self.target_id = None            # id of the target being engaged
+        self.ready_at = 0.0              # session time the reaction delay ends
+        self.offset = (0.0, 0.0)         # aim error (yaw, pitch) for this engagement
+        self.last_time = None            # session time of the previous act()
+
+    def choose(self, obs):
+        """Engage the live target nearest the crosshair (None if there are none)"""
+        i = obs.nearest()
+        self.target_id = None if i is None else int(obs.ids[i])
+        if i is not None:
+            self.ready_at = obs.time + max(0.0, self.rng.gauss(self.reaction, self.reaction_sd))
+            self.offset = (self.rng.gauss(0.0, self.aim_noise), self.rng.gauss(0.0, self.aim_noise))
+
+    def act(self, obs):
+        dt = 0.0 if self.last_time is None else obs.time - self.last_time
+        self.last_time = obs.time
+        i = None if self.target_id is None else obs.row_of(self.target_id)
+        if i is None:
+            self.choose(obs)
+            return IDLE
+        if obs.time < self.ready_at:
+            return IDLE
+
+        # Turn toward the aim point, limited by turn speed
+        yaw, pitch = obs.angles_to(obs.aim_point(i))
+        dyaw, dpitch = obs.turn_to(yaw + self.offset[0], pitch + self.offset[1])
+        distance = math.hypot(dyaw, dpitch)
+        step = self.turn_speed * dt
+        if distance > step:
+            dyaw, dpitch = dyaw * step / distance, dpitch * step / distance
+            if distance - step > self.fire_tolerance:
+                return dyaw, dpitch, 0
+        self.choose(obs)
+        return dyaw, dpitch, 1
+
+class RandomAgent(Agent):
+    """Turns by random amounts and fires at fire_rate shots per second on average (input stress)"""
+
+    def __init__(self, turn_sd=5.0, fire_rate=10.0, seed=None):
+        self.turn_sd = turn_sd                   # degrees per act()
+        self.fire_rate = fire_rate
+        self.rng = random.Random(seed)
+        self.owed = 0.0                          # fractional shots carried to the next act()
+        self.last_time = None
+
+    def act(self, obs):
+        dt = 0.0 if self.last_time is None else obs.time - self.last_time
+        self.last_time = obs.time
+        self.owed += self.fire_rate * dt * self.rng.uniform(0.0, 2.0)
+        shots = int(self.owed)
+        self.owed -= shots
+        return self.rng.gauss(0.0, self.turn_sd), self.rng.gauss(0.0, self.turn_sd), shots
+
+AGENTS = {'perfect': PerfectAgent, 'human': HumanLikeAgent, 'random': RandomAgent}
+
+# =============================
+# DRIVING A SESSION
+# =============================
+
+def play(session, agent, tick=1.0 / SIM_TICK_RATE, time_cap=math.inf):
+    """
+    Run a session to its end with the agent acting before every fixed tick
+    time_cap ends runs that would not end by themselves (a perfect agent in Time Trial).
+    Returns the session.
+    """
+    while session.state == 'running':
+        apply_action(session, agent.act(Observation(session)))
+        session.step(tick)
+        if session.state == 'running' and session.elapsed >= time_cap:
+            session.end(reason="time_cap")
+    return session
+
+# =============================
+# ENTRY POINT
+# =============================
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Enhanced Aim Lab 3D headless with a scripted agent")
+    parser.add_argument('--agent', choices=sorted(AGENTS), default='perfect', help="reference agent")
+    parser.add_argument('--mode', choices=MODES, default=MODES[MODE_NORMAL], help="game mode")
+    parser.add_argument('--duration', type=float, default=DURATION_OPTIONS[1], help="session length (seconds)")
+    parser.add_argument('--scenario', help="scenario file to play instead of --mode/--duration")
+    parser.add_argument('--seed', type=int, default=None, help="session (and agent) seed")
+    parser.add_argument('--fire-rate', type=float, default=10.0, help="random agent shots per second")
+    parser.add_argument('--time-cap', type=float, default=300.0, help="longest run (seconds of session time)")
+    parser.add_argument('--record', action='store_true', help="save the run as a replay")
+    args = parser.parse_args()
+
+    scenario = None if args.scenario is None else load_scenario(args.scenario)
+    session = GameSession(MODES.index(args.mode), args.duration, clock=lambda: 0.0, seed=args.seed,
+                          scenario=scenario)
+    if args.agent == 'random':
+        agent = RandomAgent(fire_rate=args.fire_rate, seed=session.seed)
+    elif args.agent == 'human':
+        agent = HumanLikeAgent(seed=session.seed)
+    else:
+        agent = PerfectAgent()
+    tick = 1.0 / SIM_TICK_RATE
+    if args.record:
+        start_recording(session)
+    t0 = time.perf_counter()
+    play(session, agent, tick, args.time_cap)
+    wall = time.perf_counter() - t0
+    s = session.summary
+    print(f"{args.agent} agent, {s['mode']}: score {s['score']} hits {s['hits']}/{s['shots']} "
+          f"accuracy {s['accuracy']}% time {s['time']:.1f}s ({session.shots / wall:.0f} shots/s of CPU time)")
+    if args.record:
+        print("replay saved to", save_recording(session, tick))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Benchmarks for the Enhanced Aim Lab 3D engine
+
+Runs headless against aim_lab_core; the frame benchmarks render the GLUT front-end
+into an offscreen EGL context and are skipped when none is available:
+    python aim_lab_bench.py                              # everything at 5, 100, 1,000 and 10,000 targets
+    python aim_lab_bench.py --counts 5 1000 --only shots # a subset
+    python aim_lab_bench.py --json bench.json            # machine-readable results
+    python aim_lab_bench.py --baseline bench.json        # exit 1 on >25% regressions
+
+Correctness tests live in tests/ (python -m pytest).
+"""
+import argparse, importlib.util, json, math, os, platform, sys, tempfile, time
+
+import numpy as np
+
+from aim_lab_core import *
+from aim_lab_metrics import ShotLog
+from tests.helpers import make_rays, make_scene, make_session, make_store, time_call
+
+# =============================
+# HIT TESTING
+# =============================
+
+def bench_hit_testing(counts, rays=64, seed=1, min_time=0.2):
+    """Compare scalar, batched and grid shot resolution (microseconds per ray)"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for precision in (False, True):
+        zone_mode = "precision" if precision else "body"
+        for count in counts:
+            centers, radii = make_scene(count, rng)
+            origins, directions = make_rays(rays, centers, rng)
+            store = make_store(centers, radii)
+
+            center_list, radius_list = centers.tolist(), radii.tolist()
+            ray_list = list(zip(origins.tolist(), directions.tolist()))
+
+            def scalar():
+                for ro, rd in ray_list:
+                    resolve_shot_scalar(ro, rd, center_list, radius_list, precision)
+
+            def batched_single():
+                for k in range(rays):
+                    resolve_shots(origins[k], directions[k], centers, radii, precision)
+
+            def batched_all():
+                resolve_shots(origins, directions, centers, radii, precision)
+
+            def grid():
+                for ro, rd in ray_list:
+                    store.grid.query(ro, rd, store, precision)
+
+            for method, fn in (('scalar', scalar), ('batched', batched_single),
+                               ('batched_xN', batched_all), ('grid', grid)):
+                rows.append(result('shot_resolution', f"{method}/{zone_mode}", count, time_call(fn, min_time) / rays))
+    return rows
+
+def bench_fire(counts, rays=64, seed=1, min_time=0.2):
+    """GameSession.fire() end to end, per shot; hits are refilled with a fresh spawn to keep the count"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for mode, logged in ((MODE_NORMAL, False), (MODE_PRECISION, False), (MODE_NORMAL, True)):
+        for count in counts:
+            session = make_session(mode, count, seed)
+            n = session.targets.count
+            origins, directions = make_rays(rays, session.targets.pos[:n].copy(), rng)
+            ray_list = list(zip(origins.tolist(), directions.tolist()))
+
+            def shoot():
+                for ro, rd in ray_list:
+                    if session.fire(ro, rd):
+                        session.spawn_target()
+
+            with tempfile.TemporaryDirectory() as directory:
+                if logged:
+                    session.shot_log = ShotLog(os.path.join(directory, "bench.shots"))
+                seconds = time_call(shoot, min_time) / rays
+                if logged:
+                    session.shot_log.close()
+            rows.append(result('fire', MODES[mode] + ("+shot_log" if logged else ""), count, seconds))
+    return rows
+
+def bench_math(min_time=0.2):
+    """Single-call cost of the ray math helpers"""
+    ro, rd = [0.0, -300.0, CAM_HEIGHT], look_dir_from_angles(3.0, -2.0)
+    camera, eye, viewport = Camera(), [0.0, -300.0, CAM_HEIGHT], (0, 0, 1500, 1000)
+    return [
+        result('line_sphere_intersect', 'hit', 1,
+               time_call(lambda: line_sphere_intersect(ro, rd, [20.0, 400.0, 120.0], TARGET_RADIUS), min_time)),
+        result('line_sphere_intersect', 'miss', 1,
+               time_call(lambda: line_sphere_intersect(ro, rd, [600.0, 400.0, 120.0], TARGET_RADIUS), min_time)),
+        result('look_dir_from_angles', '-', 1, time_call(lambda: look_dir_from_angles(37.5, -12.0), min_time)),
+        result('camera_sync', 'cached', 1, time_call(lambda: camera.sync(37.5, -12.0, FOVY, VIEW_ASPECT, eye), min_time)),
+        result('camera_sync', 'rebuild', 1, time_call(lambda: camera.rebuild(37.5, -12.0, FOVY, VIEW_ASPECT, eye), min_time)),
+        result('pick_ray', '-', 1, time_call(lambda: camera.pick_ray(310.0, 420.0, viewport), min_time)),
+    ]
+
+# =============================
+# SIMULATION
+# =============================
+
+def bench_update_targets(counts, min_time=0.2):
+    """update_targets() per call with the animation/glow toggles off and on"""
+    rows = []
+    tick = 1.0 / SIM_TICK_RATE
+    for animated, glowing in ((False, False), (True, False), (False, True), (True, True)):
+        variant = "+".join(name for name, on in (('animated', animated), ('glowing', glowing)) if on) or "static"
+        for count in counts:
+            session = make_session(MODE_NORMAL, count)
+            session.animated_spheres, session.glowing_spheres = animated, glowing
+
+            def update():
+                session.elapsed += tick
+                session.update_targets()
+
+            rows.append(result('update_targets', variant, count, time_call(update, min_time)))
+    return rows
+
+def bench_step(counts, min_time=0.2):
+    """step() per tick of a static scene holding count long-lived targets"""
+    rows = []
+    tick = 1.0 / SIM_TICK_RATE
+    for count in counts:
+        session = make_session(MODE_NORMAL, count)
+        rows.append(result('step', 'static', count, time_call(lambda: session.step(tick), min_time)))
+    return rows
+
+def bench_spawn_target(counts, min_time=0.2):
+    """spawn_target() per call in each mode, at the given occupancy (the spawned row is removed again)"""
+    rows = []
+    for mode in range(len(MODES)):
+        for count in counts:
+            session = make_session(mode, count)
+            store = session.targets
+            store.remove(store.count - 1)
+
+            def spawn():
+                session.spawn_target()
+                store.remove(store.count - 1)
+
+            rows.append(result('spawn_target', MODES[mode], count, time_call(spawn, min_time)))
+    return rows
+
+# =============================
+# RENDERING
+# =============================
+
+def make_offscreen_context(width, height):
+    """
+    Current OpenGL context rendering into an offscreen framebuffer via EGL
+    (no window system needed; PyOpenGL must be on its EGL platform); returns GL_RENDERER
+    """
+    import ctypes
+    from OpenGL import EGL
+    from OpenGL import GL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("eglInitialize failed")
+    attribs = (EGL.EGLint * 7)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                               EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                               EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_NONE)
+    config, found = EGL.EGLConfig(), EGL.EGLint()
+    EGL.eglChooseConfig(display, attribs, ctypes.pointer(config), 1, ctypes.pointer(found))
+    if found.value < 1:
+        raise RuntimeError("no EGL config with desktop OpenGL")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("eglMakeCurrent failed")
+
+    # Colour + depth renderbuffers standing in for the window's back buffer
+    GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, GL.glGenFramebuffers(1))
+    color, depth = GL.glGenRenderbuffers(2)
+    for rb, fmt, attachment in ((color, GL.GL_RGBA8, GL.GL_COLOR_ATTACHMENT0),
+                                (depth, GL.GL_DEPTH_COMPONENT24, GL.GL_DEPTH_ATTACHMENT)):
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, rb)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, fmt, width, height)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, attachment, GL.GL_RENDERBUFFER, rb)
+    return GL.glGetString(GL.GL_RENDERER).decode(errors='replace')
+
+def load_frontend():
+    """Import the GLUT front-end from its file (the file name has spaces)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Aim Lab Project_Buffed.py")
+    spec = importlib.util.spec_from_file_location("aim_lab_frontend", path)
+    game = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(game)
+    return game
+
+def bench_frame(counts, min_time=0.2):
+    """
+    Full gameplay showScreen() per frame (glFinish included) in an offscreen context
+    Returns (rows, gl_renderer). HUD text needs GLUT's bitmap fonts, which need an
+    X display; without $DISPLAY the text calls are skipped and the variant says so.
+    """
+    # PyOpenGL binds its platform on first import, so pick EGL before the front-end loads
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+    game = load_frontend()
+    renderer = make_offscreen_context(game.WINDOW_W, game.WINDOW_H)
+    if os.environ.get("DISPLAY"):
+        game.glutInit()            # freeglut exits the process when it can't open a display
+        text = "text"
+    else:
+        game.draw_text = lambda *args, **kwargs: None
+        game.build_glyph_lists = lambda: None
+        text = "no_text"
+    game.glutSwapBuffers = game.glFinish
+    game.init_gl()
+    game.compute_menu_layout()
+
+    rows = []
+    for effects in (False, True):
+        for count in counts:
+            session = make_session(MODE_NORMAL, count)
+            session.animated_spheres = session.glowing_spheres = effects
+            session.update_targets()
+            game.session, game.scheduler = session, FixedStepScheduler(session)
+            game.game_state = 'running'
+            game.showScreen()    # first frame pays for lazy GL setup
+
+            variant = f"{'animated+glowing' if effects else 'plain'}/{text}"
+            rows.append(result('frame', variant, count, time_call(game.showScreen, min_time)))
+    return rows, renderer
+
+# =============================
+# RESULTS
+# =============================
+
+def result(benchmark, variant, targets, seconds):
+    """One measurement row (time in microseconds per call)"""
+    return {'benchmark': benchmark, 'variant': variant, 'targets': targets, 'us': seconds * 1e6}
+
+def result_key(row):
+    return (row['benchmark'], row['variant'], row['targets'])
+
+def print_results(rows):
+    """Print measurements as a fixed-width table"""
+    print(f"{'benchmark':<22} {'variant':<26} {'targets':>8} {'time':>14}")
+    for row in rows:
+        us = row['us']
+        shown = f"{us / 1000:.3f}ms" if us >= 1000 else f"{us:.3f}us"
+        print(f"{row['benchmark']:<22} {row['variant']:<26} {row['targets']:>8} {shown:>14}")
+
+def write_results(path, rows, metadata):
+    """Write measurements and run metadata as JSON"""
+    with open(path, "w") as f:
+        json.dump({'metadata': metadata, 'results': rows}, f, indent=2)
+
+def find_regressions(rows, baseline_path, threshold):
+    """(row, baseline_us) for measurements slower than the baseline by more than threshold (a fraction)"""
+    with open(baseline_path) as f:
+        baseline = {result_key(row): row['us'] for row in json.load(f)['results']}
+    regressions = []
+    for row in rows:
+        base = baseline.get(result_key(row))
+        if base is not None and row['us'] > base * (1.0 + threshold):
+            regressions.append((row, base))
+    return regressions
+
+# =============================
+# ENTRY POINT
+# =============================
+
+GROUPS = ['math', 'shots', 'fire', 'update', 'spawn', 'frame']
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Enhanced Aim Lab 3D hot paths")
+    parser.add_argument('--counts', type=int, nargs='+', default=[5, 100, 1000, 10000], help="target counts")
+    parser.add_argument('--rays', type=int, default=64, help="rays per shot measurement")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=GROUPS, help="benchmark groups to run")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds spent timing each measurement")
+    parser.add_argument('--json', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fail when a measurement is this fraction slower than the baseline")
+    args = parser.parse_args()
+
+    counts, min_time = args.counts, args.min_time
+    metadata = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'counts': counts,
+    }
+    rows = []
+    if 'math' in args.only:
+        rows += bench_math(min_time)
+    if 'shots' in args.only:
+        rows += bench_hit_testing(counts, args.rays, min_time=min_time)
+    if 'fire' in args.only:
+        rows += bench_fire(counts, args.rays, min_time=min_time)
+    if 'update' in args.only:
+        rows += bench_update_targets(counts, min_time)
+        rows += bench_step(counts, min_time)
+    if 'spawn' in args.only:
+        rows += bench_spawn_target(counts, min_time)
+    if 'frame' in args.only:
+        try:
+            frame_rows, metadata['gl_renderer'] = bench_frame(counts, min_time)
+            rows += frame_rows
+        except Exception as e:
+            print(f"frame benchmarks skipped (no offscreen OpenGL context): {e}")
+    print_results(rows)
+
+    if args.json:
+        write_results(args.json, rows, metadata)
+        print(f"results written to {args.json}")
+    if args.baseline:
+        regressions = find_regressions(rows, args.baseline, args.threshold)
+        for row, base in regressions:
+            print(f"REGRESSION {row['benchmark']} {row['variant']} @ {row['targets']}: "
+                  f"{row['us']:.3f}us vs baseline {base:.3f}us (+{row['us'] / base - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1284 @@
+"""
+Headless simulation core for Enhanced Aim Lab 3D
+
+All gameplay state lives in GameSession, which can be stepped without a window.
+The GLUT front-end (Aim Lab Project_Buffed.py) is a thin adapter over it.
+"""
+import ctypes, functools, heapq, math, random, time
+
+import numpy as np
+
+from aim_lab_metrics import AimStats
+
+# =============================
+# GAMEPLAY CONSTANTS
+# =============================
+
+# Camera defaults
+FOVY = 75.0
+VIEW_ASPECT = 1500 / 1000    # default view width/height (the front-end sets its window's)
+NEAR, FAR = 0.1, 5000.0      # clip plane distances
+
+# Arena dimensions
+ARENA_HALF = 900
+ARENA_DEPTH = ARENA_HALF * 0.9
+FLOOR_Z = 0.0
+CAM_HEIGHT = 140.0
+WALL_HEIGHT = 400
+ARENA_BOUNDS = ((-ARENA_HALF, ARENA_HALF), (-ARENA_HALF, ARENA_HALF), (FLOOR_Z, WALL_HEIGHT))  # box the grid covers
+
+# Target configuration
+TARGET_MIN_Z = 80
+TARGET_MAX_Z = 220
+TARGET_RADIUS = 24
+MAX_TARGETS = 5
+SPAWN_AREA = ((-ARENA_HALF * 0.5, ARENA_HALF * 0.5), (50, ARENA_DEPTH * 0.9), (TARGET_MIN_Z, TARGET_MAX_Z))  # x, y, z
+
+# Game duration options
+DURATION_OPTIONS = [15.0, 30.0, 60.0, 120.0]  # seconds
+DURATION_LABELS = ["15 sec", "30 sec", "1 min", "2 min"]
+
+# Spawn mechanics - controls target appearance rate
+SPAWN_INTERVAL_START = 1.2   # initial spawn delay (seconds)
+SPAWN_INTERVAL_MIN = 0.20    # minimum spawn delay (fastest)
+SPAWN_ACCEL = 0.002          # spawn rate acceleration factor (per reference frame)
+SPAWN_ACCEL_RATE = SPAWN_ACCEL * 60.0   # spawn delay reduction per second (tuned at 60 FPS)
+
+# Player controls
+MOVE_SPEED = 10.0            # lateral movement speed
+FOV_MIN = 30.0               # minimum field of view
+FOV_MAX = 120.0              # maximum field of view
+FOV_STEP = 2.0               # FOV adjustment step size
+RAY_MAX_DIST = 3000          # maximum shooting distance
+PITCH_LIMIT = 85.0           # prevent camera flipping
+
+# Simulation timing
+SIM_TICK_RATE = 120.0        # fixed simulation steps per second
+MAX_FRAME_TIME = 0.25        # longest frame fed to the scheduler (avoids catch-up spirals)
+
+# Animation settings
+SPHERE_MOVE_SPEED = 80.0     # oscillation speed for animated targets
+SPHERE_MOVE_RANGE = 200.0    # oscillation distance
+GLOW_RATE = 0.03 * 60.0      # glow pulse phase speed (radians per second)
+CURVE_LUT_RATE = 240         # lookup-table samples per second of session time
+
+# Game mode constants
+MODES = ["Normal", "Endless", "Time Trial", "Precision"]
+MODE_NORMAL, MODE_ENDLESS, MODE_TIMETRIAL, MODE_PRECISION = 0, 1, 2, 3
+
+# Mode-specific settings
+TIME_TRIAL_HIT_BONUS = 1.0         # bonus time per hit in Time Trial
+TT_MIN_RADIUS_FACTOR = 0.45        # minimum target size in Time Trial (45% of original)
+ENDLESS_TTL_EARLY = (2.0, 2.8)     # Endless (min, max) target TTL at the start of a session
+ENDLESS_TTL_LATE = (0.6, 1.2)      # Endless (min, max) target TTL at the end of a session
+PRECISION_INNER_RATIO = 0.50       # headshot radius ratio for Precision mode
+
+# Shot zones reported by hit testing
+ZONE_MISS, ZONE_BODY, ZONE_HEAD = 0, 1, 2
+ZONE_NAMES = {ZONE_BODY: 'body', ZONE_HEAD: 'head'}
+BATCH_HIT_MIN_TARGETS = 64         # below this, per-target tests beat NumPy call overhead
+
+# Uniform grid broad phase for dense scenarios
+GRID_CELL_SIZE = 100.0             # edge length of a grid cell (world units)
+GRID_MIN_TARGETS = 256             # attach the grid once this many targets are live
+GRID_RELEASE_TARGETS = 128         # drop it again below this many
+
+# =============================
+# UTILITY FUNCTIONS
+# =============================
+
+def clamp(v, a, b):
+    """Clamp value v between min a and max b"""
+    return max(a, min(b, v))
+
+def deg2rad(a):
+    """Convert degrees to radians"""
+    return a * math.pi / 180.0
+
+def look_dir_from_angles(yaw_deg, pitch_deg):
+    """Calculate 3D look direction vector from yaw/pitch angles"""
+    cy, sy = math.cos(deg2rad(yaw_deg)), math.sin(deg2rad(yaw_deg))
+    cp, sp = math.cos(deg2rad(pitch_deg)), math.sin(deg2rad(pitch_deg))
+    fx = sy * cp
+    fy = cy * cp
+    fz = sp
+    # Normalize vector
+    l = math.sqrt(fx*fx + fy*fy + fz*fz)
+    return [fx/l, fy/l, fz/l]
+
+def add(a, b):
+    """Add two 3D vectors"""
+    return [a[0]+b[0], a[1]+b[1], a[2]+b[2]]
+
+def line_sphere_intersect(ro, rd, sc, sr):
+    """
+    Ray-sphere intersection test
+    ro: ray origin, rd: ray direction, sc: sphere center, sr: sphere radius
+    Returns distance to intersection or None if no hit
+    """
+    oc = [ro[0]-sc[0], ro[1]-sc[1], ro[2]-sc[2]]
+    b = oc[0]*rd[0] + oc[1]*rd[1] + oc[2]*rd[2]
+    c = oc[0]*oc[0] + oc[1]*oc[1] + oc[2]*oc[2] - sr*sr
+    disc = b*b - c
+    if disc < 0:
+        return None
+    t = -b - math.sqrt(disc)
+    if t < 0:
+        return None
+    return t
+
+def target_hit(ro, rd, p, r, precision=False, max_dist=RAY_MAX_DIST):
+    """
+    Where one ray hits one target: (distance, zone) or None
+    The headshot sphere (Precision) takes priority over the target's own body
+    """
+    if precision:
+        # Precision mode: check headshot first (red sphere on top)
+        tt = line_sphere_intersect(ro, rd, [p[0], p[1], p[2] + r * 1.5], r * PRECISION_INNER_RATIO)
+        if tt is not None and tt <= max_dist:
+            return tt, ZONE_HEAD
+    # Check main target sphere
+    tt = line_sphere_intersect(ro, rd, p, r)
+    if tt is not None and tt <= max_dist:
+        return tt, ZONE_BODY
+    return None
+
+def resolve_shot_scalar(ro, rd, centers, radii, precision=False, max_dist=RAY_MAX_DIST):
+    """
+    Nearest target hit by one ray, testing targets one at a time with target_hit
+    Returns (index, zone, distance); index is -1 and zone ZONE_MISS on a miss
+    """
+    best_t, best_idx, best_zone = None, -1, ZONE_MISS
+    for i, (p, r) in enumerate(zip(centers, radii)):
+        hit = target_hit(ro, rd, p, r, precision, max_dist)
+        if hit is not None and (best_t is None or hit[0] < best_t):
+            best_t, best_zone = hit
+            best_idx = i
+    return best_idx, best_zone, best_t
+
+def ray_sphere_distances(origins, directions, centers, radii, max_dist=RAY_MAX_DIST):
+    """
+    Batched line_sphere_intersect: every ray against every sphere
+    origins, directions: (R, 3); centers: (N, 3); radii: (N,)
+    Returns (R, N) hit distances, inf where the ray misses or the hit is beyond max_dist
+    """
+    # Same operation order as line_sphere_intersect so results match it bit for bit
+    ox = origins[:, 0:1] - centers[:, 0]
+    oy = origins[:, 1:2] - centers[:, 1]
+    oz = origins[:, 2:3] - centers[:, 2]
+    b = ox*directions[:, 0:1] + oy*directions[:, 1:2] + oz*directions[:, 2:3]
+    c = ox*ox + oy*oy + oz*oz - radii*radii
+    disc = b*b - c
+    with np.errstate(invalid='ignore'):
+        t = -b - np.sqrt(disc)
+    hit = (disc >= 0) & (t >= 0) & (t <= max_dist)
+    return np.where(hit, t, np.inf)
+
+def resolve_shots(origins, directions, centers, radii, precision=False, max_dist=RAY_MAX_DIST):
+    """
+    Nearest target hit by each of a batch of rays, body and headshot spheres tested at once
+    Same rules as resolve_shot_scalar; origins/directions may be a single (3,) ray or (R, 3)
+    Returns (index, zone, distance) arrays of shape (R,)
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+    rays = max(len(origins), len(directions))
+    if len(centers) == 0:
+        return np.full(rays, -1), np.full(rays, ZONE_MISS, np.int8), np.full(rays, np.inf)
+
+    dist = ray_sphere_distances(origins, directions, centers, radii, max_dist)
+    zone = np.full(dist.shape, ZONE_BODY, np.int8)
+    if precision:
+        # Headshot spheres sit 1.5 radii above each body
+        head_centers = centers.copy()
+        head_centers[:, 2] = centers[:, 2] + radii * 1.5
+        head = ray_sphere_distances(origins, directions, head_centers, radii * PRECISION_INNER_RATIO, max_dist)
+        head_hit = np.isfinite(head)
+        dist = np.where(head_hit, head, dist)
+        zone[head_hit] = ZONE_HEAD
+
+    rows = np.arange(dist.shape[0])
+    index = dist.argmin(axis=1)
+    best = dist[rows, index]
+    best_zone = zone[rows, index]
+    missed = np.isinf(best)
+    index[missed] = -1
+    best_zone[missed] = ZONE_MISS
+    return index, best_zone, best
+
+def nearest_angle(ro, rd, centers):
+    """Smallest angle (degrees) between unit direction rd and the directions from ro to centers (N, 3); NaN if N is 0"""
+    if len(centers) == 0:
+        return math.nan
+    if len(centers) < BATCH_HIT_MIN_TARGETS:
+        best = -1.0
+        for cx, cy, cz in centers.tolist():
+            dx, dy, dz = cx - ro[0], cy - ro[1], cz - ro[2]
+            best = max(best, (dx*rd[0] + dy*rd[1] + dz*rd[2]) / math.sqrt(dx*dx + dy*dy + dz*dz))
+    else:
+        d = centers - np.asarray(ro, dtype=float)
+        best = float(((d @ np.asarray(rd, dtype=float)) / np.sqrt((d * d).sum(axis=1))).max())
+    return math.degrees(math.acos(min(1.0, best)))
+
+def random_target_pos(rng=random):
+    """Generate random position within arena bounds for new target"""
+    return [rng.uniform(lo, hi) for lo, hi in SPAWN_AREA]
+
+# =============================
+# CAMERA
+# =============================
+
+GL_MATRIX = ctypes.c_float * 16      # 4x4 column-major matrix as glLoadMatrixf takes it
+
+class Camera:
+    """
+    The player's view: forward vector, view and projection matrices, cached between frames
+    sync() rebuilds them only when yaw, pitch, FOV, aspect or the eye position changed.
+    The *_gl matrices are column-major float[16] arrays, ready for glLoadMatrixf; the
+    frustum planes used for culling and the inverse used for picking come from the same
+    view-projection.
+    """
+
+    def __init__(self, near=NEAR, far=FAR):
+        self.near, self.far = near, far
+        self.key = None                      # (yaw, pitch, fov, aspect, x, y, z) of the cached basis
+        self.rebuilds = 0                    # times the basis was recomputed
+
+    def sync(self, yaw, pitch, fov, aspect, eye):
+        """Bring the cached basis up to date with the given camera state; returns self"""
+        key = (yaw, pitch, fov, aspect, eye[0], eye[1], eye[2])
+        if key != self.key:
+            self.key = key
+            self.rebuild(yaw, pitch, fov, aspect, eye)
+        return self
+
+    def rebuild(self, yaw, pitch, fov, aspect, eye):
+        """Recompute the basis (the matrices gluPerspective and gluLookAt build)"""
+        self.rebuilds += 1
+        self.forward = fx, fy, fz = look_dir_from_angles(yaw, pitch)
+        self.eye = ex, ey, ez = [float(v) for v in eye]
+
+        # gluPerspective
+        near, far = self.near, self.far
+        self.focal = focal = 1.0 / math.tan(deg2rad(fov) * 0.5)   # projection scale at distance 1
+        px, pz, pw = focal / aspect, (far + near) / (near - far), 2.0 * far * near / (near - far)
+        self.projection_gl = GL_MATRIX(px, 0.0, 0.0, 0.0,  0.0, focal, 0.0, 0.0,  0.0, 0.0, pz, -1.0,  0.0, 0.0, pw, 0.0)
+
+        # gluLookAt toward eye + forward with Z up: side = forward x up, up' = side x forward
+        sl = math.hypot(fx, fy)
+        sx, sy = fy / sl, -fx / sl
+        ux, uy, uz = sy * fz, -sx * fz, sx * fy - sy * fx
+        tx, ty, tz = -(sx*ex + sy*ey), -(ux*ex + uy*ey + uz*ez), fx*ex + fy*ey + fz*ez
+        self.view_gl = GL_MATRIX(sx, ux, -fx, 0.0,  sy, uy, -fy, 0.0,  0.0, uz, -fz, 0.0,  tx, ty, tz, 1.0)
+
+        # Rows of view-projection; frustum planes (a, b, c, d) have inward unit normals
+        rows = ((px*sx, px*sy, 0.0, px*tx), (focal*ux, focal*uy, focal*uz, focal*ty),
+                (-pz*fx, -pz*fy, -pz*fz, pz*tz + pw), (fx, fy, fz, -tz))
+        self.view_projection = rows
+        self.inverse = None                  # inverse view-projection, built by the first pick
+        planes = []
+        for axis in range(3):
+            for sign in (1.0, -1.0):
+                a, b, c, d = (w + sign * v for w, v in zip(rows[3], rows[axis]))
+                l = math.sqrt(a*a + b*b + c*c)
+                planes.append((a / l, b / l, c / l, d / l))
+        self.planes = np.array(planes)       # left, right, bottom, top, near, far
+
+    def unproject(self, win_x, win_y, win_z, viewport):
+        """World point under window coordinates, as gluUnProject computes it (no GL readback)"""
+        if self.inverse is None:
+            self.inverse = np.linalg.inv(np.array(self.view_projection)).tolist()
+        vx, vy, vw, vh = viewport
+        ndc = (2.0 * (win_x - vx) / vw - 1.0, 2.0 * (win_y - vy) / vh - 1.0, 2.0 * win_z - 1.0, 1.0)
+        x, y, z, w = (r[0]*ndc[0] + r[1]*ndc[1] + r[2]*ndc[2] + r[3] for r in self.inverse)
+        return [x / w, y / w, z / w]
+
+    def pick_ray(self, win_x, win_y, viewport):
+        """
+        Ray (origin, unit direction) through window coordinates (GL convention: y up)
+        Runs from the near plane toward the far plane, like unprojecting depths 0 and 1
+        """
+        near = self.unproject(win_x, win_y, 0.0, viewport)
+        far = self.unproject(win_x, win_y, 1.0, viewport)
+        rd = [far[0] - near[0], far[1] - near[1], far[2] - near[2]]
+        mag = math.sqrt(rd[0]*rd[0] + rd[1]*rd[1] + rd[2]*rd[2]) or 1.0
+        return near, [rd[0]/mag, rd[1]/mag, rd[2]/mag]
+
+    def spheres_visible(self, centers, radii):
+        """Boolean mask of the spheres (centers (N, 3), radii (N,)) at least partly inside the frustum"""
+        dist = centers @ self.planes[:, :3].T + self.planes[:, 3]
+        return (dist >= -radii[:, None]).all(axis=1)
+
+# =============================
+# TARGET STORE
+# =============================
+
+class TargetStore:
+    """
+    Structure-of-arrays storage for live targets
+    Row i of every column describes the same target; rows 0..count-1 are live.
+    Capacity is preallocated and deletion swaps the last row into the hole.
+    Expiry times wait in a heap keyed by target id, so finding the targets due to
+    expire costs O(log n) per expiry instead of a scan of every row.
+    """
+
+    COLUMNS = ('pos', 'prev_pos', 'original_x', 'original_r', 'r', 'born', 'ttl',
+               'move_direction', 'glow_start', 'glow_phase', 'ids', 'lod', 'head_lod')
+
+    def __init__(self, capacity=MAX_TARGETS):
+        self.count = 0
+        self.next_id = 0
+        self.grid = None                                        # optional TargetGrid kept in sync
+        self.capacity = max(1, capacity)
+        self.pos = np.zeros((self.capacity, 3))                 # current position [x, y, z]
+        self.prev_pos = np.zeros((self.capacity, 3))            # position at the previous tick
+        self.original_x = np.zeros(self.capacity)               # initial x for animation oscillation
+        self.original_r = np.zeros(self.capacity)               # base radius before effects
+        self.r = np.zeros(self.capacity)                        # current radius
+        self.born = np.zeros(self.capacity)                     # creation time (session seconds)
+        self.ttl = np.zeros(self.capacity)                      # time to live (seconds)
+        self.move_direction = np.zeros(self.capacity, np.int8)  # oscillation direction (-1 or 1)
+        self.glow_start = np.zeros(self.capacity)               # glow phase at spawn
+        self.glow_phase = np.zeros(self.capacity)               # glow animation phase
+        self.ids = np.zeros(self.capacity, np.int64)            # stable id, unique per session
+        self.lod = np.zeros(self.capacity, np.int8)             # renderer LOD of the body sphere
+        self.head_lod = np.zeros(self.capacity, np.int8)        # renderer LOD of the headshot sphere
+        self.rows = {}                   # id -> row of each live target
+        self.expiries = []               # heap of (born + ttl, id); ids no longer live are skipped
+        self.moved = False               # positions changed since the last snapshot()
+        self.resized = False             # radii differ from original_r (effects applied)
+        self.allocate_scratch()
+
+    def allocate_scratch(self):
+        """Per-row work buffers, so per-tick column math can run without allocating (not row data)"""
+        self.scratch = np.zeros((2, self.capacity))
+        self.scratch_index = np.zeros(self.capacity, np.intp)
+
+    def grow(self):
+        """Double the capacity of every column, keeping live rows"""
+        self.capacity *= 2
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((self.capacity,) + column.shape[1:], column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+        self.allocate_scratch()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, pos, r, born, ttl, move_direction, glow_phase):
+        """Append a target and return its row index"""
+        if self.count == self.capacity:
+            self.grow()
+        i = self.count
+        self.pos[i] = pos
+        self.prev_pos[i] = pos
+        self.original_x[i] = pos[0]
+        self.original_r[i] = r
+        self.r[i] = r
+        self.born[i] = born
+        self.ttl[i] = ttl
+        self.move_direction[i] = move_direction
+        self.glow_start[i] = glow_phase
+        self.glow_phase[i] = glow_phase
+        self.ids[i] = self.next_id
+        self.lod[i] = 0
+        self.head_lod[i] = 0
+        self.rows[self.next_id] = i
+        heapq.heappush(self.expiries, (born + ttl, self.next_id))
+        self.next_id += 1
+        self.count += 1
+        if self.grid is not None:
+            self.grid.add_row(i, self.pos[i], r)
+        return i
+
+    def remove(self, i):
+        """Delete row i by moving the last live row into it"""
+        last = self.count - 1
+        del self.rows[int(self.ids[i])]
+        if self.grid is not None:
+            self.grid.discard_row(i)
+            if i != last:
+                self.grid.move_row(last, i)
+        if i != last:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[i] = column[last]
+            self.rows[int(self.ids[i])] = i
+        self.count = last
+
+    def remove_indices(self, indices):
+        """
+        Delete several rows at once (indices must be sorted and unique)
+        Holes below the new count are filled from the surviving rows at the tail
+        """
+        new_count = self.count - len(indices)
+        holes = indices[indices < new_count]
+        tail = np.arange(new_count, self.count)
+        movers = tail[~np.isin(tail, indices)]
+        for i in indices.tolist():
+            del self.rows[int(self.ids[i])]
+        if self.grid is not None:
+            for i in indices.tolist():
+                self.grid.discard_row(i)
+            for src, dst in zip(movers.tolist(), holes.tolist()):
+                self.grid.move_row(src, dst)
+        if len(holes):
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[holes] = column[movers]
+            for dst in holes.tolist():
+                self.rows[int(self.ids[dst])] = dst
+        self.count = new_count
+
+    def next_expiry(self):
+        """Time the earliest live target expires, or inf (drops queue entries of removed targets)"""
+        heap = self.expiries
+        while heap and heap[0][1] not in self.rows:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else math.inf
+
+    def pop_expiry(self):
+        """Take the earliest expiry off the queue and return its row (call next_expiry() first)"""
+        return self.rows[heapq.heappop(self.expiries)[1]]
+
+    def pop_expired(self, t):
+        """Take every expiry at or before t off the queue; returns the live rows, sorted"""
+        heap, rows, due = self.expiries, self.rows, []
+        while heap and heap[0][0] <= t:
+            row = rows.get(heapq.heappop(heap)[1])
+            if row is not None:
+                due.append(row)
+        due.sort()
+        return np.array(due, np.intp)
+
+    def reschedule(self):
+        """Rebuild the expiry queue after born/ttl columns were edited in place"""
+        n = self.count
+        self.expiries = list(zip((self.born[:n] + self.ttl[:n]).tolist(), self.ids[:n].tolist()))
+        heapq.heapify(self.expiries)
+
+    def snapshot(self):
+        """Remember current positions as the previous tick's, for render interpolation"""
+        if self.moved:
+            self.prev_pos[:self.count] = self.pos[:self.count]
+            self.moved = False
+
+    def interpolated_pos(self, alpha):
+        """Live positions blended between the previous and current tick (alpha in 0..1)"""
+        n = self.count
+        prev = self.prev_pos[:n]
+        return prev + (self.pos[:n] - prev) * alpha
+
+    def clear(self):
+        """Drop every target (capacity is kept)"""
+        self.count = 0
+        self.rows.clear()
+        self.expiries.clear()
+        if self.grid is not None:
+            self.grid.build(self)
+
+    def attach_grid(self, grid):
+        """Start keeping a broad-phase grid in sync with this store (None detaches)"""
+        self.grid = grid
+        if grid is not None:
+            grid.build(self)
+
+# =============================
+# BROAD PHASE
+# =============================
+
+class TargetGrid:
+    """
+    Uniform grid over the arena used to cull ray tests when many targets are live
+    Cells hold TargetStore row indices. Each row remembers the inclusive range of
+    cells its bounds cover, so moving targets are only re-binned when that range changes.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell = cell_size
+        self.lo = np.array([lo for lo, _ in ARENA_BOUNDS], dtype=float)
+        self.hi = np.array([hi for _, hi in ARENA_BOUNDS], dtype=float)
+        self.dims = np.maximum(1, np.ceil((self.hi - self.lo) / cell_size)).astype(np.int32)
+        self.nx, self.ny, self.nz = (int(d) for d in self.dims)
+        self.max_index = (self.dims - 1).astype(float)
+        self.cells = [set() for _ in range(self.nx * self.ny * self.nz)]
+        self.ranges = np.zeros((0, 6), np.int32)     # per row: ix0, iy0, iz0, ix1, iy1, iz1
+        self.reserve(1)
+
+    def cell_ranges(self, centers, radii, out=None):
+        """
+        Inclusive cell ranges covering each body sphere and the headshot sphere above it
+        Writes into out (n, 6) when given; uses the grid's scratch, so n must fit reserve()
+        """
+        n = len(centers)
+        if out is None:
+            out = np.empty((n, 6), np.int32)
+        lo, hi = self.scratch_bounds[0, :n], self.scratch_bounds[1, :n]
+        np.subtract(centers, radii[:, None], out=lo)
+        np.add(centers, radii[:, None], out=hi)
+        hi[:, 2] += radii  # headshot sphere reaches z + 2r
+        for bounds, half in ((lo, out[:, :3]), (hi, out[:, 3:])):
+            np.subtract(bounds, self.lo, out=bounds)
+            np.floor_divide(bounds, self.cell, out=bounds)
+            np.clip(bounds, 0.0, self.max_index, out=bounds)
+            np.copyto(half, bounds, casting='unsafe')
+        return out
+
+    def cells_in(self, rng):
+        """Flat cell indices inside an inclusive (ix0, iy0, iz0, ix1, iy1, iz1) range"""
+        ix0, iy0, iz0, ix1, iy1, iz1 = (int(v) for v in rng)
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                base = (ix * self.ny + iy) * self.nz
+                for iz in range(iz0, iz1 + 1):
+                    yield base + iz
+
+    def reserve(self, rows):
+        """Make room for range records (and refresh scratch) of at least rows rows"""
+        if len(self.ranges) < rows:
+            size = max(rows, 2 * len(self.ranges))
+            grown = np.zeros((size, 6), np.int32)
+            grown[:len(self.ranges)] = self.ranges
+            self.ranges = grown
+            self.scratch_bounds = np.zeros((2, size, 3))
+            self.scratch_ranges = np.zeros((size, 6), np.int32)
+            self.scratch_changed = np.zeros((size, 6), bool)
+            self.scratch_rows = np.zeros(size, bool)
+            self.row_keys = list(range(size))    # one shared int per row, so cells don't keep copies
+
+    def build(self, store):
+        """Bin every live target from scratch"""
+        for cell in self.cells:
+            cell.clear()
+        n = store.count
+        self.reserve(store.capacity)
+        self.ranges[:n] = self.cell_ranges(store.pos[:n], store.r[:n])
+        for i in self.row_keys[:n]:
+            for c in self.cells_in(self.ranges[i]):
+                self.cells[c].add(i)
+
+    def add_row(self, i, pos, r):
+        """Bin a newly added row"""
+        self.reserve(i + 1)
+        self.ranges[i] = self.cell_ranges(pos[None, :], np.array([r]))[0]
+        for c in self.cells_in(self.ranges[i]):
+            self.cells[c].add(self.row_keys[i])
+
+    def discard_row(self, i):
+        """Remove row i from every cell it occupies"""
+        for c in self.cells_in(self.ranges[i]):
+            self.cells[c].discard(i)
+
+    def move_row(self, src, dst):
+        """Relabel row src as dst (the store swapped src into the hole at dst)"""
+        for c in self.cells_in(self.ranges[src]):
+            cell = self.cells[c]
+            cell.discard(src)
+            cell.add(self.row_keys[dst])
+        self.ranges[dst] = self.ranges[src]
+
+    def refresh(self, store):
+        """Re-bin only the rows whose cell range changed after targets moved or resized"""
+        n = store.count
+        if n == 0:
+            return
+        self.reserve(n)
+        new = self.cell_ranges(store.pos[:n], store.r[:n], self.scratch_ranges[:n])
+        changed = self.scratch_changed[:n]
+        rows = self.scratch_rows[:n]
+        np.not_equal(new, self.ranges[:n], out=changed)
+        np.any(changed, axis=1, out=rows)
+        if not rows.any():
+            return
+        for i in np.flatnonzero(rows).tolist():
+            self.discard_row(i)
+            self.ranges[i] = new[i]
+            for c in self.cells_in(new[i]):
+                self.cells[c].add(self.row_keys[i])
+
+    def query(self, ro, rd, store, precision=False, max_dist=RAY_MAX_DIST):
+        """
+        Nearest target hit by one ray, visiting only the cells it crosses (3D DDA)
+        Same result as resolve_shot_scalar over the whole store: (index, zone, distance)
+        """
+        # Clip the ray against the grid bounds
+        t_enter, t_exit = 0.0, float(max_dist)
+        for a in range(3):
+            lo, hi = float(self.lo[a]), float(self.hi[a])
+            if rd[a] == 0.0:
+                if not lo <= ro[a] <= hi:
+                    return -1, ZONE_MISS, None
+                continue
+            t0, t1 = (lo - ro[a]) / rd[a], (hi - ro[a]) / rd[a]
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t_enter, t_exit = max(t_enter, t0), min(t_exit, t1)
+        if t_enter > t_exit:
+            return -1, ZONE_MISS, None
+
+        # Starting cell and per-axis stepping state
+        idx, step, t_max, t_delta = [0, 0, 0], [0, 0, 0], [math.inf] * 3, [math.inf] * 3
+        for a in range(3):
+            p = ro[a] + rd[a] * t_enter
+            idx[a] = clamp(int((p - self.lo[a]) // self.cell), 0, int(self.dims[a]) - 1)
+            if rd[a] > 0.0:
+                step[a] = 1
+                t_max[a] = (self.lo[a] + (idx[a] + 1) * self.cell - ro[a]) / rd[a]
+                t_delta[a] = self.cell / rd[a]
+            elif rd[a] < 0.0:
+                step[a] = -1
+                t_max[a] = (self.lo[a] + idx[a] * self.cell - ro[a]) / rd[a]
+                t_delta[a] = -self.cell / rd[a]
+
+        pos, radii = store.pos, store.r
+        tested = set()
+        best_t, best_idx, best_zone = None, -1, ZONE_MISS
+        while True:
+            for i in self.cells[(idx[0] * self.ny + idx[1]) * self.nz + idx[2]]:
+                if i in tested:
+                    continue
+                tested.add(i)
+                hit = target_hit(ro, rd, pos[i].tolist(), float(radii[i]), precision, max_dist)
+                if hit is not None and (best_t is None or (hit[0], i) < (best_t, best_idx)):
+                    best_t, best_zone = hit
+                    best_idx = i
+
+            # Step into the next cell; stop once no unvisited cell can hold a closer hit
+            a = t_max.index(min(t_max))
+            t_next = t_max[a]
+            if t_next > t_exit or (best_t is not None and best_t < t_next):
+                break
+            idx[a] += step[a]
+            if not 0 <= idx[a] < self.dims[a]:
+                break
+            t_max[a] += t_delta[a]
+
+        return best_idx, best_zone, best_t
+
+# =============================
+# DIFFICULTY AND ANIMATION CURVES
+# =============================
+
+def spawn_interval_curve(mode, t):
+    """Delay before the next spawn for a spawn timer armed at session time t"""
+    if mode == MODE_TIMETRIAL:
+        return SPAWN_INTERVAL_START
+    rate = max(0.0, SPAWN_ACCEL_RATE) * (2.0 if mode == MODE_ENDLESS else 1.0)  # Endless ramps up faster; <= 0: no ramp
+    return max(SPAWN_INTERVAL_MIN, SPAWN_INTERVAL_START - rate * t)
+
+def endless_ttl_curve(t, duration):
+    """
+    Endless mode (min, max) target time-to-live at session time t
+    TTL decreases as game progresses to increase difficulty
+    """
+    base_min, base_max = ENDLESS_TTL_EARLY
+    min_min,  min_max  = ENDLESS_TTL_LATE
+    # Exponential difficulty curve
+    d = clamp((t / duration) ** 1.5, 0.0, 1.0)
+    return base_min*(1.0-d) + min_min*d, base_max*(1.0-d) + min_max*d
+
+def time_trial_size_curve(t, duration):
+    """
+    Time Trial target size factor at session time t
+    Targets shrink linearly over session duration
+    """
+    total = max(1.0, duration)
+    d = clamp(t / total, 0.0, 1.0)
+    return (1.0 - d) * (1.0 - TT_MIN_RADIUS_FACTOR) + TT_MIN_RADIUS_FACTOR
+
+def glow_curve(phase):
+    """Radius scale of a pulsing target at the given glow phase"""
+    return 1.0 + 0.3 * math.sin(phase)
+
+class CurveTable:
+    """
+    Lookup table for a curve sampled CURVE_LUT_RATE times per second over [0, t_end]
+    Values are linearly interpolated between samples; times past t_end hold the last
+    sample, so t_end must lie where the curve has flattened out (t_end <= 0 gives a
+    single-sample, constant table). With a period the input wraps instead.
+    """
+
+    def __init__(self, fn, t_end, rate=CURVE_LUT_RATE, period=None):
+        self.rate = rate
+        self.period = period
+        self.last = max(0, int(math.ceil(t_end * rate)))
+        self.values = [float(fn(k / rate)) for k in range(self.last + 1)]
+        self.array = np.array(self.values)
+        self.slopes = np.append(np.diff(self.array), 0.0)   # per-sample step to the next sample
+
+    def __call__(self, t):
+        """Curve value at time t"""
+        if self.period is not None:
+            t %= self.period
+        x = t * self.rate
+        k = int(x)
+        if k >= self.last:
+            return self.values[-1]
+        v0 = self.values[k]
+        return v0 + (self.values[k + 1] - v0) * (x - k)
+
+    def evaluate(self, t):
+        """Vectorized lookup for an array of times"""
+        t = np.asarray(t, dtype=float)
+        out = np.empty_like(t)
+        self.evaluate_into(t, out, np.empty_like(t), np.empty(t.shape, np.intp))
+        return out
+
+    def evaluate_into(self, t, out, work, index):
+        """evaluate() without allocating: writes into out, using float work and intp index arrays shaped like t"""
+        if self.period is not None:
+            np.mod(t, self.period, out=work)
+            np.multiply(work, self.rate, out=work)
+        else:
+            np.multiply(t, self.rate, out=work)
+        np.clip(work, 0.0, self.last, out=work)
+        np.floor(work, out=out)
+        np.copyto(index, out, casting='unsafe')
+        np.subtract(work, out, out=work)              # fraction between samples
+        np.take(self.slopes, index, out=out)
+        np.multiply(out, work, out=out)
+        np.take(self.array, index, out=work)
+        np.add(out, work, out=out)
+        return out
+
+GLOW_TABLE = CurveTable(glow_curve, 2 * math.pi, rate=512 / (2 * math.pi), period=2 * math.pi)
+
+@functools.lru_cache(maxsize=None)
+def session_curves(mode, duration):
+    """Precomputed curve tables for a mode and duration, shared between sessions"""
+    # Spawn delay bottoms out here; a start at or below the minimum, or no acceleration, is flat from 0
+    ramp = max(0.0, SPAWN_INTERVAL_START - SPAWN_INTERVAL_MIN)
+    ramp_end = ramp / SPAWN_ACCEL_RATE if SPAWN_ACCEL_RATE > 0.0 else 0.0
+    ttl_min = CurveTable(lambda t: endless_ttl_curve(t, duration)[0], duration)
+    ttl_max = CurveTable(lambda t: endless_ttl_curve(t, duration)[1], duration)
+    return {
+        'spawn_interval': CurveTable(lambda t: spawn_interval_curve(mode, t), ramp_end),
+        'endless_ttl': (ttl_min, ttl_max),
+        'size_factor': CurveTable(lambda t: time_trial_size_curve(t, duration), max(1.0, duration)),
+    }
+
+# Difficulty constants that set_tuning() may override (aim_lab_tune.py sweeps them)
+TUNABLES = ('SPAWN_INTERVAL_START', 'SPAWN_ACCEL', 'ENDLESS_TTL_EARLY', 'ENDLESS_TTL_LATE', 'TT_MIN_RADIUS_FACTOR')
+
+def set_tuning(**values):
+    """
+    Override difficulty constants (names from TUNABLES) for sessions created afterwards
+    Returns the previous values, so set_tuning(**previous) restores them.
+    """
+    unknown = set(values) - set(TUNABLES)
+    if unknown:
+        raise ValueError(f"not tunable: {', '.join(sorted(unknown))}")
+    previous = {name: globals()[name] for name in values}
+    globals().update(values)
+    global SPAWN_ACCEL_RATE
+    SPAWN_ACCEL_RATE = SPAWN_ACCEL * 60.0
+    session_curves.cache_clear()
+    return previous
+
+# =============================
+# FRAME SCHEDULING
+# =============================
+
+class FixedStepScheduler:
+    """
+    Drives a session at a fixed tick rate from variable-length frames
+    Frame time accumulates and is consumed in whole ticks; the remainder
+    becomes alpha, the fraction of a tick to interpolate rendered positions by.
+    """
+
+    def __init__(self, session, tick_rate=SIM_TICK_RATE, max_frame_time=MAX_FRAME_TIME):
+        self.session = session
+        self.tick = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accum = 0.0
+        self.alpha = 0.0
+        self.last_clock = None
+        self.ticks = 0                       # total ticks run
+
+    def advance(self, frame_dt):
+        """Feed one frame's duration; run as many fixed ticks as fit and return how many ran"""
+        if self.session.paused:
+            return 0                         # hold accum (and alpha) so paused frames don't jitter
+        self.accum += min(max(frame_dt, 0.0), self.max_frame_time)
+        ticks = 0
+        while self.accum >= self.tick and self.session.state == 'running':
+            self.session.step(self.tick)
+            self.accum -= self.tick
+            ticks += 1
+        self.ticks += ticks
+        self.alpha = min(self.accum / self.tick, 1.0)
+        return ticks
+
+    def update(self):
+        """Advance by the time the session's clock reports since the last call"""
+        if self.session.paused:
+            self.last_clock = None
+            return 0
+        now = self.session.clock()
+        if self.last_clock is None:
+            self.last_clock = now
+        frame_dt = now - self.last_clock
+        self.last_clock = now
+        return self.advance(frame_dt)
+
+    def resync(self):
+        """Forget the last clock reading, so time spent paused or not updating isn't simulated"""
+        self.last_clock = None
+
+# =============================
+# GAME SESSION
+# =============================
+
+class GameSession:
+    """
+    One run of the game, independent of any window or GL context
+    Advance it with step(dt) (or update() to read the injected clock) and shoot with fire()
+    All randomness comes from the session's seeded generator, so a run is reproducible
+    from its seed, its step sizes and its inputs (see input_log).
+    A scenario (aim_lab_scenarios.Scenario) replaces the built-in mode: its rules set
+    scoring and the clock, and its compiled timeline replaces the spawn timer.
+    """
+
+    def __init__(self, mode=MODE_ENDLESS, duration=DURATION_OPTIONS[1], clock=time.time,
+                 max_targets=MAX_TARGETS, seed=None, scenario=None):
+        if scenario is not None:
+            mode, duration, max_targets = None, scenario.duration, scenario.max_targets
+        self.mode = mode                     # MODE_* index, None for scenario sessions
+        self.scenario = scenario
+        self.duration = duration
+        self.max_targets = max_targets
+        self.clock = clock                   # callable returning seconds, used by update()
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)  # every random draw of the session
+
+        # Rules: scoring zones and the clock (the built-in mode's or the scenario's)
+        if scenario is None:
+            self.mode_name = MODES[mode]
+            self.points = {ZONE_BODY: 1, ZONE_HEAD: 5}   # bonus points for headshots
+            self.head_zone = mode == MODE_PRECISION       # headshot sphere on top of each target
+            self.banked = mode == MODE_TIMETRIAL          # the clock is a bank topped up by hits
+            self.hit_bonus = TIME_TRIAL_HIT_BONUS         # seconds banked per hit
+            self.time_limit = math.inf                    # session time that ends a banked run regardless
+        else:
+            self.mode_name = scenario.name
+            self.points, self.head_zone = scenario.points, scenario.head_zone
+            self.banked, self.hit_bonus, self.time_limit = scenario.banked, scenario.hit_bonus, scenario.time_limit
+        self.profiler = None                 # optional FrameProfiler timing step() phases
+        self.shot_log = None                 # optional ShotLog recording every shot
+        self.input_log = None                # list of [step, action, args] while recording
+
+        # Session state
+        self.state = 'running'               # 'running' or 'ended'
+        self.end_reason = None
+        self.summary = {}                    # post-game statistics (filled by end())
+        self.aim_stats = AimStats()          # reaction and flick distributions
+        self.elapsed = 0.0                   # session time in seconds, excluding pauses
+        self.steps = 0                       # simulation steps taken (inputs are keyed by this)
+        self.paused = False
+        self.last_clock = None               # clock reading at the previous update()
+
+        # Game statistics
+        self.score = 0
+        self.misses = 0
+        self.shots = 0
+        self.hits = 0
+        self.headshot_hits = 0
+        self.spawned_spheres_count = 0
+        self.time_bank = duration            # remaining time (Time Trial mode)
+
+        # Target management (scenarios spawn from their compiled timeline instead of the timer)
+        self.curves = session_curves(mode, duration) if scenario is None else scenario.curves
+        self.timeline = None if scenario is None else scenario.compile(self.seed)
+        self.spawn_interval = self.curves['spawn_interval'](0.0)  # delay for the armed spawn
+        self.spawn_accum = 0.0               # time the spawn timer has run, up to spawn_mark
+        self.spawn_mark = 0.0                # session time the timer resumed (None while full)
+        self.targets = TargetStore(max_targets)
+
+        # Player state
+        self.player_pos = [0.0, -300.0, CAM_HEIGHT]
+        self.yaw = 0.0
+        self.pitch = -5.0
+        self.current_fov = FOVY
+        self.aspect = VIEW_ASPECT            # view width/height, kept current by the front-end
+        self.camera = Camera()
+
+        # Visual effects toggles
+        self.animated_spheres = scenario is not None and scenario.animated
+        self.glowing_spheres = scenario is not None and scenario.glowing
+
+    # ---- difficulty curves ----
+
+    def endless_ttl_now(self):
+        """Random target time-to-live for Endless mode, drawn from the current TTL range"""
+        ttl_min, ttl_max = self.curves['endless_ttl']
+        return self.rng.uniform(ttl_min(self.elapsed), ttl_max(self.elapsed))
+
+    def time_trial_size_factor(self):
+        """Current target size reduction for Time Trial mode"""
+        return self.curves['size_factor'](self.elapsed)
+
+    # ---- targets ----
+
+    def spawn_target(self):
+        """Create new target based on current game mode"""
+        if len(self.targets) >= self.max_targets:
+            return
+
+        # Mode-specific target configuration
+        if self.mode == MODE_TIMETRIAL:
+            # Time Trial: shrinking targets, fixed TTL
+            r = TARGET_RADIUS * self.time_trial_size_factor()
+            ttl = 4.0
+        elif self.mode == MODE_ENDLESS:
+            # Endless: normal size, decreasing TTL
+            r = TARGET_RADIUS
+            ttl = self.endless_ttl_now()
+        else:  # MODE_NORMAL, MODE_PRECISION
+            # Normal/Precision: normal size, standard TTL
+            r = TARGET_RADIUS
+            ttl = self.rng.uniform(2.8, 4.5)
+
+        pos = random_target_pos(self.rng)
+        self.targets.add(pos, r, self.elapsed, ttl,
+                         self.rng.choice((-1, 1)),            # oscillation direction
+                         self.rng.uniform(0, 2 * math.pi))    # glow animation phase
+        self.spawned_spheres_count += 1
+
+    def update_targets(self):
+        """
+        Update all active targets (animation, effects) as whole-column operations
+        Intermediates go to the store's scratch rows, so a tick allocates no arrays.
+        With every effect off and radii already at their base, nothing is touched.
+        """
+        store = self.targets
+        now = self.elapsed
+        n = store.count
+        if n == 0:
+            return store
+        born, work = store.born[:n], store.scratch[0, :n]
+
+        # Apply horizontal oscillation if animation enabled
+        if self.animated_spheres:
+            # x = original_x + sin(age * speed / range) * range / 2, kept inside the arena
+            np.subtract(now, born, out=work)
+            np.multiply(work, SPHERE_MOVE_SPEED / SPHERE_MOVE_RANGE, out=work)
+            np.sin(work, out=work)
+            np.multiply(work, SPHERE_MOVE_RANGE * 0.5, out=work)
+            np.add(store.original_x[:n], work, out=work)
+            np.clip(work, -ARENA_HALF*0.8, ARENA_HALF*0.8, out=store.pos[:n, 0])
+            store.moved = True
+
+        # Time Trial (and shrinking scenarios): apply shrink effect before glow
+        shrinking = True
+        if self.mode == MODE_TIMETRIAL:
+            base_r = max(TARGET_RADIUS*TT_MIN_RADIUS_FACTOR, TARGET_RADIUS * self.time_trial_size_factor())
+        elif self.scenario is not None and self.scenario.shrinks:
+            base_r = self.scenario.radius * self.curves['size_factor'](now)
+        else:
+            base_r = store.original_r[:n]
+            shrinking = False
+
+        # Apply pulsing glow effect if enabled (phase follows target age)
+        r = store.r[:n]
+        if self.glowing_spheres:
+            phase = store.glow_phase[:n]
+            np.subtract(now, born, out=phase)
+            np.multiply(phase, GLOW_RATE, out=phase)
+            np.add(store.glow_start[:n], phase, out=phase)
+            GLOW_TABLE.evaluate_into(phase, r, work, store.scratch_index[:n])
+            np.multiply(r, base_r, out=r)
+            resized = store.resized = True
+        elif shrinking or store.resized:
+            r[:] = base_r
+            resized, store.resized = True, shrinking
+        else:
+            resized = False                  # radii already equal original_r
+
+        # Keep the broad phase in step with moved/resized targets
+        if store.grid is not None and (self.animated_spheres or resized):
+            store.grid.refresh(store)
+        return store
+
+    def next_spawn_time(self):
+        """Session time the armed spawn fires, or inf while the arena is full"""
+        if self.spawn_mark is None:
+            return math.inf
+        return self.spawn_mark + (self.spawn_interval - self.spawn_accum)
+
+    def sync_spawn_clock(self):
+        """Pause the spawn timer while the arena is full and resume it once a slot frees up"""
+        full = len(self.targets) >= self.max_targets
+        if full and self.spawn_mark is not None:
+            self.spawn_accum += self.elapsed - self.spawn_mark
+            self.spawn_mark = None
+        elif not full and self.spawn_mark is None:
+            self.spawn_mark = self.elapsed
+
+    def run_events(self, horizon):
+        """
+        Apply expiries and spawns due up to session time horizon, in time order
+        Each event runs at its exact time, so the outcome doesn't depend on step size.
+        Expiries come off the store's queue, so ticks with no event due cost O(1)
+        whatever the number of live targets.
+        """
+        if self.timeline is not None:
+            return self.run_timeline(horizon)
+        store = self.targets
+        while True:
+            t_spawn = self.next_spawn_time()
+            t_expire = store.next_expiry()
+            if self.spawn_mark is None:
+                # Full: only the earliest expiry matters, it restarts the spawn timer
+                if t_expire > horizon:
+                    return
+                self.elapsed = t_expire
+                store.remove(store.pop_expiry())
+            else:
+                # Not full: expiries before the spawn can't change its time
+                limit = min(t_spawn, horizon)
+                if t_expire <= limit:
+                    store.remove_indices(store.pop_expired(limit))
+                if t_spawn > horizon:
+                    return
+                self.elapsed = t_spawn
+                self.spawn_target()
+                self.spawn_accum = 0.0
+                self.spawn_mark = t_spawn
+                self.spawn_interval = self.curves['spawn_interval'](t_spawn)
+            self.sync_spawn_clock()
+
+    def run_timeline(self, horizon):
+        """
+        run_events() for scenario sessions: pop compiled spawns due up to horizon
+        A spawn that comes due while the arena is full waits for the first free slot
+        (spawning then) or is dropped, as the scenario says; later ones keep their times.
+        """
+        store, timeline = self.targets, self.timeline
+        while True:
+            t_spawn = timeline.peek()
+            t_expire = store.next_expiry()
+            limit = min(t_spawn, horizon)
+            if t_expire <= limit:
+                # Expiries before the spawn can only free slots for it
+                store.remove_indices(store.pop_expired(limit))
+                continue
+            if t_spawn > horizon:
+                return
+            if store.count < self.max_targets:
+                self.elapsed = max(self.elapsed, t_spawn)     # a waiting spawn goes in as soon as it can
+                pos, r, ttl, direction, glow_phase = timeline.pop()
+                store.add(pos, r, self.elapsed, ttl, direction, glow_phase)
+                self.spawned_spheres_count += 1
+            elif timeline.when_full == 'skip':
+                timeline.pop()
+            else:
+                # Full: the spawn waits for the earliest expiry
+                if t_expire > horizon:
+                    return
+                self.elapsed = t_expire
+                store.remove(store.pop_expiry())
+
+    def select_broad_phase(self):
+        """Attach the uniform grid for dense target counts and drop it when they thin out"""
+        store = self.targets
+        if store.grid is None and store.count >= GRID_MIN_TARGETS:
+            store.attach_grid(TargetGrid())
+        elif store.grid is not None and store.count < GRID_RELEASE_TARGETS:
+            store.attach_grid(None)
+
+    # ---- camera ----
+
+    def view(self):
+        """The camera synced to the player's current yaw, pitch, FOV, aspect and position"""
+        return self.camera.sync(self.yaw, self.pitch, self.current_fov, self.aspect, self.player_pos)
+
+    # ---- simulation ----
+
+    def update(self):
+        """Advance the simulation by the time the injected clock reports since the last call"""
+        now = self.clock()
+        if self.last_clock is None:
+            self.last_clock = now
+        dt = now - self.last_clock
+        self.last_clock = now
+        self.step(dt)
+
+    def step(self, dt):
+        """Advance the simulation by dt seconds of session time"""
+        if self.state != 'running' or self.paused:
+            return
+
+        self.steps += 1
+        self.targets.snapshot()
+        end_time = self.elapsed + dt
+        profiler = self.profiler
+        t0 = time.perf_counter() if profiler else 0.0
+
+        # Expiries and spawns (difficulty follows the curves), up to the session's end
+        if self.banked:
+            self.run_events(min(end_time, self.elapsed + self.time_bank))
+        else:
+            self.run_events(min(end_time, self.duration))
+        self.elapsed = end_time
+        if profiler:
+            t1 = time.perf_counter()
+            profiler.record('spawning', t1 - t0)
+
+        # Banked clock (Time Trial) countdown
+        if self.banked:
+            self.time_bank -= dt
+            if self.time_bank <= 0.0:
+                self.time_bank = 0.0
+                self.end(reason="out_of_time")
+                return
+            if self.elapsed >= self.time_limit:
+                self.end(reason="time_limit")
+                return
+
+        # Update all active targets
+        self.update_targets()
+        if profiler:
+            profiler.record('update_targets', time.perf_counter() - t1)
+        self.select_broad_phase()
+
+        # Check for session end conditions
+        if not self.banked:
+            if self.elapsed >= self.duration:
+                self.end(reason="duration_reached")
+
+    def end(self, reason="time"):
+        """End the session and prepare summary"""
+        self.state = 'ended'
+        self.end_reason = reason
+
+        # Calculate final statistics
+        accuracy_pct = (0 if self.shots == 0 else int(100 * self.hits / max(1, self.shots)))
+        headshot_acc = (0 if self.shots == 0 else int(100 * self.headshot_hits / self.shots))
+
+        # Determine actual run time based on mode
+        if not self.banked:
+            run_time = min(self.elapsed, self.duration)  # Cap at session time
+        else:  # Time Trial shows survival time
+            run_time = self.elapsed
+
+        self.summary = {
+            'mode': self.mode_name,
+            'score': self.score,
+            'misses': self.misses,
+            'shots': self.shots,
+            'hits': self.hits,
+            'accuracy': accuracy_pct,
+            'time': run_time,
+            'spawned_spheres': self.spawned_spheres_count,
+            'reason': reason,
+            'headshot_hits': self.headshot_hits,
+            'headshot_accuracy': headshot_acc,
+            'aim': self.aim_stats.summary(),     # time_to_hit / flick_angle / time_to_kill quantiles
+        }
+        return self.summary
+
+    # ---- player input ----
+
+    def log_input(self, action, *args):
+        """Append an input to input_log (when recording), keyed by the current step count"""
+        if self.input_log is not None:
+            self.input_log.append([self.steps, action, list(args)])
+
+    def apply_input(self, action, args):
+        """Replay one logged input"""
+        getattr(self, action)(*args)
+
+    def fire(self, origin=None, direction=None):
+        """
+        Shoot a ray (defaults to the player's eye and look direction)
+        Returns 'head', 'body' or None for a miss
+        """
+        if origin is None and direction is None:
+            self.log_input('fire')
+        else:
+            self.log_input('fire', None if origin is None else [float(v) for v in origin],
+                           None if direction is None else [float(v) for v in direction])
+        if self.state != 'running' or self.paused:
+            return None
+
+        self.shots += 1
+        ro = list(self.player_pos) if origin is None else origin
+        rd = self.view().forward if direction is None else direction
+
+        # Check for target hits (body and Precision headshot spheres)
+        store = self.targets
+        n = store.count
+        precision = self.head_zone
+        if store.grid is not None:
+            best_idx, best_zone, _ = store.grid.query(ro, rd, store, precision)
+        elif n < BATCH_HIT_MIN_TARGETS:
+            best_idx, best_zone, _ = resolve_shot_scalar(ro, rd, store.pos[:n].tolist(), store.r[:n].tolist(), precision)
+        else:
+            index, zone, _ = resolve_shots(ro, rd, store.pos[:n], store.r[:n], precision)
+            best_idx, best_zone = int(index[0]), int(zone[0])
+
+        # Telemetry: reaction/flick distributions and the optional per-shot log
+        age = self.elapsed - float(store.born[best_idx]) if best_idx >= 0 else None
+        self.aim_stats.shot(self.elapsed, rd, age)
+        if self.shot_log is not None:
+            self.shot_log.record(self.elapsed, self.yaw, self.pitch, best_zone,
+                                 int(store.ids[best_idx]) if age is not None else -1,
+                                 math.nan if age is None else age,
+                                 nearest_angle(ro, rd, store.pos[:n]))
+
+        # Process hit or miss
+        if best_idx < 0:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.score += self.points[best_zone]
+        if best_zone == ZONE_HEAD:
+            self.headshot_hits += 1
+        # Banked clock (Time Trial): add bonus time for hits
+        if self.banked:
+            self.time_bank += self.hit_bonus
+
+        store.remove(best_idx)
+        self.sync_spawn_clock()
+        return ZONE_NAMES[best_zone]
+
+    def look(self, dyaw, dpitch):
+        """Rotate the camera by yaw/pitch deltas in degrees"""
+        self.log_input('look', dyaw, dpitch)
+        if self.state != 'running' or self.paused:
+            return
+        self.yaw += dyaw
+        self.pitch = clamp(self.pitch + dpitch, -PITCH_LIMIT, PITCH_LIMIT)
+
+    def strafe(self, dx):
+        """Move the player sideways, staying inside the arena"""
+        self.log_input('strafe', dx)
+        if self.state != 'running' or self.paused:
+            return
+        self.player_pos[0] = clamp(self.player_pos[0] + dx, -ARENA_HALF + 50, ARENA_HALF - 50)
+
+    def zoom(self, dfov):
+        """Change the field of view within FOV_MIN..FOV_MAX"""
+        self.log_input('zoom', dfov)
+        if self.state != 'running' or self.paused:
+            return
+        self.current_fov = clamp(self.current_fov + dfov, FOV_MIN, FOV_MAX)
+
+    def toggle_pause(self):
+        """Pause or resume; session time does not advance while paused"""
+        self.log_input('toggle_pause')
+        self.paused = not self.paused
+        self.last_clock = None               # update() restarts timing from the next reading
+
+    def toggle_animated(self):
+        """Toggle left/right oscillation of targets"""
+        self.log_input('toggle_animated')
+        self.animated_spheres = not self.animated_spheres
+
+    def toggle_glowing(self):
+        """Toggle pulsing size/brightness of targets"""
+        self.log_input('toggle_glowing')
+        self.glowing_spheres = not self.glowing_spheres
@@ -0,0 +1,461 @@
+"""
+Runtime metrics for Enhanced Aim Lab 3D
+
+FrameProfiler keeps the most recent timing samples of each frame phase in
+fixed-size ring buffers, summarizes them for the in-game overlay and exports
+them to CSV/JSON for comparing machines. ShotLog streams one record per shot
+to an append-only binary file from a background writer thread. AimStats keeps
+reaction and flick distributions in constant-size quantile sketches.
+SessionHistory persists finished sessions to a local SQLite database from a
+background thread and answers personal best / trend queries from its indexes.
+"""
+import concurrent.futures, csv, json, math, os, queue, sqlite3, threading, time
+
+import numpy as np
+
+# =============================
+# METRICS CONSTANTS
+# =============================
+
+PROFILE_SAMPLES = 1024             # samples kept per phase
+PROFILE_DIR = "profiles"           # export directory (relative to the working directory)
+SHOT_LOG_DIR = "telemetry"         # per-shot log directory
+SHOT_BATCH = 256                   # shot records per write batch
+SHOT_BUFFERS = 4                   # batches in memory at most (filling + queued for the writer)
+SKETCH_ERROR = 0.01                # relative error of quantile sketch estimates
+SUMMARY_QUANTILES = {'median': 0.5, 'p90': 0.9, 'p99': 0.99}
+HISTORY_PATH = "history.sqlite3"   # session history database
+HISTORY_TREND = 10                 # sessions per trend window (recent vs the ones before)
+
+# Phases in overlay/export order: simulation, then rendering
+SIM_PHASES = ['update_targets', 'spawning']
+RENDER_PHASES = ['setupCamera', 'draw_floor', 'draw_walls', 'draw_targets', 'draw_hud']
+
+# =============================
+# RING BUFFER
+# =============================
+
+class RingBuffer:
+    """Fixed-size float buffer that overwrites its oldest sample once full"""
+
+    def __init__(self, capacity=PROFILE_SAMPLES):
+        self.data = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0                   # samples held (<= capacity)
+        self.head = 0                    # next slot to write
+
+    def push(self, value):
+        """Append a sample"""
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self):
+        """Held samples, oldest first"""
+        if self.count < self.capacity:
+            return self.data[:self.count].copy()
+        return np.roll(self.data, -self.head)
+
+    def clear(self):
+        """Drop all samples"""
+        self.count = 0
+        self.head = 0
+
+# =============================
+# FRAME PROFILER
+# =============================
+
+class FrameProfiler:
+    """
+    Per-phase frame timing
+    Callers time a phase themselves and hand the duration to record(); frame() marks
+    the start of each rendered frame and is the basis for FPS and 1% lows.
+    """
+
+    def __init__(self, phases=SIM_PHASES + RENDER_PHASES, capacity=PROFILE_SAMPLES, clock=time.perf_counter):
+        self.clock = clock
+        self.capacity = capacity
+        self.phases = {name: RingBuffer(capacity) for name in phases}
+        self.frame_times = RingBuffer(capacity)      # seconds between frame() calls
+        self.last_frame = None
+
+    def record(self, phase, seconds):
+        """Add one duration sample to a phase (unknown phases get a buffer on first use)"""
+        ring = self.phases.get(phase)
+        if ring is None:
+            ring = self.phases[phase] = RingBuffer(self.capacity)
+        ring.push(seconds)
+
+    def frame(self):
+        """Mark the start of a rendered frame"""
+        now = self.clock()
+        if self.last_frame is not None:
+            self.frame_times.push(now - self.last_frame)
+        self.last_frame = now
+
+    def reset(self):
+        """Drop all samples (e.g. at the start of a run)"""
+        for ring in self.phases.values():
+            ring.clear()
+        self.frame_times.clear()
+        self.last_frame = None
+
+    def phase_stats(self):
+        """{phase: {'samples', 'avg_ms', 'p99_ms', 'max_ms'}} for phases with samples"""
+        stats = {}
+        for name, ring in self.phases.items():
+            if ring.count == 0:
+                continue
+            ms = ring.data[:ring.count] * 1000.0
+            stats[name] = {
+                'samples': ring.count,
+                'avg_ms': float(ms.mean()),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+        return stats
+
+    def frame_stats(self):
+        """Average FPS and 1% low FPS (mean rate over the slowest 1% of frames)"""
+        ring = self.frame_times
+        if ring.count == 0:
+            return {'frames': 0, 'fps': 0.0, 'low_1pct_fps': 0.0}
+        dt = np.sort(ring.data[:ring.count])
+        worst = dt[-max(1, ring.count // 100):]
+        return {
+            'frames': ring.count,
+            'fps': float(1.0 / max(dt.mean(), 1e-9)),
+            'low_1pct_fps': float(1.0 / max(worst.mean(), 1e-9)),
+        }
+
+    def export(self, directory=PROFILE_DIR, tag="run", metadata=None):
+        """
+        Write the current samples as <tag>_<timestamp>.csv (per-phase summary)
+        and .json (summary, metadata and raw samples); returns the two paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{tag}_{time.strftime('%Y%m%d_%H%M%S')}")
+        phases, frames = self.phase_stats(), self.frame_stats()
+
+        with open(base + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(['phase', 'samples', 'avg_ms', 'p99_ms', 'max_ms'])
+            for name, st in phases.items():
+                writer.writerow([name, st['samples'], f"{st['avg_ms']:.4f}", f"{st['p99_ms']:.4f}", f"{st['max_ms']:.4f}"])
+            writer.writerow([])
+            writer.writerow(['frames', 'fps', 'low_1pct_fps'])
+            writer.writerow([frames['frames'], f"{frames['fps']:.2f}", f"{frames['low_1pct_fps']:.2f}"])
+
+        report = {
+            'metadata': metadata or {},
+            'frames': frames,
+            'phases': phases,
+            'samples_ms': {name: (ring.values() * 1000.0).tolist() for name, ring in self.phases.items()},
+            'frame_times_ms': (self.frame_times.values() * 1000.0).tolist(),
+        }
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=2)
+        return base + ".csv", base + ".json"
+
+# =============================
+# SHOT TELEMETRY
+# =============================
+
+SHOT_MAGIC = b"AIMSHOT1"           # file header: magic, then the record size as uint32
+
+# One record per shot; zone is 0 miss, 1 body, 2 head (aim_lab_core ZONE_*)
+SHOT_DTYPE = np.dtype([
+    ('t', '<f8'),                  # session time of the shot (seconds)
+    ('yaw', '<f4'),                # camera yaw (degrees)
+    ('pitch', '<f4'),              # camera pitch (degrees)
+    ('zone', 'u1'),                # hit zone, 0 for a miss
+    ('target_id', '<i8'),          # id of the target hit, -1 on a miss
+    ('target_age', '<f4'),         # seconds since the hit target spawned, NaN on a miss
+    ('angular_error', '<f4'),      # degrees between the shot and the nearest target's center, NaN if none
+])
+
+class ShotLog:
+    """
+    Per-shot telemetry streamed to an append-only binary file
+    record() fills a fixed-size batch in place; full batches go to a writer thread
+    and the next batch comes from a fixed pool, so memory stays bounded however long
+    the session runs. If the writer falls so far behind that no batch is free, the
+    filling batch is dropped (counted in dropped) rather than stalling the frame.
+    """
+
+    def __init__(self, path, batch=SHOT_BATCH, buffers=SHOT_BUFFERS):
+        self.path = path
+        self.count = 0                   # records in the filling batch
+        self.recorded = 0                # shots recorded in total
+        self.dropped = 0                 # shots lost because the writer fell behind
+        self.free = queue.Queue()
+        for _ in range(buffers - 1):
+            self.free.put(np.zeros(batch, SHOT_DTYPE))
+        self.batch = np.zeros(batch, SHOT_DTYPE)
+        self.pending = queue.Queue()     # (batch, count) for the writer; None stops it
+        self.writer = threading.Thread(target=self.write_loop, name="shot-log", daemon=True)
+        self.writer.start()
+
+    def record(self, t, yaw, pitch, zone, target_id, target_age, angular_error):
+        """Append one shot (never blocks)"""
+        self.batch[self.count] = (t, yaw, pitch, zone, target_id, target_age, angular_error)
+        self.count += 1
+        self.recorded += 1
+        if self.count == len(self.batch):
+            self.flush()
+
+    def flush(self):
+        """Hand the filling batch to the writer and start a fresh one (drops it if none is free)"""
+        if self.count == 0:
+            return
+        try:
+            spare = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += self.count
+            self.count = 0
+            return
+        self.pending.put((self.batch, self.count))
+        self.batch, self.count = spare, 0
+
+    def close(self, wait=True):
+        """Queue every recorded shot and stop the writer thread once it is written (joined when wait)"""
+        if self.writer is None:
+            return
+        self.flush()
+        self.pending.put(None)
+        if wait:
+            self.writer.join()
+        self.writer = None
+
+    def write_loop(self):
+        """Writer thread: append queued batches to the file and return them to the pool"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "ab") as f:
+            if new_file:
+                f.write(SHOT_MAGIC + np.uint32(SHOT_DTYPE.itemsize).tobytes())
+            while True:
+                item = self.pending.get()
+                if item is None:
+                    return
+                batch, count = item
+                f.write(batch[:count].tobytes())
+                f.flush()
+                self.free.put(batch)
+
+def shot_log_path(tag, seed, directory=SHOT_LOG_DIR):
+    """<directory>/<tag>_<timestamp>_<seed>.shots (the seed keeps runs started in the same second apart)"""
+    return os.path.join(directory, f"{tag}_{time.strftime('%Y%m%d_%H%M%S')}_{seed}.shots")
+
+def read_shot_log(path):
+    """Records of a file written by ShotLog, as a SHOT_DTYPE array"""
+    with open(path, "rb") as f:
+        header = f.read(len(SHOT_MAGIC) + 4)
+        if header[:len(SHOT_MAGIC)] != SHOT_MAGIC:
+            raise ValueError(f"{path}: not a shot log")
+        if int(np.frombuffer(header[len(SHOT_MAGIC):], '<u4')[0]) != SHOT_DTYPE.itemsize:
+            raise ValueError(f"{path}: unsupported shot record size")
+        return np.fromfile(f, SHOT_DTYPE)
+
+# =============================
+# AIM STATISTICS
+# =============================
+
+class QuantileSketch:
+    """
+    Streaming quantiles with bounded relative error in constant memory
+    Values are counted in logarithmic buckets (each spans a factor of gamma), so any
+    quantile is estimated within rel_error of the true value; values are clamped to
+    [lo, hi], which fixes the number of buckets up front. add() is O(1).
+    """
+
+    def __init__(self, lo, hi, rel_error=SKETCH_ERROR):
+        self.gamma = (1.0 + rel_error) / (1.0 - rel_error)
+        self.log_gamma = math.log(self.gamma)
+        self.lo, self.hi = lo, hi
+        self.offset = self.bucket(lo)
+        self.counts = np.zeros(self.bucket(hi) - self.offset + 1, np.int64)
+        self.count = 0
+
+    def bucket(self, value):
+        """Bucket index covering (gamma^(k-1), gamma^k]"""
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value):
+        """Count one sample"""
+        value = min(max(value, self.lo), self.hi)
+        self.counts[self.bucket(value) - self.offset] += 1
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimated q-quantile (0..1) of the samples, or None before the first sample"""
+        if self.count == 0:
+            return None
+        k = int(np.searchsorted(np.cumsum(self.counts), q * (self.count - 1), side='right'))
+        return 2.0 * self.gamma ** (k + self.offset) / (self.gamma + 1.0)
+
+    def summary(self):
+        """{'count', 'median', 'p90', 'p99'} (quantiles None without samples)"""
+        stats = {name: self.quantile(q) for name, q in SUMMARY_QUANTILES.items()}
+        stats['count'] = self.count
+        return stats
+
+class AimStats:
+    """
+    Per-session aim distributions, updated on every hit
+    time_to_hit: seconds from a target's spawn to the shot that removes it
+    flick_angle: degrees the view turned between the previous shot and the hit
+    time_to_kill: seconds since the previous hit (or the start of the session)
+    """
+
+    def __init__(self):
+        self.time_to_hit = QuantileSketch(1e-3, 60.0)
+        self.flick_angle = QuantileSketch(1e-2, 180.0)
+        self.time_to_kill = QuantileSketch(1e-3, 600.0)
+        self.last_direction = None           # unit direction of the previous shot
+        self.last_kill = 0.0                 # session time of the previous hit
+
+    def shot(self, t, direction, target_age=None):
+        """Account for a shot at session time t along unit direction; target_age is None on a miss"""
+        last, self.last_direction = self.last_direction, direction
+        if target_age is None:
+            return
+        self.time_to_hit.add(target_age)
+        self.time_to_kill.add(t - self.last_kill)
+        self.last_kill = t
+        if last is not None:
+            cos = last[0]*direction[0] + last[1]*direction[1] + last[2]*direction[2]
+            self.flick_angle.add(math.degrees(math.acos(max(-1.0, min(1.0, cos)))))
+
+    def summary(self):
+        """{metric: {'count', 'median', 'p90', 'p99'}} for the session summary"""
+        return {name: getattr(self, name).summary() for name in ('time_to_hit', 'flick_angle', 'time_to_kill')}
+
+# =============================
+# SESSION HISTORY
+# =============================
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    duration REAL NOT NULL,          -- selected session length (seconds)
+    played_at REAL NOT NULL,         -- unix time the session ended
+    score INTEGER NOT NULL,
+    shots INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    accuracy INTEGER NOT NULL,       -- percent
+    run_time REAL NOT NULL,          -- seconds played (survival time in Time Trial)
+    headshot_hits INTEGER NOT NULL,
+    reason TEXT,
+    seed INTEGER,
+    time_to_hit_median REAL,         -- seconds, NULL without hits
+    flick_angle_median REAL          -- degrees, NULL without hits
+);
+CREATE INDEX IF NOT EXISTS sessions_by_date ON sessions (player, mode, duration, played_at);
+CREATE INDEX IF NOT EXISTS sessions_by_score ON sessions (player, mode, duration, score);
+"""
+
+HISTORY_COLUMNS = ('player', 'mode', 'duration', 'played_at', 'score', 'shots', 'hits', 'accuracy',
+                   'run_time', 'headshot_hits', 'reason', 'seed', 'time_to_hit_median', 'flick_angle_median')
+
+def history_row(player, duration, summary, seed=None, played_at=None):
+    """Column values of one sessions row from a GameSession summary"""
+    aim = summary.get('aim') or {}
+    return {
+        'player': player,
+        'mode': summary['mode'],
+        'duration': float(duration),
+        'played_at': time.time() if played_at is None else played_at,
+        'score': summary['score'],
+        'shots': summary['shots'],
+        'hits': summary['hits'],
+        'accuracy': summary['accuracy'],
+        'run_time': summary['time'],
+        'headshot_hits': summary['headshot_hits'],
+        'reason': summary.get('reason'),
+        'seed': seed,
+        'time_to_hit_median': aim.get('time_to_hit', {}).get('median'),
+        'flick_angle_median': aim.get('flick_angle', {}).get('median'),
+    }
+
+class SessionHistory:
+    """
+    Local database of finished sessions
+    All database work runs on one background thread that owns the connection; record()
+    and standing() return futures, so the caller polls done() instead of waiting on disk.
+    Lookups are keyed by (player, mode, duration) and served from the two indexes, so
+    their cost grows with log(rows) rather than with the size of the history.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.conn = None                 # opened on the worker thread
+        self.executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="history")
+
+    def connect(self):
+        """Worker thread: open the database and create the schema on first use"""
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(HISTORY_SCHEMA)
+        return self.conn
+
+    def record(self, row):
+        """Insert a history_row(); the future resolves to the key's standing including it"""
+        return self.executor.submit(self.insert, row)
+
+    def standing(self, player, mode, duration):
+        """Future resolving to query_standing() for a player's mode and duration"""
+        return self.executor.submit(self.query_standing, player, mode, float(duration))
+
+    def close(self, wait=True):
+        """Finish queued work and close the database (joined when wait)"""
+        self.executor.submit(self.disconnect)
+        self.executor.shutdown(wait)
+
+    def insert(self, row):
+        """Worker thread: insert a row and return query_standing() plus the best before it"""
+        key = (row['player'], row['mode'], row['duration'])
+        previous_best = self.query_standing(*key, window=0)['best']
+        conn = self.connect()
+        with conn:
+            conn.execute(f"INSERT INTO sessions ({', '.join(HISTORY_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})",
+                         [row[c] for c in HISTORY_COLUMNS])
+        standing = self.query_standing(*key)
+        standing['previous_best'] = previous_best
+        return standing
+
+    def query_standing(self, player, mode, duration, window=HISTORY_TREND):
+        """
+        Worker thread: {'best', 'recent', 'previous'} for one key
+        best is the top score (None without sessions); recent and previous are the mean
+        scores of the latest window sessions and of the window before them (None if empty).
+        Both queries are index range scans that stop after a fixed number of rows.
+        """
+        conn = self.connect()
+        key = (player, mode, duration)
+        best = conn.execute(
+            "SELECT score FROM sessions INDEXED BY sessions_by_score "
+            "WHERE player = ? AND mode = ? AND duration = ? ORDER BY score DESC LIMIT 1", key).fetchone()
+        scores = [score for score, in conn.execute(
+            "SELECT score FROM sessions INDEXED BY sessions_by_date "
+            "WHERE player = ? AND mode = ? AND duration = ? ORDER BY played_at DESC LIMIT ?",
+            key + (2 * window,))]
+        recent, previous = scores[:window], scores[window:]
+        return {
+            'best': best[0] if best else None,
+            'recent': sum(recent) / len(recent) if recent else None,
+            'previous': sum(previous) / len(previous) if previous else None,
+        }
+
+    def disconnect(self):
+        """Worker thread: close the connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
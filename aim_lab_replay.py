@@ -0,0 +1,150 @@
+"""
+Session recording and headless replay for Enhanced Aim Lab 3D
+
+A recording holds everything needed to rebuild a run exactly: mode (or the
+scenario spec), duration, seed, the fixed tick length and the input log (each input keyed by the
+simulation step it arrived before). Replaying steps a fresh GameSession
+through the same ticks and inputs as fast as the CPU allows:
+    python aim_lab_replay.py replays/run.json            # re-score with current rules
+    python aim_lab_replay.py replays/run.json --verify   # fail unless the recorded summary matches
+"""
+import argparse, concurrent.futures, json, os, sys, time
+
+from aim_lab_core import *
+from aim_lab_scenarios import Scenario
+
+# =============================
+# RECORDING
+# =============================
+
+REPLAY_VERSION = 1
+REPLAY_DIR = "replays"             # default directory for saved recordings
+
+def start_recording(session):
+    """Begin logging the session's inputs (call before its first step)"""
+    session.input_log = []
+
+def make_recording(session, tick):
+    """Recording dict for a session stepped with fixed ticks of the given length"""
+    return {
+        'version': REPLAY_VERSION,
+        'mode': session.mode,
+        'scenario': None if session.scenario is None else session.scenario.spec,
+        'duration': session.duration,
+        'max_targets': session.max_targets,
+        'seed': session.seed,
+        'tick': tick,
+        'steps': session.steps,
+        'inputs': session.input_log or [],
+        'summary': session.summary,
+    }
+
+def recording_path(session, directory=REPLAY_DIR):
+    """File name for a session's recording: mode, wall-clock stamp and seed"""
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    return os.path.join(directory, f"{session.mode_name.replace(' ', '')}_{stamp}_{session.seed}.json")
+
+def write_recording(recording, path):
+    """Write a make_recording() dict as JSON; returns the path"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(recording, f)
+    return path
+
+def save_recording(session, tick, directory=REPLAY_DIR):
+    """Write the session's recording as JSON; returns the path"""
+    return write_recording(make_recording(session, tick), recording_path(session, directory))
+
+class ReplayWriter:
+    """
+    Saves recordings on one background thread so a finished run never waits on disk
+    save() snapshots the recording on the caller's thread and returns a future that
+    resolves to the written path (or raises the OSError).
+    """
+
+    def __init__(self, directory=REPLAY_DIR):
+        self.directory = directory
+        self.executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="replay")
+
+    def save(self, session, tick):
+        """Queue the session's recording for writing; returns a future of its path"""
+        recording = make_recording(session, tick)
+        recording['inputs'] = list(recording['inputs'])
+        recording['summary'] = dict(recording['summary'])
+        return self.executor.submit(write_recording, recording, recording_path(session, self.directory))
+
+    def close(self, wait=True):
+        """Finish queued recordings and stop the thread (joined when wait)"""
+        self.executor.shutdown(wait)
+
+def load_recording(path):
+    """Read a recording written by save_recording()"""
+    with open(path) as f:
+        recording = json.load(f)
+    if recording.get('version') != REPLAY_VERSION:
+        raise ValueError(f"{path}: unsupported replay version {recording.get('version')}")
+    return recording
+
+# =============================
+# REPLAY
+# =============================
+
+def replay(recording):
+    """
+    Rebuild a recorded run headless and return the finished session
+    Inputs are applied before the step they were logged at; the replay stops when
+    the session ends or the recording runs out (quit, restart or pause at the end).
+    """
+    spec = recording.get('scenario')
+    session = GameSession(recording['mode'], recording['duration'], clock=lambda: 0.0,
+                          max_targets=recording['max_targets'], seed=recording['seed'],
+                          scenario=None if spec is None else Scenario(spec))
+    tick, total = recording['tick'], recording['steps']
+    inputs = recording['inputs']
+    i = 0
+    while session.state == 'running':
+        while i < len(inputs) and inputs[i][0] == session.steps:
+            _, action, args = inputs[i]
+            session.apply_input(action, args)
+            i += 1
+        if session.paused or session.steps >= total:
+            break
+        session.step(tick)
+    if session.state == 'running':
+        session.end(recording['summary'].get('reason') or "replay_end")
+    return session
+
+def verify(recording, session):
+    """List of (key, recorded, replayed) for summary fields that differ"""
+    recorded = recording['summary']
+    return [(k, v, session.summary.get(k)) for k, v in recorded.items() if session.summary.get(k) != v]
+
+# =============================
+# ENTRY POINT
+# =============================
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Enhanced Aim Lab 3D sessions headless")
+    parser.add_argument('recordings', nargs='+', help="recording JSON files")
+    parser.add_argument('--verify', action='store_true', help="exit non-zero if a replay differs from its recorded summary")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.recordings:
+        recording = load_recording(path)
+        t0 = time.perf_counter()
+        session = replay(recording)
+        wall = time.perf_counter() - t0
+        speedup = session.elapsed / wall if wall > 0 else float('inf')
+        s = session.summary
+        print(f"{path}: {s['mode']} score {s['score']} hits {s['hits']}/{s['shots']} "
+              f"time {s['time']:.1f}s ({speedup:.0f}x real time)")
+        if args.verify:
+            diffs = verify(recording, session)
+            for key, want, got in diffs:
+                print(f"  {key}: recorded {want!r}, replayed {got!r}")
+            failed += bool(diffs)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Declarative scenarios (drills) for Enhanced Aim Lab 3D
+
+A scenario file (JSON, or TOML where tomllib is available) describes a drill:
+target size and lifetime curves, the spawn-rate curve, motion, scoring zones and
+the clock rule. load_scenario() validates it once; each GameSession built with it
+compiles the seeded spawn timeline up front and pops due events during play:
+    {
+      "name": "Micro Flick",
+      "duration": 30,
+      "max_targets": 3,
+      "targets": {"radius": 14, "ttl": {"start": [1.6, 2.0], "end": [0.8, 1.1]}},
+      "spawn": {"interval": {"start": 0.9, "end": 0.35, "exponent": 0.5}},
+      "scoring": {"body": 1}
+    }
+
+Curves are a constant or {"start", "end", "exponent" (default 1), "over" (seconds,
+default the duration)}: start + (end - start) * min(t / over, 1) ** exponent.
+"""
+import json, math, os, random
+
+try:
+    import tomllib
+except ImportError:                  # Python < 3.11: JSON scenarios only
+    tomllib = None
+
+from aim_lab_core import *
+
+# =============================
+# SCENARIO CONSTANTS
+# =============================
+
+SCENARIO_DIR = "scenarios"         # drills listed by the front-end menu
+SCENARIO_TIME_LIMIT = 600.0        # default cap on banked-clock sessions (seconds)
+SCENARIO_MAX_TIME = 1200.0         # longest duration, clock limit, lifetime or curve span (seconds)
+SCENARIO_MIN_INTERVAL = 0.02       # shortest spawn interval (bounds the compiled timeline)
+SCENARIO_MAX_TARGETS = 4096        # most live targets (the store preallocates this many rows)
+SCENARIO_MAX_FACTOR = 10.0         # largest size factor or curve exponent
+SCENARIO_MAX_POINTS = 1000         # most points per hit zone
+CLOCK_RULES = ('countdown', 'bank')
+WHEN_FULL = ('wait', 'skip')       # due spawn with a full arena: wait for a free slot, or drop it
+
+# Top-level and section keys, to reject typos
+SCENARIO_KEYS = {'name', 'duration', 'max_targets', 'targets', 'spawn', 'motion', 'scoring', 'time'}
+SECTION_KEYS = {
+    'targets': {'radius', 'size', 'ttl', 'area'},
+    'spawn': {'interval', 'when_full'},
+    'motion': {'animated', 'glowing'},
+    'scoring': {'body', 'head'},
+    'time': {'clock', 'hit_bonus', 'limit'},
+}
+CURVE_KEYS = {'start', 'end', 'exponent', 'over'}
+
+# =============================
+# VALIDATION
+# =============================
+
+def number(value, field, low=0.0, inclusive=False, high=math.inf):
+    """
+    A finite float above low (or at least low when inclusive) and at most high
+    ValueError naming the field otherwise.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not -math.inf < value < math.inf \
+            or value < low or (value == low and not inclusive) or value > high:
+        bounds = [] if low == -math.inf else [f" {'>=' if inclusive else '>'} {low:g}"]
+        bounds += [] if high == math.inf else [f" <= {high:g}"]
+        raise ValueError(f"{field}: expected a finite number{' and'.join(bounds)}, got {value!r}")
+    return float(value)
+
+def value_range(value, field, low=0.0, high=math.inf):
+    """A [min, max] pair of numbers above low and at most high"""
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"{field}: expected [min, max], got {value!r}")
+    lo, hi = number(value[0], f"{field}[0]", low, high=high), number(value[1], f"{field}[1]", low, high=high)
+    if lo > hi:
+        raise ValueError(f"{field}: min {lo} is above max {hi}")
+    return lo, hi
+
+def section(spec, key, required=False):
+    """A sub-table of the scenario, checked for unknown keys"""
+    if key not in spec:
+        if required:
+            raise ValueError(f"{key}: missing")
+        return {}
+    table = spec[key]
+    if not isinstance(table, dict):
+        raise ValueError(f"{key}: expected a table, got {table!r}")
+    unknown = set(table) - SECTION_KEYS[key]
+    if unknown:
+        raise ValueError(f"{key}: unknown keys {', '.join(sorted(unknown))}")
+    return table
+
+def curve(value, field, duration, parse):
+    """
+    Validated curve as a function of session time
+    parse validates one endpoint value (a number or a range); the result returns the
+    same shape, interpolated along the curve.
+    """
+    if not isinstance(value, dict):
+        constant = parse(value, field)
+        return lambda t: constant
+    unknown = set(value) - CURVE_KEYS
+    if unknown or 'start' not in value or 'end' not in value:
+        raise ValueError(f"{field}: expected a value or {{start, end[, exponent, over]}}")
+    start, end = parse(value['start'], f"{field}.start"), parse(value['end'], f"{field}.end")
+    exponent = number(value.get('exponent', 1.0), f"{field}.exponent", high=SCENARIO_MAX_FACTOR)
+    over = number(value.get('over', duration), f"{field}.over", high=SCENARIO_MAX_TIME)
+
+    def at(t):
+        d = clamp(t / over, 0.0, 1.0) ** exponent
+        if isinstance(start, tuple):
+            return tuple(a * (1.0 - d) + b * d for a, b in zip(start, end))
+        return start * (1.0 - d) + end * d
+    at.settles = over                # time after which the curve is flat
+    return at
+
+# =============================
+# SCENARIO
+# =============================
+
+class Scenario:
+    """
+    A validated drill: the rules a GameSession reads and a timeline compiler
+    spec is the parsed file; it is stored in replays so the drill can be rebuilt.
+    Raises ValueError (naming the offending field) for malformed specs.
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("expected a table of scenario settings")
+        unknown = set(spec) - SCENARIO_KEYS
+        if unknown:
+            raise ValueError(f"unknown keys {', '.join(sorted(unknown))}")
+        self.spec = spec
+        if not isinstance(spec.get('name'), str) or not spec['name'].strip():
+            raise ValueError("name: expected a non-empty string")
+        self.name = spec['name'].strip()
+        self.duration = number(spec.get('duration'), 'duration', high=SCENARIO_MAX_TIME)
+        self.max_targets = spec.get('max_targets', MAX_TARGETS)
+        if isinstance(self.max_targets, bool) or not isinstance(self.max_targets, int) \
+                or not 1 <= self.max_targets <= SCENARIO_MAX_TARGETS:
+            raise ValueError(f"max_targets: expected an integer from 1 to {SCENARIO_MAX_TARGETS}, "
+                             f"got {self.max_targets!r}")
+
+        # Targets: radius, size factor over time (applied live), lifetime, spawn area
+        targets = section(spec, 'targets', required=True)
+        self.radius = number(targets.get('radius', TARGET_RADIUS), 'targets.radius')
+        self.size = curve(targets.get('size', 1.0), 'targets.size', self.duration,
+                          lambda v, f: number(v, f, high=SCENARIO_MAX_FACTOR))
+        self.shrinks = isinstance(targets.get('size', 1.0), dict)
+        if 'ttl' not in targets:
+            raise ValueError("targets.ttl: missing")
+        self.ttl = curve(targets['ttl'], 'targets.ttl', self.duration,
+                         lambda v, f: value_range(v, f, high=SCENARIO_MAX_TIME) if isinstance(v, (list, tuple))
+                         else (number(v, f, high=SCENARIO_MAX_TIME),) * 2)
+        area = targets.get('area', {})
+        if not isinstance(area, dict) or set(area) - {'x', 'y', 'z'}:
+            raise ValueError("targets.area: expected a table with x, y and/or z ranges")
+        self.area = [value_range(area[k], f"targets.area.{k}", *ARENA_BOUNDS[i]) if k in area else None
+                     for i, k in enumerate('xyz')]
+        self.check_arena(area)
+
+        # Spawning
+        spawn = section(spec, 'spawn', required=True)
+        if 'interval' not in spawn:
+            raise ValueError("spawn.interval: missing")
+        self.interval = curve(spawn['interval'], 'spawn.interval', self.duration,
+                              lambda v, f: number(v, f, SCENARIO_MIN_INTERVAL, inclusive=True, high=SCENARIO_MAX_TIME))
+        self.when_full = spawn.get('when_full', 'wait')
+        if self.when_full not in WHEN_FULL:
+            raise ValueError(f"spawn.when_full: expected one of {', '.join(WHEN_FULL)}")
+
+        # Motion and scoring
+        motion = section(spec, 'motion')
+        self.animated = motion.get('animated', False)
+        self.glowing = motion.get('glowing', False)
+        if not isinstance(self.animated, bool) or not isinstance(self.glowing, bool):
+            raise ValueError("motion: animated and glowing must be true or false")
+        scoring = section(spec, 'scoring')
+        self.points = {ZONE_BODY: int(number(scoring.get('body', 1), 'scoring.body', inclusive=True,
+                                                 high=SCENARIO_MAX_POINTS))}
+        self.head_zone = scoring.get('head') is not None
+        if self.head_zone:
+            self.points[ZONE_HEAD] = int(number(scoring['head'], 'scoring.head', inclusive=True,
+                                                high=SCENARIO_MAX_POINTS))
+
+        # Clock: a countdown over duration, or a bank starting at duration topped up per hit
+        clock = section(spec, 'time')
+        rule = clock.get('clock', 'countdown')
+        if rule not in CLOCK_RULES:
+            raise ValueError(f"time.clock: expected one of {', '.join(CLOCK_RULES)}")
+        self.banked = rule == 'bank'
+        self.hit_bonus = number(clock.get('hit_bonus', 0.0), 'time.hit_bonus', inclusive=True, high=SCENARIO_MAX_TIME)
+        self.time_limit = number(clock.get('limit', SCENARIO_TIME_LIMIT), 'time.limit', high=SCENARIO_MAX_TIME) \
+            if self.banked else math.inf
+        self.curves = {
+            'spawn_interval': CurveTable(self.interval, getattr(self.interval, 'settles', 0.0)),
+            'size_factor': CurveTable(self.size, getattr(self.size, 'settles', 0.0)),
+        }
+
+    def check_arena(self, area):
+        """
+        Reject targets that can leave the arena box: the broad-phase grid clips rays to it,
+        so dense drills could not hit them. Allows for the largest size and glow, the
+        headshot sphere on top and the animation sweep (motion can be toggled in play).
+        """
+        reach = self.radius * max(self.size(0.0), self.size(math.inf)) * max(GLOW_TABLE.values)
+        for k, axis in enumerate('xyz'):
+            lo, hi = self.area[k] or SPAWN_AREA[k]
+            if axis == 'x':
+                # Animated targets sweep SPHERE_MOVE_RANGE / 2 either way, clamped to 0.8 ARENA_HALF
+                lo = min(lo, max(lo - SPHERE_MOVE_RANGE * 0.5, -ARENA_HALF * 0.8))
+                hi = max(hi, min(hi + SPHERE_MOVE_RANGE * 0.5, ARENA_HALF * 0.8))
+            low, top = lo - reach, hi + (2 * reach if axis == 'z' else reach)
+            if low < ARENA_BOUNDS[k][0] or top > ARENA_BOUNDS[k][1]:
+                field = f"targets.area.{axis}" if axis in area else "targets.radius"
+                raise ValueError(f"{field}: targets reach {low:g}..{top:g} on {axis}, outside the arena "
+                                 f"({ARENA_BOUNDS[k][0]:g}..{ARENA_BOUNDS[k][1]:g})")
+
+    def compile(self, seed):
+        """The seeded SpawnTimeline of every spawn the session can reach"""
+        rng = random.Random(seed)
+        times, positions, radii, ttls, directions, glows = [], [], [], [], [], []
+        end = self.time_limit if self.banked else self.duration
+        t = self.interval(0.0)
+        while t < end:
+            pos = random_target_pos(rng)
+            for k, bounds in enumerate(self.area):
+                if bounds is not None:
+                    pos[k] = rng.uniform(*bounds)
+            times.append(t)
+            positions.append(pos)
+            radii.append(self.radius * self.size(t))
+            ttls.append(rng.uniform(*self.ttl(t)))
+            directions.append(rng.choice((-1, 1)))
+            glows.append(rng.uniform(0, 2 * math.pi))
+            t += self.interval(t)
+        return SpawnTimeline(times, positions, radii, ttls, directions, glows, self.when_full)
+
+class SpawnTimeline:
+    """
+    Precomputed spawn events in time order, consumed front to back
+    peek() and pop() are O(1), so a tick's cost depends only on the events due in it.
+    """
+
+    def __init__(self, times, positions, radii, ttls, directions, glows, when_full='wait'):
+        self.times = times
+        self.positions = positions
+        self.radii = radii
+        self.ttls = ttls
+        self.directions = directions
+        self.glows = glows
+        self.when_full = when_full
+        self.next = 0                    # index of the next event
+
+    def __len__(self):
+        return len(self.times)
+
+    def peek(self):
+        """Scheduled time of the next event, or inf once the timeline is exhausted"""
+        return self.times[self.next] if self.next < len(self.times) else math.inf
+
+    def pop(self):
+        """(pos, r, ttl, direction, glow_phase) of the next event"""
+        k = self.next
+        self.next += 1
+        return self.positions[k], self.radii[k], self.ttls[k], self.directions[k], self.glows[k]
+
+# =============================
+# LOADING
+# =============================
+
+def load_scenario(path):
+    """Read and validate a scenario file (.json, or .toml with tomllib)"""
+    try:
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise ValueError("TOML scenarios need Python 3.11+ (tomllib)")
+            with open(path, "rb") as f:
+                spec = tomllib.load(f)
+        else:
+            with open(path) as f:
+                spec = json.load(f)
+        return Scenario(spec)
+    except (ValueError, OverflowError, TypeError) as e:     # includes JSON and TOML syntax errors
+        raise ValueError(f"{path}: {e}") from None
+
+def load_scenarios(directory=SCENARIO_DIR):
+    """(scenarios, errors) for every scenario file in directory, in file name order"""
+    scenarios, errors = [], []
+    if not os.path.isdir(directory):
+        return scenarios, errors
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.json', '.toml')):
+            try:
+                scenarios.append(load_scenario(os.path.join(directory, name)))
+            except (OSError, ValueError) as e:
+                errors.append(str(e))
+    return scenarios, errors
@@ -0,0 +1,187 @@
+"""
+Difficulty tuning for Enhanced Aim Lab 3D with synthetic players
+
+Plays many headless sessions across a process pool. Each session is driven by a
+HumanLikeAgent (aim_lab_agents) with a reaction delay, aim noise and a turn speed
+limit, and the tool reports score and accuracy distributions for every combination of the swept
+difficulty constants (aim_lab_core.TUNABLES), mode and player profile:
+    python aim_lab_tune.py                                          # defaults, every mode and profile
+    python aim_lab_tune.py --spawn-interval-start 0.8 1.2 --sessions 200
+    python aim_lab_tune.py --endless-ttl-late 0.6,1.2 0.4,0.9 --modes Endless
+    python aim_lab_tune.py --tt-min-radius-factor 0.35 0.45 --json sweep.json
+
+Sessions are independent and seeded, so results are reproducible and the sweep
+scales with the number of worker processes.
+"""
+import argparse, itertools, json, math, multiprocessing, os, time
+
+import numpy as np
+
+from aim_lab_core import *
+from aim_lab_agents import HumanLikeAgent, play
+
+# =============================
+# TUNING CONSTANTS
+# =============================
+
+SESSION_TIME_CAP = 300.0           # longest simulated run (Time Trial can go on while the player keeps up)
+
+# Player profiles: reaction delay mean/sd (seconds), aim noise sd (degrees), turn speed (degrees/second)
+PLAYER_PROFILES = {
+    'casual': {'reaction': 0.40, 'reaction_sd': 0.08, 'aim_noise': 1.5, 'turn_speed': 240.0},
+    'average': {'reaction': 0.28, 'reaction_sd': 0.05, 'aim_noise': 0.9, 'turn_speed': 420.0},
+    'expert': {'reaction': 0.20, 'reaction_sd': 0.03, 'aim_noise': 0.4, 'turn_speed': 720.0},
+}
+
+# Command-line options for the swept constants
+TUNING_OPTIONS = {
+    'SPAWN_INTERVAL_START': '--spawn-interval-start',
+    'SPAWN_ACCEL': '--spawn-accel',
+    'ENDLESS_TTL_EARLY': '--endless-ttl-early',
+    'ENDLESS_TTL_LATE': '--endless-ttl-late',
+    'TT_MIN_RADIUS_FACTOR': '--tt-min-radius-factor',
+}
+
+# =============================
+# SESSIONS
+# =============================
+
+def play_session(mode, duration, profile, seed, time_cap=SESSION_TIME_CAP):
+    """Play one headless session with a synthetic player; returns the session summary"""
+    session = GameSession(mode, duration, clock=lambda: 0.0, seed=seed)
+    return play(session, HumanLikeAgent(**PLAYER_PROFILES[profile], seed=seed), time_cap=time_cap).summary
+
+def run_task(task):
+    """Pool worker: play a batch of seeds for one (tuning, mode, profile) cell"""
+    tuning, mode, profile, duration, seeds = task
+    previous = set_tuning(**tuning)
+    try:
+        return [(s['score'], s['accuracy'], s['time']) for s in
+                (play_session(mode, duration, profile, seed) for seed in seeds)]
+    finally:
+        set_tuning(**previous)
+
+def sweep(tunings, modes, profiles, duration, sessions, seed=0, workers=None, batch=8):
+    """
+    Play sessions for every (tuning, mode, profile) cell in a process pool
+    Returns one result dict per cell with the raw score, accuracy and time arrays.
+    Every cell uses the same seeds, so differences between cells come from the tuning.
+    """
+    cells = list(itertools.product(range(len(tunings)), modes, profiles))
+    seeds = [seed + k for k in range(sessions)]
+    tasks, owners = [], []
+    for c, (t, mode, profile) in enumerate(cells):
+        for start in range(0, sessions, batch):
+            tasks.append((tunings[t], mode, profile, duration, seeds[start:start + batch]))
+            owners.append(c)
+    results = [[] for _ in cells]
+    with multiprocessing.Pool(workers) as pool:
+        for c, rows in zip(owners, pool.imap(run_task, tasks)):
+            results[c] += rows
+    report = []
+    for (t, mode, profile), rows in zip(cells, results):
+        score, accuracy, run_time = (np.array(column, dtype=float) for column in zip(*rows))
+        report.append({'tuning': tunings[t], 'mode': MODES[mode], 'profile': profile,
+                       'score': score, 'accuracy': accuracy, 'time': run_time})
+    return report
+
+def describe(values):
+    """mean / p10 / median / p90 of an array"""
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {'mean': float(values.mean()), 'p10': float(p10), 'median': float(median), 'p90': float(p90)}
+
+def print_report(report):
+    """Table of score and accuracy distributions, one line per cell"""
+    print(f"{'tuning':<48} {'mode':<11} {'profile':<8} {'score mean/p10/p50/p90':>26} {'accuracy mean/p50':>18}")
+    for cell in report:
+        tuning = " ".join(f"{k}={v}" for k, v in cell['tuning'].items()) or "(defaults)"
+        s, a = describe(cell['score']), describe(cell['accuracy'])
+        print(f"{tuning:<48} {cell['mode']:<11} {cell['profile']:<8} "
+              f"{s['mean']:7.1f} {s['p10']:5.0f} {s['median']:5.0f} {s['p90']:5.0f}   "
+              f"{a['mean']:7.1f}% {a['median']:6.0f}%")
+
+# =============================
+# ENTRY POINT
+# =============================
+
+def parse_value(text):
+    """A swept value: a number, or a comma-separated (min, max) range"""
+    parts = [float(v) for v in text.split(',')]
+    if not all(math.isfinite(v) for v in parts):
+        raise argparse.ArgumentTypeError(f"expected finite numbers: {text}")
+    if len(parts) == 1:
+        return parts[0]
+    if len(parts) == 2:
+        return tuple(parts)
+    raise argparse.ArgumentTypeError(f"expected a number or min,max: {text}")
+
+def tuning_error(name, value):
+    """Why value can't replace the tunable constant name (wrong shape or out of range), or None"""
+    ranged = isinstance(globals()[name], tuple)
+    if isinstance(value, tuple) != ranged:
+        return f"expected {'min,max' if ranged else 'a number'}"
+    if ranged:
+        if not 0.0 < value[0] <= value[1]:
+            return "expected 0 < min <= max"
+    elif name == 'SPAWN_ACCEL' and not value > 0.0:
+        return "expected a value > 0"
+    elif name == 'SPAWN_INTERVAL_START' and not value >= SPAWN_INTERVAL_MIN:
+        return f"expected a value >= SPAWN_INTERVAL_MIN ({SPAWN_INTERVAL_MIN:g})"
+    elif name == 'TT_MIN_RADIUS_FACTOR' and not 0.0 < value <= 1.0:
+        return "expected a value in (0, 1]"
+    return None
+
+def parse_mode(text):
+    """Mode index from its name (case and spaces ignored) or number"""
+    names = [m.replace(' ', '').lower() for m in MODES]
+    key = text.replace(' ', '').lower()
+    if key in names:
+        return names.index(key)
+    if key.isdigit() and int(key) < len(MODES):
+        return int(key)
+    raise argparse.ArgumentTypeError(f"unknown mode {text} (choose from {', '.join(MODES)})")
+
+def parse_args(argv=None):
+    """Command-line arguments and the list of tunings to sweep (every value checked up front)"""
+    parser = argparse.ArgumentParser(description="Sweep Enhanced Aim Lab 3D difficulty with synthetic players")
+    for name, option in TUNING_OPTIONS.items():
+        parser.add_argument(option, dest=name, type=parse_value, nargs='+', help=f"values of {name}")
+    parser.add_argument('--modes', type=parse_mode, nargs='+', default=list(range(len(MODES))), help="game modes")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PLAYER_PROFILES), default=list(PLAYER_PROFILES),
+                        help="synthetic player profiles")
+    parser.add_argument('--duration', type=float, default=DURATION_OPTIONS[1], help="session length (seconds)")
+    parser.add_argument('--sessions', type=int, default=50, help="sessions per cell")
+    parser.add_argument('--seed', type=int, default=0, help="first session seed")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--json', help="write per-cell distributions to this JSON file")
+    args = parser.parse_args(argv)
+
+    swept = {name: getattr(args, name) for name in TUNING_OPTIONS if getattr(args, name)}
+    for name, values in swept.items():
+        # Reject bad values here, not in the middle of the sweep inside a worker process
+        for value in values:
+            error = tuning_error(name, value)
+            if error:
+                shown = ",".join(f"{v:g}" for v in value) if isinstance(value, tuple) else f"{value:g}"
+                parser.error(f"{TUNING_OPTIONS[name]}: {error}, got {shown}")
+    return args, [dict(zip(swept, values)) for values in itertools.product(*swept.values())]
+
+def main():
+    args, tunings = parse_args()
+    total = len(tunings) * len(args.modes) * len(args.profiles) * args.sessions
+    t0 = time.perf_counter()
+    report = sweep(tunings, args.modes, args.profiles, args.duration, args.sessions, args.seed, args.workers)
+    wall = time.perf_counter() - t0
+    print_report(report)
+    print(f"{total} sessions in {wall:.1f}s on {args.workers} workers ({total / wall:.1f} sessions/s)")
+
+    if args.json:
+        cells = [{'tuning': {k: list(v) if isinstance(v, tuple) else v for k, v in cell['tuning'].items()},
+                  'mode': cell['mode'], 'profile': cell['profile'], 'sessions': len(cell['score']),
+                  'score': describe(cell['score']), 'accuracy': describe(cell['accuracy']),
+                  'time': describe(cell['time'])} for cell in report]
+        with open(args.json, "w") as f:
+            json.dump({'duration': args.duration, 'seed': args.seed, 'cells': cells}, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for Enhanced Aim Lab 3D (python -m pytest); helpers is shared with aim_lab_bench.py"""
@@ -0,0 +1,19 @@
+"""
+pytest setup: wall-clock performance tests (marked perf) only run with --perf,
+so a loaded CI machine can't fail the correctness suite on timing alone
+"""
+import pytest
+
+def pytest_addoption(parser):
+    parser.addoption("--perf", action="store_true", help="also run wall-clock performance tests")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: wall-clock performance test (skipped unless --perf)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf"):
+        return
+    skip = pytest.mark.skip(reason="wall-clock performance test (run with --perf)")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,118 @@
+"""
+Shared scripting for the tests and aim_lab_bench.py: scenes, sessions, aiming,
+spawn timelines and timing
+"""
+import math, random, time, tracemalloc
+
+import numpy as np
+
+from aim_lab_core import *
+from aim_lab_agents import Observation
+from aim_lab_replay import start_recording, make_recording
+
+def aim_at(session, i):
+    """Look straight at target row i"""
+    obs = Observation(session)
+    session.look(*obs.turn_to(*obs.angles_to(obs.pos[i])))
+
+def spawn_timeline(mode, tick_rate, seconds=40.0, seed=7, scenario=None):
+    """Run a session with no shots at a fixed tick rate; return (id, born, ttl, x, radius) per spawn"""
+    session = GameSession(mode, 30.0, clock=lambda: 0.0, seed=seed, scenario=scenario)
+    session.toggle_animated()
+    session.toggle_glowing()
+    store = session.targets
+    timeline = {}
+    for _ in range(int(round(seconds * tick_rate))):
+        session.step(1.0 / tick_rate)
+        for i in range(store.count):
+            timeline.setdefault(int(store.ids[i]), (float(store.born[i]), float(store.ttl[i]),
+                                                    float(store.original_x[i]), float(store.original_r[i])))
+        if session.state != 'running':
+            break
+    return sorted(timeline.items())
+
+def record_scripted_session(mode, seed=11):
+    """Play a session with scripted, varied inputs at irregular frame times and return its recording"""
+    session = GameSession(mode, 30.0, clock=lambda: 0.0, seed=seed)
+    scheduler = FixedStepScheduler(session)
+    start_recording(session)
+    script = random.Random(seed)
+    while session.state == 'running':
+        scheduler.advance(script.uniform(0.002, 0.03))
+        roll = script.random()
+        if session.targets.count and roll < 0.3:
+            aim_at(session, script.randrange(session.targets.count))
+            session.fire()
+        elif roll < 0.32:
+            session.fire()
+        elif roll < 0.34:
+            session.strafe(script.choice([-MOVE_SPEED, MOVE_SPEED]))
+        elif roll < 0.35:
+            session.toggle_animated()
+        elif roll < 0.36:
+            session.toggle_glowing()
+        elif roll < 0.365 or session.paused:
+            session.toggle_pause()
+    return make_recording(session, scheduler.tick)
+
+def traced_growth(fn):
+    """Run fn under tracemalloc; return (net bytes still allocated, peak bytes above the start)"""
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current - start, peak - start
+
+def time_call(fn, min_time=0.2):
+    """Call fn repeatedly for at least min_time seconds; return mean seconds per call"""
+    calls = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        spent = time.perf_counter() - t0
+        if spent >= min_time:
+            return spent / calls
+        calls *= 2 if spent <= 0 else max(2, int(min_time / spent * 1.2))
+
+def make_scene(count, rng):
+    """Random target centers/radii spread like spawned targets (radii cover Time Trial shrink and glow)"""
+    centers = np.column_stack([
+        rng.uniform(-ARENA_HALF * 0.5, ARENA_HALF * 0.5, count),
+        rng.uniform(50, ARENA_DEPTH * 0.9, count),
+        rng.uniform(TARGET_MIN_Z, TARGET_MAX_Z, count),
+    ])
+    radii = TARGET_RADIUS * rng.uniform(TT_MIN_RADIUS_FACTOR, 1.3, count)
+    return centers, radii
+
+def make_store(centers, radii):
+    """TargetStore holding the given spheres, with a uniform grid attached"""
+    store = TargetStore(len(centers))
+    for p, r in zip(centers, radii):
+        store.add(p, r, 0.0, math.inf, 1, 0.0)
+    store.attach_grid(TargetGrid())
+    return store
+
+def make_rays(count, centers, rng):
+    """Rays from the player start: half aimed near a random target, half in random forward directions"""
+    origins = np.tile([0.0, -300.0, CAM_HEIGHT], (count, 1))
+    aim = centers[rng.integers(0, len(centers), count)] + rng.normal(0.0, 15.0, (count, 3)) - origins
+    wild = np.column_stack([rng.uniform(-1, 1, count), np.ones(count), rng.uniform(-0.3, 0.3, count)])
+    directions = np.where((np.arange(count) % 2 == 0)[:, None], aim, wild)
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    return origins, directions
+
+def make_session(mode, count, seed=1):
+    """Running session holding count spawned targets that never expire"""
+    session = GameSession(mode, 3600.0, clock=lambda: 0.0, max_targets=count, seed=seed)
+    for _ in range(count):
+        session.spawn_target()
+    store = session.targets
+    store.ttl[:store.count] = math.inf
+    store.reschedule()
+    session.select_broad_phase()
+    return session
@@ -0,0 +1,27 @@
+"""
+Scripted agents end to end
+"""
+import pytest
+
+from aim_lab_core import *
+from aim_lab_agents import PerfectAgent, RandomAgent, play
+from aim_lab_replay import start_recording, make_recording, replay, verify
+
+@pytest.mark.parametrize('mode', (MODE_NORMAL, MODE_ENDLESS, MODE_PRECISION), ids=lambda m: MODES[m])
+def test_perfect_agent_hits_every_reachable_target(mode, seed=17):
+    """The perfect agent hits every target it can reach (heads in Precision)"""
+    session = play(GameSession(mode, 30.0, clock=lambda: 0.0, seed=seed), PerfectAgent())
+    s = session.summary
+    per_hit = 5 if mode == MODE_PRECISION else 1
+    assert s['accuracy'] == 100
+    assert s['score'] == per_hit * s['hits']
+    assert s['hits'] >= s['spawned_spheres'] - session.targets.count
+
+def test_random_agent_stress_replays(seed=17, stress_rate=600.0):
+    """A random agent firing stress_rate shots per second lands every shot and replays identically"""
+    session = GameSession(MODE_NORMAL, 30.0, clock=lambda: 0.0, seed=seed)
+    start_recording(session)
+    play(session, RandomAgent(fire_rate=stress_rate, seed=seed))
+    assert abs(session.shots - stress_rate * 30.0) <= 0.05 * stress_rate * 30.0
+    recording = make_recording(session, 1.0 / SIM_TICK_RATE)
+    assert verify(recording, replay(recording)) == []
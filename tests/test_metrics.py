@@ -0,0 +1,116 @@
+"""
+Shot log, quantile sketches and session history
+"""
+import random, sqlite3, time
+
+import numpy as np
+import pytest
+
+from aim_lab_core import *
+from aim_lab_metrics import (HISTORY_COLUMNS, HISTORY_TREND, SKETCH_ERROR, QuantileSketch, SessionHistory,
+                             ShotLog, history_row, read_shot_log, shot_log_path)
+from tests.helpers import aim_at
+
+def test_shot_log_matches_session(tmp_path, seed=11):
+    """A shot log holds one record per shot that agrees with the session's counters"""
+    path = str(tmp_path / "run.shots")
+    session = GameSession(MODE_PRECISION, 30.0, clock=lambda: 0.0, seed=seed)
+    session.shot_log = ShotLog(path)
+    scheduler = FixedStepScheduler(session)
+    script = random.Random(seed)
+    while session.state == 'running':
+        scheduler.advance(script.uniform(0.002, 0.03))
+        if session.targets.count and script.random() < 0.3:
+            aim_at(session, script.randrange(session.targets.count))
+        if script.random() < 0.3:
+            session.fire()
+    session.shot_log.close()
+    shots = read_shot_log(path)
+
+    assert session.shot_log.dropped == 0
+    assert len(shots) == session.shots
+    hit = shots['zone'] > 0
+    assert int(hit.sum()) == session.hits
+    assert int((shots['zone'] == ZONE_HEAD).sum()) == session.headshot_hits
+    assert len(set(shots['target_id'][hit].tolist())) == session.hits
+    assert int((shots['target_id'][~hit] != -1).sum()) == 0
+    assert (np.diff(shots['t']) >= 0).all()
+
+def test_runs_started_together_log_apart(tmp_path):
+    """Sessions started within the same second write separate shot logs"""
+    sessions = [GameSession(MODE_NORMAL, 15.0, clock=lambda: 0.0, seed=seed) for seed in (1, 2)]
+    for session in sessions:
+        session.shot_log = ShotLog(shot_log_path("Normal", session.seed, str(tmp_path)))
+    for _ in range(3):
+        for session in sessions:
+            session.fire()
+    for session in sessions:
+        session.shot_log.close()
+    assert [len(read_shot_log(s.shot_log.path)) for s in sessions] == [3, 3]
+
+def test_quantile_sketch_error(samples=100000, seed=5):
+    """QuantileSketch estimates stay within SKETCH_ERROR of exact quantiles"""
+    values = np.random.default_rng(seed).lognormal(-0.7, 0.5, samples)   # reaction-time like
+    sketch = QuantileSketch(1e-3, 60.0)
+    for v in values.tolist():
+        sketch.add(v)
+    for q in (0.5, 0.9, 0.99):
+        exact = float(np.quantile(values, q, method='lower'))
+        assert abs(sketch.quantile(q) - exact) <= SKETCH_ERROR * exact, f"q{q}: {sketch.quantile(q)} vs {exact}"
+
+def fill_history(path, rows, seed, players=20):
+    """
+    SessionHistory at path holding rows random past sessions
+    Returns (history, key, scores): one player's (player, mode, duration) key and its scores in order.
+    """
+    script = random.Random(seed)
+    keys = [(f"player{p}", mode, duration) for p in range(players) for mode in MODES for duration in DURATION_OPTIONS]
+    filler = []
+    for i in range(rows):
+        player, mode, duration = script.choice(keys)
+        filler.append({'player': player, 'mode': mode, 'duration': duration, 'played_at': float(i),
+                       'score': script.randrange(100), 'shots': 0, 'hits': 0, 'accuracy': 0, 'run_time': duration,
+                       'headshot_hits': 0, 'reason': 'time', 'seed': None,
+                       'time_to_hit_median': None, 'flick_angle_median': None})
+    key = ("player0", MODES[MODE_NORMAL], 15.0)
+    history = SessionHistory(path)
+    history.standing(*key).result()          # creates the schema
+    with sqlite3.connect(history.path) as conn:
+        conn.executemany(f"INSERT INTO sessions ({', '.join(HISTORY_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})",
+                         [[row[c] for c in HISTORY_COLUMNS] for row in filler])
+    conn.close()
+    return history, key, [row['score'] for row in filler if (row['player'], row['mode'], row['duration']) == key]
+
+def lookup_time(history, key, lookups=200):
+    """Mean seconds per standing() query"""
+    start = time.perf_counter()
+    for _ in range(lookups):
+        history.standing(*key).result()
+    return (time.perf_counter() - start) / lookups
+
+def test_session_history_standing(tmp_path, rows=20000, seed=13):
+    """Recording a session returns the right personal best and trend"""
+    history, key, mine = fill_history(str(tmp_path / "history.sqlite3"), rows, seed)
+    session = GameSession(MODE_NORMAL, 15.0, clock=lambda: 0.0, seed=seed)
+    FixedStepScheduler(session).advance(16.0)
+    session.score = 1000                     # a new personal best
+    standing = history.record(history_row("player0", 15.0, session.end(), session.seed, rows)).result()
+    history.close()
+
+    mine.append(1000)
+    recent, previous = mine[-HISTORY_TREND:], mine[-2 * HISTORY_TREND:-HISTORY_TREND]
+    assert standing == {'best': 1000, 'previous_best': max(mine[:-1]),
+                        'recent': sum(recent) / len(recent), 'previous': sum(previous) / len(previous)}
+
+@pytest.mark.perf
+def test_session_history_lookups_stay_index_fast(tmp_path, rows=(1000, 200000), seed=13, max_ratio=5.0):
+    """A standing lookup over a large history costs about what it does over a small one"""
+    costs = []
+    for count in rows:
+        history, key, _ = fill_history(str(tmp_path / f"history{count}.sqlite3"), count, seed)
+        lookup_time(history, key, 20)        # warm up
+        costs.append(lookup_time(history, key))
+        history.close()
+    assert costs[-1] <= costs[0] * max_ratio, \
+        f"{costs[-1] * 1e6:.0f}us per lookup at {rows[-1]} rows vs {costs[0] * 1e6:.0f}us at {rows[0]}"
@@ -0,0 +1,41 @@
+"""
+Recording and headless replay
+"""
+import json, time
+
+import pytest
+
+from aim_lab_core import *
+from aim_lab_replay import ReplayWriter, load_recording, make_recording, replay, verify
+from tests.helpers import record_scripted_session
+
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_replay_matches_recording(mode):
+    """Replays rebuild the recorded summary"""
+    recording = record_scripted_session(mode)
+    assert verify(recording, replay(recording)) == []
+
+def test_replay_writer(tmp_path):
+    """ReplayWriter saves in the background and reports write errors through the future"""
+    recording = record_scripted_session(0)
+    session = replay(recording)
+    writer = ReplayWriter(tmp_path / "replays")
+    path = writer.save(session, recording['tick']).result()
+    assert load_recording(path) == json.loads(json.dumps(make_recording(session, recording['tick'])))
+    writer.close()
+    (tmp_path / "blocked").write_text("")
+    blocked = ReplayWriter(tmp_path / "blocked")
+    with pytest.raises(OSError):
+        blocked.save(session, recording['tick']).result()
+    blocked.close()
+
+@pytest.mark.perf
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_replay_speed(mode, min_speedup=100.0):
+    """Replays run faster than min_speedup x real time"""
+    recording = record_scripted_session(mode)
+    replay(recording)                    # warm up
+    t0 = time.perf_counter()
+    session = replay(recording)
+    speedup = session.elapsed / (time.perf_counter() - t0)
+    assert speedup >= min_speedup, f"replay ran at {speedup:.0f}x real time"
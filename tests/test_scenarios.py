@@ -0,0 +1,85 @@
+"""
+Scenario validation, compiled timelines and drill replays
+"""
+import json, math, os
+
+import pytest
+
+from aim_lab_core import *
+from aim_lab_agents import HumanLikeAgent, play
+from aim_lab_replay import start_recording, make_recording, replay, verify
+from aim_lab_scenarios import SCENARIO_DIR, Scenario, load_scenario, load_scenarios
+from tests.helpers import spawn_timeline
+
+BASE = {'name': "Check", 'duration': 20, 'targets': {'ttl': [1.0, 2.0]}, 'spawn': {'interval': 0.5}}
+DRILLS, ERRORS = load_scenarios(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), SCENARIO_DIR))
+
+@pytest.mark.parametrize('broken, field', [
+    ({'spawn': {'interval': -1}}, 'spawn.interval'),
+    ({'targets': {'ttl': [2, 1]}}, 'targets.ttl'),
+    ({'scoring': {'heads': 5}}, 'scoring'),
+    ({'time': {'clock': 'sundial'}}, 'time.clock'),
+    ({'duration': math.inf}, 'duration'),
+    ({'spawn': {'interval': {'start': 1.0, 'end': 0.5, 'over': math.inf}}}, 'spawn.interval.over'),
+    ({'spawn': {'interval': 1e-9}}, 'spawn.interval'),
+    ({'max_targets': 10 ** 9}, 'max_targets'),
+    ({'targets': {'ttl': [1.0, math.nan]}}, 'targets.ttl'),
+    ({'targets': {'ttl': 1.0, 'area': {'z': [450, 600]}}}, 'targets.area.z'),
+    ({'targets': {'ttl': 1.0, 'area': {'x': [-880, 880]}}}, 'targets.area.x'),
+    ({'targets': {'ttl': 1.0, 'radius': 400}}, 'targets.radius'),
+])
+def test_bad_specs_name_the_field(broken, field):
+    """Malformed specs raise ValueError naming the offending field"""
+    with pytest.raises(ValueError) as error:
+        Scenario({**BASE, **broken})
+    assert str(error.value).startswith(field)
+
+def test_bad_files_are_reported_not_raised(tmp_path):
+    """Unparseable or out-of-range files land in load_scenarios' errors, named by path"""
+    (tmp_path / "endless.json").write_text(json.dumps({**BASE, 'spawn': {'interval': {
+        'start': 1.0, 'end': 0.5, 'over': math.inf}}}))
+    (tmp_path / "huge.json").write_text(json.dumps({**BASE, 'targets': {'ttl': 10 ** 400}}))
+    (tmp_path / "ok.json").write_text(json.dumps(BASE))
+    drills, errors = load_scenarios(str(tmp_path))
+    assert [d.name for d in drills] == ["Check"]
+    assert len(errors) == 2 and all(e.startswith(str(tmp_path)) for e in errors)
+    with pytest.raises(ValueError):
+        load_scenario(str(tmp_path / "huge.json"))
+
+def test_dense_drill_at_the_arena_edge_is_hittable(seed=19):
+    """With the grid attached, shots at targets near the arena's edge resolve as brute force does"""
+    edge = Scenario({**BASE, 'max_targets': 400, 'targets': {'ttl': 100.0, 'area': {'z': [300, 330]}},
+                     'spawn': {'interval': 0.02}})
+    session = GameSession(clock=lambda: 0.0, seed=seed, scenario=edge)
+    session.step(10.0)
+    store = session.targets
+    assert store.grid is not None
+    eye = list(session.player_pos)
+    centers, radii = store.pos[:store.count].tolist(), store.r[:store.count].tolist()
+    for i in range(0, store.count, 7):
+        rd = [centers[i][k] - eye[k] for k in range(3)]
+        norm = math.sqrt(sum(d * d for d in rd))
+        rd = [d / norm for d in rd]
+        expected = resolve_shot_scalar(eye, rd, centers, radii, edge.head_zone)
+        assert expected[0] >= 0 and store.grid.query(eye, rd, store, edge.head_zone) == expected
+
+def test_roomy_drill_spawns_its_timeline(seed=19):
+    """Never full: every compiled event spawns at its scheduled time"""
+    roomy = Scenario({**BASE, 'max_targets': 100})
+    born = [b for _, (b, _, _, _) in spawn_timeline(None, 60, seconds=25.0, seed=seed, scenario=roomy)]
+    assert born == roomy.compile(seed).times
+
+def test_shipped_scenarios_validate():
+    assert DRILLS and ERRORS == []
+
+@pytest.mark.parametrize('scenario', DRILLS, ids=lambda d: d.name)
+def test_drill_is_tick_rate_independent_and_replays(scenario, rates=(30, 144), seed=19):
+    """Drill sessions spawn the same timeline at each tick rate, and agent runs of them replay"""
+    expected = spawn_timeline(None, rates[0], seed=seed, scenario=scenario)
+    for rate in rates[1:]:
+        assert spawn_timeline(None, rate, seed=seed, scenario=scenario) == expected, f"{rate} Hz differs"
+    session = GameSession(clock=lambda: 0.0, seed=seed, scenario=scenario)
+    start_recording(session)
+    play(session, HumanLikeAgent(seed=seed))
+    recording = json.loads(json.dumps(make_recording(session, 1.0 / SIM_TICK_RATE)))
+    assert verify(recording, replay(recording)) == []
@@ -0,0 +1,113 @@
+"""
+Simulation core: tick-rate independence, allocation-free ticks, the expiry queue and picking
+"""
+import math, random
+
+import numpy as np
+import pytest
+
+from aim_lab_core import *
+from tests.helpers import (aim_at, make_rays, make_scene, make_session, make_store, spawn_timeline, time_call,
+                           traced_growth)
+
+TICK = 1.0 / SIM_TICK_RATE
+
+def run(session, ticks):
+    """Callable stepping the session ticks fixed ticks"""
+    def steps():
+        for _ in range(ticks):
+            session.step(TICK)
+    return steps
+
+@pytest.mark.parametrize('precision', (False, True), ids=('body', 'precision'))
+@pytest.mark.parametrize('count', (5, 100, 1000))
+def test_hit_testing_agrees_with_scalar(count, precision, rays=64, seed=1):
+    """resolve_shots and the grid query agree exactly with resolve_shot_scalar for every ray"""
+    rng = np.random.default_rng(seed)
+    centers, radii = make_scene(count, rng)
+    origins, directions = make_rays(rays, centers, rng)
+    store = make_store(centers, radii)
+    index, zone, dist = resolve_shots(origins, directions, centers, radii, precision)
+    center_list, radius_list = centers.tolist(), radii.tolist()
+    for k, (ro, rd) in enumerate(zip(origins.tolist(), directions.tolist())):
+        expected = resolve_shot_scalar(ro, rd, center_list, radius_list, precision)
+        assert (int(index[k]), int(zone[k]), float(dist[k]) if index[k] >= 0 else None) == expected, f"ray {k}"
+        assert store.grid.query(ro, rd, store, precision) == expected, f"ray {k}"
+
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_frame_rate_independence(mode, rates=(30, 60, 144, 300)):
+    """Every mode spawns the identical timeline at each tick rate"""
+    expected = spawn_timeline(mode, rates[0])
+    for rate in rates[1:]:
+        assert spawn_timeline(mode, rate) == expected, f"{rate} Hz timeline differs from {rates[0]} Hz"
+
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_ticks_allocate_nothing_lasting(mode, seconds=10.0, budget=4096):
+    """Game-sized sessions (effects on, spawning and expiring) don't grow over seconds of play"""
+    session = GameSession(mode, seconds + 5.0, clock=lambda: 0.0, seed=3)
+    session.toggle_animated()
+    session.toggle_glowing()
+    run(session, int(3 * SIM_TICK_RATE))()               # warm up NumPy's small-array caches
+    net, _ = traced_growth(run(session, int(seconds * SIM_TICK_RATE)))
+    assert net <= budget, f"{net} bytes still allocated after {seconds:.0f}s of ticks"
+
+def test_dense_ticks_hold_no_per_target_temporaries(dense=20000, budget=4096):
+    """A dense static scene never holds a temporary as large as one column of its targets"""
+    session = make_session(MODE_NORMAL, dense)
+    run(session, 10)()
+    net, peak = traced_growth(run(session, int(SIM_TICK_RATE)))
+    column = dense * session.targets.born.itemsize
+    assert net <= budget and peak < column, f"ticks kept {net} bytes, peaked at {peak} (one column is {column})"
+
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_expiry_queue_matches_columns(mode, seconds=30.0, seed=23):
+    """The expiry queue agrees with the born/ttl columns as targets spawn, expire and are shot"""
+    session = GameSession(mode, seconds, clock=lambda: 0.0, seed=seed)
+    store, rng = session.targets, random.Random(seed)
+    while session.state == 'running' and session.elapsed < seconds:
+        if store.count and rng.random() < 0.1:
+            aim_at(session, rng.randrange(store.count))
+            session.fire()
+        session.step(TICK)
+        n = store.count
+        expected = float((store.born[:n] + store.ttl[:n]).min()) if n else math.inf
+        assert store.next_expiry() == expected, f"at {session.elapsed:.3f}s"
+        assert store.rows == {int(store.ids[i]): i for i in range(n)}, f"at {session.elapsed:.3f}s"
+
+@pytest.mark.perf
+def test_static_tick_cost_is_flat(counts=(100, 20000), max_ratio=4.0):
+    """A static tick costs about the same whatever the number of live targets"""
+    costs = []
+    for count in counts:
+        session = make_session(MODE_NORMAL, count)
+        costs.append(time_call(lambda: session.step(TICK), 0.05))
+    assert costs[-1] <= costs[0] * max_ratio, \
+        f"static tick costs {costs[-1] * 1e6:.1f}us at {counts[-1]} targets vs {costs[0] * 1e6:.1f}us at {counts[0]}"
+
+@pytest.mark.parametrize('tuning', [{'SPAWN_ACCEL': 0.0}, {'SPAWN_ACCEL': -0.001}, {'SPAWN_INTERVAL_START': 0.15}],
+                         ids=('no_accel', 'negative_accel', 'start_below_min'))
+@pytest.mark.parametrize('mode', range(len(MODES)), ids=MODES)
+def test_degenerate_tunings_run_flat(mode, tuning):
+    """Tunings without a spawn ramp give a constant spawn delay instead of crashing"""
+    previous = set_tuning(**tuning)
+    try:
+        session = GameSession(mode, 30.0, clock=lambda: 0.0, seed=5)
+        session.step(1.0)
+        interval = session.curves['spawn_interval']
+        assert interval(0.0) == interval(25.0) > 0.0
+    finally:
+        set_tuning(**previous)
+
+def test_center_pick_ray_follows_camera(samples=200, seed=3):
+    """CPU picking sends the screen-center ray along the camera's forward vector from the eye"""
+    rng = random.Random(seed)
+    camera, viewport = Camera(), (0, 0, 1500, 1000)
+    for _ in range(samples):
+        eye = [rng.uniform(-850, 850), -300.0, CAM_HEIGHT]
+        camera.sync(rng.uniform(-180, 180), rng.uniform(-PITCH_LIMIT, PITCH_LIMIT),
+                    rng.uniform(FOV_MIN, FOV_MAX), VIEW_ASPECT, eye)
+        ro, rd = camera.pick_ray(viewport[2] / 2, viewport[3] / 2, viewport)
+        # The ray starts on the near plane, so it passes the eye NEAR units behind its origin
+        back = [ro[k] - rd[k] * NEAR for k in range(3)]
+        assert max(abs(a - b) for a, b in zip(rd, camera.forward)) <= 1e-9
+        assert max(abs(a - b) for a, b in zip(back, eye)) <= 1e-6
@@ -0,0 +1,31 @@
+"""
+Difficulty sweep argument checks
+"""
+import pytest
+
+from aim_lab_tune import parse_args
+
+@pytest.mark.parametrize('argv', [
+    ['--spawn-accel', '0'],
+    ['--spawn-accel', '-0.001'],
+    ['--spawn-accel', '0.001,0.002'],
+    ['--spawn-interval-start', '0.15'],
+    ['--endless-ttl-late', '1.2,0.6'],
+    ['--endless-ttl-early', '0,1'],
+    ['--endless-ttl-late', '0.5'],
+    ['--tt-min-radius-factor', '0'],
+    ['--tt-min-radius-factor', '1.5'],
+    ['--spawn-accel', 'nan'],
+], ids=lambda argv: " ".join(argv))
+def test_bad_values_are_rejected_before_sweeping(argv, capsys):
+    """Values the workers can't run exit through parser.error (status 2) naming the option"""
+    with pytest.raises(SystemExit) as exit:
+        parse_args(argv)
+    assert exit.value.code == 2
+    assert argv[0] in capsys.readouterr().err
+
+def test_good_values_make_every_combination():
+    args, tunings = parse_args(['--spawn-accel', '0.001', '0.003', '--endless-ttl-late', '0.6,1.2',
+                                '--tt-min-radius-factor', '1'])
+    assert tunings == [{'SPAWN_ACCEL': a, 'ENDLESS_TTL_LATE': (0.6, 1.2), 'TT_MIN_RADIUS_FACTOR': 1.0}
+                       for a in (0.001, 0.003)]